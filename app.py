@@ -1,13 +1,27 @@
 import streamlit as st
 from datetime import datetime
-import pandas as pd
-import matplotlib.pyplot as plt
 import json
+import logging
+import os
+import threading
+import time
 
-from db import SessionLocal, Job, Resume, Match, User
-from utils import parse_uploaded_file, compute_match_and_feedback, extract_keywords
+from sqlalchemy.orm import undefer
+from db import session_scope, Job, Resume, Match, User, init_db
+from utils import compute_match_and_feedback, extract_keywords, build_jd_features
+from doc_cache import content_hash, parse_cached, parse_uploaded_file_cached, find_resume_by_hash
+from doc_parser import ParseError
+from features import store_job_features, get_job_features, refresh_stale_job_features
+from score_memo import leaderboard, score_stats, save_pair_scores, text_hash
+from batch_queue import enqueue, latest_batch, active_batch, start_local_workers
+from history import PAGE_SIZE, count_matches, match_history
+from matcher import MODEL_UNAVAILABLE
+from warmup import warmup
+import metrics
 from werkzeug.security import generate_password_hash, check_password_hash
 
+log = logging.getLogger("app")
+
 st.set_page_config(page_title="Automated Resume Relevance Checker", page_icon="🧠", layout="wide")
 
 # -------------------- CSS --------------------
@@ -21,15 +35,118 @@ st.markdown("""
 
 st.markdown('<div class="header"><h1>🧠 Automated Resume Relevance Checker</h1></div>', unsafe_allow_html=True)
 
-# -------------------- DB session --------------------
-def get_db():
-    db = SessionLocal()
+# -------------------- Startup --------------------
+# Heavy imports (pandas, matplotlib, numpy/scipy, the embedding model) are
+# deferred to the pages that use them; this runs once per process, not on
+# every rerun, and warms those resources up in the background so the
+# login page never waits for them.
+# Batch matches run in background worker processes (batch_queue.py); set
+# BATCH_WORKERS=0 when workers are deployed separately.
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 1))
+BATCH_POLL_SECONDS = 2
+# company accounts allowed on the 🛠 Metrics page (comma-separated
+# usernames); its toggle and reset act on the whole process, so nobody
+# else sees it
+METRICS_ADMINS = {u.strip() for u in os.environ.get("METRICS_ADMINS", "").split(",") if u.strip()}
+
+def update_idf():
+    """Count new resumes / jobs into the corpus idf model, in the background (see idf_model.py)"""
+    from idf_model import sync_in_background
+    sync_in_background()  # failures are logged by the sync thread
+
+def update_skill_index(db, skills=()):
+    """Add skills to the vocabulary; new skills / resumes are indexed in the background (see skill_index.py)"""
+    import skill_index
+    skill_index.add_skills(db, skills)
+    skill_index.sync_in_background()
+
+def embed_missing_rows():
+    """Embed resumes / jobs stored without a vector (older rows, uploads while the model was unavailable)"""
+    from embedding_store import sync_from_db
     try:
-        yield db
-    finally:
-        db.close()
+        with session_scope() as s:
+            sync_from_db(s)
+    except MODEL_UNAVAILABLE as e:
+        log.warning("embedding model unavailable (%s), existing rows not embedded", e)
 
-db = next(get_db())
+def sync_indexes_in_background():
+    try:
+        with session_scope() as s:
+            update_idf()
+            update_skill_index(s)
+            # jobs stored by an older scorer, so the first match doesn't rebuild them
+            refresh_stale_job_features(s)
+        embed_missing_rows()
+    except Exception:
+        log.exception("index sync at startup failed")
+
+@st.cache_resource(show_spinner=False)
+def startup():
+    init_db()
+    threading.Thread(target=warmup, daemon=True).start()
+    threading.Thread(target=sync_indexes_in_background, daemon=True).start()
+    if BATCH_WORKERS > 0:
+        start_local_workers(BATCH_WORKERS)
+    return True
+
+if __name__ != "__mp_main__":  # never in a worker process that imported this script
+    startup()
+
+# -------------------- Embedding shortlist --------------------
+JOB_SHORTLIST_K = 50  # jobs fully scored per candidate auto-match
+
+def embed_row(kind, row_id, text):
+    """Store the embedding of a new resume/job; returns its vector, or None without the model"""
+    from embedding_store import get_store
+    store = get_store(kind)
+    try:
+        store.add([row_id], [text])
+    except MODEL_UNAVAILABLE as e:
+        log.warning("embedding model unavailable (%s), %s %s not embedded", e, kind, row_id)
+        return None  # embedded at the next startup (embed_missing_rows)
+    return store.get(row_id)
+
+# Rows without a stored vector yet (from before the store existed, or saved
+# while the model was unavailable) can't be ranked by embedding; the
+# shortlists below include all of them rather than silently dropping them.
+def nearest_ids(kind, query_vec, k):
+    """Top-k ids by embedding plus the unembedded ids, or None to fall back to scoring everything"""
+    from embedding_store import unembedded_ids
+    from vector_index import shortlist
+    ids = shortlist(kind, query_vec, k)
+    if not ids:
+        return None
+    return ids + unembedded_ids(db, kind)
+
+def nearest_among(kind, ids, query_vec, k):
+    """The k of ids nearest by embedding plus those of ids not embedded yet, or None when they can't be ranked"""
+    from embedding_store import get_store
+    store = get_store(kind)
+    ranked = store.nearest_among(ids, query_vec, k)
+    if not ranked:
+        return None
+    return ranked + [i for i in ids if i not in store]
+
+def keyword_candidates(features, k, among=None):
+    """Top-k resume ids (of `among`, if given) by BM25 over the JD keywords, or None without full-text search"""
+    from search import bm25_candidates
+    return bm25_candidates(db, features["keywords"], k, among=among)
+
+def must_skill_filter(skills):
+    """Ids of resumes with every skill (inverted index), or None when no skill is given"""
+    from skill_index import resumes_with_skills
+    ids = resumes_with_skills(db, skills)
+    return None if ids is None else ids.tolist()
+
+def pending_skills(skills):
+    """Must-have skills the inverted index can't answer for every resume yet"""
+    from skill_index import unindexed
+    return unindexed(db, skills)
+
+def must_skill_clause(skills):
+    """SQL filter on Resume for the leaderboard, or None when no skill is given"""
+    from skill_index import has_all_skills
+    return has_all_skills(db, skills)
 
 # -------------------- Login / Sign Up --------------------
 if "logged_in" not in st.session_state:
@@ -38,6 +155,15 @@ if "role" not in st.session_state:
     st.session_state.role = None
 if "username" not in st.session_state:
     st.session_state.username = None
+if "user_id" not in st.session_state:
+    st.session_state.user_id = None
+
+def current_user_id():
+    # sessions that logged in before user_id was tracked only have a username
+    if st.session_state.user_id is None and st.session_state.username:
+        user = db.query(User.id).filter(User.username==st.session_state.username).first()
+        st.session_state.user_id = user.id if user else None
+    return st.session_state.user_id
 
 def login():
     st.subheader("Login")
@@ -49,8 +175,9 @@ def login():
             st.session_state.logged_in = True
             st.session_state.role = user.role
             st.session_state.username = username
+            st.session_state.user_id = user.id
             st.success(f"Logged in as {username} ({user.role})")
-            st.experimental_rerun()
+            st.rerun()
         else:
             st.error("Invalid credentials")
 
@@ -69,142 +196,283 @@ def signup():
             db.commit()
             st.success(f"User {username} created. Please log in.")
 
-if not st.session_state.logged_in:
-    st.sidebar.title("Account")
-    option = st.sidebar.radio("Choose", ["Login","Sign Up"])
-    if option=="Login":
-        login()
-    else:
-        signup()
-else:
-    st.sidebar.title(f"Logged in as {st.session_state.username} ({st.session_state.role})")
-    if st.sidebar.button("Logout"):
-        st.session_state.logged_in = False
-        st.session_state.role = None
-        st.session_state.username = None
-        st.experimental_rerun()
-
-# -------------------- Navigation --------------------
-if st.session_state.logged_in:
-    if st.session_state.role=="company":
-        page = st.sidebar.radio("Go to", ["📄 Upload Job", "📊 View Matches"])
+# -------------------- DB session --------------------
+# One session per script run, i.e. per user interaction. It is closed when
+# the run ends (also on st.stop / rerun) so no connection or open
+# transaction outlives the interaction; helpers above use this global `db`.
+with session_scope() as db:
+    if not st.session_state.logged_in:
+        st.sidebar.title("Account")
+        option = st.sidebar.radio("Choose", ["Login","Sign Up"])
+        if option=="Login":
+            login()
+        else:
+            signup()
     else:
-        page = st.sidebar.radio("Go to", ["🧾 Upload Resume & Auto-Match", "📊 My Match History"])
-
-    # -------------------- Company Pages --------------------
-    if st.session_state.role=="company":
-
-        if page=="📄 Upload Job":
-            st.header("📄 Upload Job Description")
-            with st.form("job_form"):
-                jd_title = st.text_input("Job title", placeholder="e.g. Senior Data Scientist")
-                jd_file = st.file_uploader("Upload JD (pdf/docx/txt)", type=["pdf","docx","txt"])
-                submit = st.form_submit_button("➕ Add Job")
-            if submit:
-                if not jd_title:
-                    st.error("Enter job title")
+        st.sidebar.title(f"Logged in as {st.session_state.username} ({st.session_state.role})")
+        if st.sidebar.button("Logout"):
+            st.session_state.logged_in = False
+            st.session_state.role = None
+            st.session_state.username = None
+            st.session_state.user_id = None
+            st.rerun()
+
+    # -------------------- Navigation --------------------
+    if st.session_state.logged_in:
+        if st.session_state.role=="company":
+            pages = ["📄 Upload Job", "📊 View Matches", "🔎 Search Resumes"]
+            if st.session_state.username in METRICS_ADMINS:
+                pages.append("🛠 Metrics")
+            page = st.sidebar.radio("Go to", pages)
+        else:
+            page = st.sidebar.radio("Go to", ["🧾 Upload Resume & Auto-Match", "📊 My Match History"])
+
+        # -------------------- Company Pages --------------------
+        if st.session_state.role=="company":
+
+            if page=="📄 Upload Job":
+                st.header("📄 Upload Job Description")
+                with st.form("job_form"):
+                    jd_title = st.text_input("Job title", placeholder="e.g. Senior Data Scientist")
+                    jd_file = st.file_uploader("Upload JD (pdf/docx/txt)", type=["pdf","docx","txt"])
+                    submit = st.form_submit_button("➕ Add Job")
+                if submit:
+                    if not jd_title:
+                        st.error("Enter job title")
+                    else:
+                        try:
+                            jd_text, _ = parse_uploaded_file_cached(db, jd_file)
+                        except ParseError as e:
+                            st.error(f"Couldn't read {jd_file.name}: {e}")
+                            st.stop()
+                        jd_features = build_jd_features(jd_text)
+                        job = Job(title=jd_title, description_text=jd_text, created_at=datetime.utcnow(), text_hash=text_hash(jd_text))
+                        store_job_features(job, jd_features)
+                        db.add(job); db.commit(); db.refresh(job)
+                        embed_row("job", job.id, jd_text)
+                        update_idf()
+                        update_skill_index(db, jd_features["keywords"])
+                        st.success(f"Job '{jd_title}' saved ✅")
+                        kw = jd_features["keywords"] or extract_keywords(jd_title, top_n=10)
+                        if kw:
+                            st.markdown("**🔑 Top JD keywords:** " + ", ".join(kw))
+
+            elif page=="📊 View Matches":
+                st.header("📊 Batch Resume Matching for Jobs")
+                # titles only; the selected job is loaded below
+                jobs = db.query(Job.id, Job.title).order_by(Job.created_at.desc()).all()
+                if not jobs:
+                    st.info("No jobs uploaded yet")
+                elif db.query(Resume.id).first() is None:
+                    st.info("No resumes uploaded yet")
                 else:
-                    jd_text = parse_uploaded_file(jd_file) if jd_file else ""
-                    job = Job(title=jd_title, description_text=jd_text, created_at=datetime.utcnow())
-                    db.add(job); db.commit(); db.refresh(job)
-                    st.success(f"Job '{jd_title}' saved ✅")
-                    kw = extract_keywords(jd_text or jd_title, top_n=10)
-                    if kw:
-                        st.markdown("**🔑 Top JD keywords:** " + ", ".join(kw))
-
-        elif page=="📊 View Matches":
-            st.header("📊 Batch Resume Matching for Jobs")
-            jobs = db.query(Job).order_by(Job.created_at.desc()).all()
-            resumes = db.query(Resume).all()
-            if not jobs:
-                st.info("No jobs uploaded yet")
-            elif not resumes:
-                st.info("No resumes uploaded yet")
-            else:
-                sel_job = st.selectbox("Select a Job to batch match", [j.title for j in jobs])
-                job_obj = next(j for j in jobs if j.title==sel_job)
-                if st.button("Run Batch Match"):
-                    results=[]
-                    for r in resumes:
-                        match_result = compute_match_and_feedback(r.content_text, job_obj.description_text)
-                        results.append({
-                            "resume": r.filename,
-                            "score": round(match_result["score"],1)
-                        })
-                    df = pd.DataFrame(results).sort_values(by="score", ascending=False)
-                    st.markdown(f"### 🏆 Best Resume: {df.iloc[0]['resume']} ({df.iloc[0]['score']}%)")
-                    st.dataframe(df)
+                    sel_job = st.selectbox("Select a Job to batch match", [title for _, title in jobs])
+                    job_obj = db.get(Job, next(jid for jid, title in jobs if title==sel_job))
+                    top_k = st.number_input("Shortlist size (resumes scored, nearest by embedding, else best keyword matches)", min_value=1, value=500, step=50)
+                    must_text = st.text_input("Must-have skills (comma-separated, optional)", placeholder="e.g. python, kubernetes")
+                    must = [s.strip() for s in must_text.split(",") if s.strip()]
+                    batch = active_batch(db, job_obj.id)
+                    if st.button("Run Batch Match", disabled=batch is not None):
+                        # new must-have skills join the vocabulary here (an
+                        # explicit run, not every rerun) and are back-filled
+                        # in the background before they can filter
+                        update_skill_index(db, must)
+                        pending = pending_skills(must)
+                        if pending:
+                            st.info("Indexing new skills (" + ", ".join(pending) + "), run the batch again in a moment")
+                        else:
+                            # scored by a background worker; only new / changed
+                            # pairs are scored, the rest come from the memo table
+                            features = get_job_features(db, job_obj)
+                            job_vec = embed_row("job", job_obj.id, job_obj.description_text)
+                            allowed = must_skill_filter(must)
+                            if allowed is None:
+                                ids = nearest_ids("resume", job_vec, int(top_k)) or keyword_candidates(features, int(top_k))
+                            elif len(allowed) > top_k:
+                                ids = (nearest_among("resume", allowed, job_vec, int(top_k))
+                                       or keyword_candidates(features, int(top_k), among=allowed) or allowed)
+                            else:
+                                ids = allowed
+                            if allowed is not None and not allowed:
+                                st.warning("No resume has all of: " + ", ".join(must))
+                            else:
+                                batch = enqueue(db, job_obj.id, user_id=current_user_id(), resume_ids=ids or None)
+                    batch = batch or latest_batch(db, job_obj.id)
+                    if batch is not None:
+                        if batch.status == "queued":
+                            st.info("Batch match queued, waiting for a worker…")
+                        elif batch.status == "running":
+                            frac = (batch.done / batch.total) if batch.total else 0.0
+                            st.progress(min(frac, 1.0), text=f"Scoring {batch.done} / {batch.total if batch.total is not None else '?'} resumes")
+                        elif batch.status == "done":
+                            st.caption(f"Last batch: scored {batch.total or 0} new or changed resumes, reused {batch.reused or 0} saved scores")
+                        elif batch.status == "failed":
+                            st.error("Last batch match failed")
+                            with st.expander("Details"):
+                                st.code(batch.error or "")
+                    # partial results show up here as the worker saves each chunk
+                    skill_clause = must_skill_clause(must)
+                    board = leaderboard(db, job_obj, limit=int(top_k), resume_filter=skill_clause)
+                    if board:
+                        import pandas as pd
+                        df = pd.DataFrame(board)[["resume", "score"]]
+                        st.markdown(f"### 🏆 Best Resume: {df.iloc[0]['resume']} ({df.iloc[0]['score']}%)")
+                        stats = score_stats(db, job_obj, resume_filter=skill_clause)
+                        st.caption(f"{stats['count']} resumes scored · mean {stats['mean']}% · min {stats['min']}% · max {stats['max']}%")
+                        st.dataframe(df)
+                    elif batch is None:
+                        st.info("Run a batch match to build this job's leaderboard")
+                    if batch is not None and batch.status in ("queued", "running"):
+                        db.close()  # don't hold a read transaction while waiting
+                        time.sleep(BATCH_POLL_SECONDS)
+                        st.rerun()
 
-    # -------------------- Candidate Pages --------------------
-    else:
-        if page=="🧾 Upload Resume & Auto-Match":
-            st.header("🧾 Upload Resume — Automatic Matching")
-            resume_file = st.file_uploader("Upload resume (pdf/docx/txt)", type=["pdf","docx","txt"])
-            if st.button("🔍 Match Automatically"):
-                if not resume_file:
-                    st.error("Upload resume first")
+            elif page=="🔎 Search Resumes":
+                st.header("🔎 Search Resumes")
+                query = st.text_input("Search", placeholder='e.g. python "machine learning" aws')
+                if query:
+                    from search import search_resumes
+                    t0 = time.perf_counter()
+                    hits = search_resumes(db, query, limit=50)
+                    took_ms = (time.perf_counter() - t0) * 1000
+                    if hits is None:
+                        st.info("Full-text search needs the SQLite database")
+                    elif not hits:
+                        st.info("No resumes match")
+                    else:
+                        import pandas as pd
+                        st.caption(f"Top {len(hits)} by relevance · {took_ms:.1f} ms")
+                        st.dataframe(pd.DataFrame(hits)[["resume", "score", "snippet", "uploaded_at"]])
+
+            elif page=="🛠 Metrics":
+                st.header("🛠 Stage Timings & Metrics")
+                st.caption("Counters and timings of this app process (batch workers export their own, see METRICS_DIR)")
+                on = st.toggle("Collect metrics", value=metrics.enabled())
+                if on != metrics.enabled():
+                    metrics.enable(on)
+                snap = metrics.snapshot()
+                if not snap["histograms"] and not snap["counters"]:
+                    st.info("Nothing recorded yet" if on else "Metrics are off (METRICS_ENABLED=1 turns them on at startup)")
                 else:
-                    resume_text = parse_uploaded_file(resume_file)
-                    jobs = db.query(Job).all()
-                    if not jobs:
-                        st.info("No jobs available yet")
+                    import pandas as pd
+                    def ms(v):
+                        return round(v * 1000, 2) if v is not None else None
+                    for name, title in (("stage_seconds", "Stages"), ("db_query_seconds", "DB queries")):
+                        rows = [{
+                            **h["labels"], "count": h["count"], "total_s": round(h["sum"], 3),
+                            "mean_ms": ms(h["mean"]), "p50_ms": ms(h["p50"]), "p95_ms": ms(h["p95"]),
+                        } for h in snap["histograms"] if h["name"] == name]
+                        if rows:
+                            st.markdown(f"#### {title}")
+                            st.dataframe(pd.DataFrame(rows).sort_values("total_s", ascending=False))
+                    if snap["counters"]:
+                        st.markdown("#### Counters")
+                        st.dataframe(pd.DataFrame([{"name": c["name"], **c["labels"], "value": c["value"]} for c in snap["counters"]]))
+                    c1, c2 = st.columns(2)
+                    c1.download_button("⬇️ Prometheus export", metrics.render_prometheus(), file_name="metrics.prom", mime="text/plain")
+                    if c2.button("Reset"):
+                        metrics.reset()
+                        st.rerun()
+                if metrics.METRICS_DIR and on:
+                    metrics.export_textfile("app")
+
+        # -------------------- Candidate Pages --------------------
+        else:
+            if page=="🧾 Upload Resume & Auto-Match":
+                st.header("🧾 Upload Resume — Automatic Matching")
+                resume_file = st.file_uploader("Upload resume (pdf/docx/txt)", type=["pdf","docx","txt"])
+                if st.button("🔍 Match Automatically"):
+                    if not resume_file:
+                        st.error("Upload resume first")
                     else:
-                        best_score = -1
-                        best_result = None
-                        best_job = None
-                        for job in jobs:
-                            r = compute_match_and_feedback(resume_text, job.description_text)
-                            if r["score"]>best_score:
-                                best_score=r["score"]
-                                best_result=r
-                                best_job=job
-                        # Save resume & match
-                        new_resume=Resume(filename=resume_file.name, content_text=resume_text, uploaded_at=datetime.utcnow())
-                        db.add(new_resume); db.commit(); db.refresh(new_resume)
-                        new_match=Match(
-                            resume_id=new_resume.id,
-                            job_id=best_job.id,
-                            score=best_result["score"],
-                            feedback=json.dumps(best_result["feedback_lines"], ensure_ascii=False),
-                            matched_skills=",".join(best_result["matched"]),
-                            missing_skills=",".join(best_result["missing"]),
-                            created_at=datetime.utcnow()
-                        )
-                        db.add(new_match); db.commit(); db.refresh(new_match)
-
-                        # Display Candidate Best Match
-                        st.markdown(f"### 🎯 Best Match: **{new_resume.filename}** ↔ **{best_job.title}**")
-                        col1, col2 = st.columns([1,1])
-                        with col1:
-                            st.metric("🏆 Overall Score", f"{best_result['score']:.1f}%")
-                            st.metric("📄 Text Similarity", f"{best_result['similarity']:.1f}%")
-                            st.metric("💡 Skill Match", f"{best_result['skill_match_pct']:.1f}%")
-                        with col2:
-                            matched = best_result['matched']
-                            missing = best_result['missing']
-                            fig, ax = plt.subplots(figsize=(4,3))
-                            ax.pie([len(matched), len(missing)],
-                                   labels=["Matched","Missing"],
-                                   autopct="%1.1f%%",
-                                   colors=["#1f77b4","#ff7f0e"],
-                                   startangle=90)
-                            ax.set_title("Keyword Match")
-                            st.pyplot(fig)
-                        st.markdown("#### ✨ Feedback")
-                        for line in best_result["feedback_lines"]:
-                            st.markdown(f"- {line}")
-
-        elif page=="📊 My Match History":
-            st.header("📊 Your Past Matches")
-            resumes = db.query(Resume).all()
-            if not resumes:
-                st.info("No past uploads")
-            else:
-                matches = db.query(Match).order_by(Match.created_at.desc()).all()
-                if not matches:
+                        raw = resume_file.getvalue()
+                        resume_hash = content_hash(raw)
+                        # same bytes uploaded before: reuse that row, skip parsing
+                        new_resume = find_resume_by_hash(db, resume_hash)
+                        if new_resume is not None:
+                            resume_text = new_resume.content_text
+                        else:
+                            try:
+                                resume_text, _ = parse_cached(db, resume_file.name, raw)
+                            except ParseError as e:
+                                st.error(f"Couldn't read {resume_file.name}: {e}")
+                                st.stop()
+                        # every job's features are scored below, load them in one query
+                        jobs = db.query(Job).options(undefer(Job.features)).all()
+                        if not jobs:
+                            st.info("No jobs available yet")
+                        else:
+                            import matplotlib.pyplot as plt
+                            from batch_scoring import score_resume_against_jobs
+                            # Save resume, then fully score only the nearest jobs
+                            if new_resume is None:
+                                new_resume=Resume(filename=resume_file.name, content_text=resume_text, uploaded_at=datetime.utcnow(), content_hash=resume_hash, text_hash=text_hash(resume_text))
+                                db.add(new_resume); db.commit(); db.refresh(new_resume)
+                                update_idf()
+                                update_skill_index(db)
+                            ids = nearest_ids("job", embed_row("resume", new_resume.id, resume_text), JOB_SHORTLIST_K)
+                            if ids:
+                                id_set = set(ids)
+                                jobs = [j for j in jobs if j.id in id_set] or jobs
+                            jobs_features = [get_job_features(db, job) for job in jobs]
+                            scores = score_resume_against_jobs(resume_text, jobs_features)
+                            best_idx = max(range(len(jobs)), key=lambda i: scores[i]["score"])
+                            best_job = jobs[best_idx]
+                            # full feedback only for the winning job
+                            best_result = compute_match_and_feedback(resume_text, best_job.description_text, jobs_features[best_idx])
+                            save_pair_scores(db, new_resume, jobs, scores)
+                            new_match=Match(
+                                resume_id=new_resume.id,
+                                job_id=best_job.id,
+                                user_id=current_user_id(),
+                                score=best_result["score"],
+                                feedback=json.dumps(best_result["feedback_lines"], ensure_ascii=False),
+                                matched_skills=",".join(best_result["matched"]),
+                                missing_skills=",".join(best_result["missing"]),
+                                created_at=datetime.utcnow()
+                            )
+                            db.add(new_match); db.commit(); db.refresh(new_match)
+
+                            # Display Candidate Best Match
+                            st.markdown(f"### 🎯 Best Match: **{new_resume.filename}** ↔ **{best_job.title}**")
+                            col1, col2 = st.columns([1,1])
+                            with col1:
+                                st.metric("🏆 Overall Score", f"{best_result['score']:.1f}%")
+                                st.metric("📄 Text Similarity", f"{best_result['similarity']:.1f}%")
+                                st.metric("💡 Skill Match", f"{best_result['skill_match_pct']:.1f}%")
+                            with col2:
+                                matched = best_result['matched']
+                                missing = best_result['missing']
+                                fig, ax = plt.subplots(figsize=(4,3))
+                                ax.pie([len(matched), len(missing)],
+                                       labels=["Matched","Missing"],
+                                       autopct="%1.1f%%",
+                                       colors=["#1f77b4","#ff7f0e"],
+                                       startangle=90)
+                                ax.set_title("Keyword Match")
+                                st.pyplot(fig)
+                            st.markdown("#### ✨ Feedback")
+                            for line in best_result["feedback_lines"]:
+                                st.markdown(f"- {line}")
+
+            elif page=="📊 My Match History":
+                st.header("📊 Your Past Matches")
+                user_id = current_user_id()
+                total = count_matches(db, user_id)
+                if not total:
                     st.info("No matches yet")
                 else:
-                    rows=[]
-                    for m in matches:
-                        job = db.query(Job).filter(Job.id==m.job_id).first()
-
+                    import pandas as pd
+                    n_pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+                    page_no = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+                    rows = match_history(db, user_id, page=int(page_no) - 1)
+                    df = pd.DataFrame([{
+                        "Date": r["created_at"].strftime("%Y-%m-%d %H:%M") if r["created_at"] else "",
+                        "Resume": r["resume"],
+                        "Job": r["job"],
+                        "Score": round(r["score"], 1),
+                        "Matched skills": r["matched_skills"].replace(",", ", "),
+                        "Missing skills": r["missing_skills"].replace(",", ", "),
+                    } for r in rows])
+                    st.caption(f"{total} matches")
+                    st.dataframe(df)
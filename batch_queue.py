@@ -0,0 +1,206 @@
+# batch_queue.py
+"""
+Background batch matching with no external broker: batch requests are rows
+in batch_jobs, claimed and executed by worker processes that poll the DB.
+
+    python batch_queue.py                 # one worker
+    python batch_queue.py --processes 4   # a local pool of workers
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import metrics
+from db import BatchJob, Job, session_scope
+
+log = logging.getLogger(__name__)
+
+POLL_SECONDS = float(os.environ.get("BATCH_POLL_SECONDS", 1.0))
+# a running batch whose worker hasn't reported progress for this long is
+# assumed dead and put back in the queue
+STALE_AFTER_SECONDS = int(os.environ.get("BATCH_STALE_AFTER_SECONDS", 300))
+CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", 1000))
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+# ---------- producer side (app) ----------
+def enqueue(db, job_id, user_id=None, resume_ids=None):
+    """Queue a batch match of job_id against resume_ids (None = all resumes)"""
+    batch = BatchJob(
+        job_id=job_id,
+        user_id=user_id,
+        status="queued",
+        resume_ids=json.dumps(resume_ids) if resume_ids is not None else None,
+        done=0,
+        created_at=datetime.utcnow(),
+    )
+    db.add(batch)
+    db.commit()
+    db.refresh(batch)
+    return batch
+
+
+def latest_batch(db, job_id):
+    return (
+        db.query(BatchJob)
+        .filter(BatchJob.job_id == job_id)
+        .order_by(BatchJob.created_at.desc(), BatchJob.id.desc())
+        .first()
+    )
+
+
+def active_batch(db, job_id):
+    """Queued or running batch for a job, or None"""
+    return (
+        db.query(BatchJob)
+        .filter(BatchJob.job_id == job_id, BatchJob.status.in_(ACTIVE_STATUSES))
+        .order_by(BatchJob.id.desc())
+        .first()
+    )
+
+
+# ---------- worker side ----------
+def _worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def requeue_stale(db):
+    """Put running batches whose worker went silent back in the queue"""
+    cutoff = datetime.utcnow() - timedelta(seconds=STALE_AFTER_SECONDS)
+    n = (
+        db.query(BatchJob)
+        .filter(BatchJob.status == "running", BatchJob.heartbeat_at < cutoff)
+        .update({"status": "queued", "worker": None}, synchronize_session=False)
+    )
+    db.commit()
+    return n
+
+
+def claim_next(db, worker):
+    """
+    Atomically take the oldest queued batch (conditional UPDATE, so two
+    workers can't claim the same row); returns its id or None
+    """
+    while True:
+        row = (
+            db.query(BatchJob.id)
+            .filter(BatchJob.status == "queued")
+            .order_by(BatchJob.id)
+            .first()
+        )
+        if row is None:
+            return None
+        now = datetime.utcnow()
+        claimed = (
+            db.query(BatchJob)
+            .filter(BatchJob.id == row.id, BatchJob.status == "queued")
+            .update({"status": "running", "worker": worker, "started_at": now, "heartbeat_at": now},
+                    synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            return row.id
+
+
+def run_batch(batch_id):
+    """Execute one claimed batch, recording progress as it goes"""
+    from features import get_job_features
+    from score_memo import score_job
+
+    with session_scope() as db:
+        batch = db.get(BatchJob, batch_id)
+        try:
+            job = db.get(Job, batch.job_id)
+            if job is None:
+                raise ValueError(f"job {batch.job_id} no longer exists")
+            resume_ids = json.loads(batch.resume_ids) if batch.resume_ids else None
+            try:
+                from idf_model import sync
+                sync(db)  # count resumes added since the last sync first
+            except Exception:
+                # scoring still works with the model as it is
+                log.exception("idf sync before batch %s failed", batch_id)
+                db.rollback()
+            try:
+                import skill_index
+                skill_index.add_skills(db, get_job_features(db, job)["keywords"])
+                skill_index.sync(db)  # index new resumes / JD keywords
+            except Exception:
+                # must-skill filters keep reporting these skills as pending
+                log.exception("skill index sync before batch %s failed", batch_id)
+                db.rollback()
+
+            def progress(scored, to_score):
+                batch.total = to_score
+                batch.done = scored
+                batch.heartbeat_at = datetime.utcnow()
+                db.commit()
+
+            stats = score_job(db, job, get_job_features(db, job), resume_ids=resume_ids,
+                              chunk_size=CHUNK_SIZE, progress=progress)
+            batch.reused = stats["reused"]
+            batch.status = "done"
+        except Exception:
+            db.rollback()
+            batch.status = "failed"
+            batch.error = traceback.format_exc(limit=5)
+        batch.finished_at = datetime.utcnow()
+        db.commit()
+        metrics.inc("batches_total", status=batch.status)
+        metrics.export_textfile("worker")
+        return batch.status
+
+
+def run_forever(poll=POLL_SECONDS, once=False):
+    """Worker loop: claim, run, repeat; with once=True stop when the queue is empty"""
+    worker = _worker_name()
+    while True:
+        with session_scope() as db:
+            requeue_stale(db)
+            batch_id = claim_next(db, worker)
+        if batch_id is not None:
+            run_batch(batch_id)
+        elif once:
+            return
+        else:
+            time.sleep(poll)
+
+
+def start_local_workers(processes=1):
+    """
+    Spawn worker processes that live as long as the calling process
+    (used by the Streamlit app when no separate worker is deployed; see
+    spawning.py for why they aren't started with Process.start directly)
+    """
+    import spawning
+    return [spawning.start(run_forever) for _ in range(processes)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run background batch-match workers")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args(argv)
+
+    from db import init_db
+    init_db()
+    if args.processes == 1:
+        run_forever(once=args.once)
+        return
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=run_forever, kwargs={"once": args.once}) for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# batch_scoring.py
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+import metrics
+from skill_matcher import get_matcher
+from idf_model import get_idf_model, hashed_counts
+from utils import _ONE_SIDED_IDF, _get_analyzer, term_counts
+
+# Vectorized one-vs-many version of utils.compute_match_and_feedback.
+# Every document is tokenized exactly once. With a corpus idf model (see
+# idf_model.py) the documents become rows of one L2-normalised tf-idf
+# matrix and the similarities are a single sparse mat-vec. Until there is
+# one, the counts restricted to the query's terms go into one sparse matrix
+# D and the two-document TF-IDF cosine (see utils.tfidf_pair_similarity) is
+# evaluated for all pairs at once:
+#   dot       = D @ q                         (shared terms, idf 1)
+#   |q|^2     = w2*sum(q^2) - (w2-1)*sum(q^2 over terms shared with d)
+#   |d|^2     = w2*sum(d^2) - (w2-1)*sum(d^2 over terms shared with q)
+# Keyword presence uses the same compiled whole-word matcher as
+# compute_match_and_feedback, so batch and per-pair results agree.
+
+
+def _pair_similarities(Dq, qv, q_sq_total, d_sq_total):
+    """
+    Dq: (n_docs x k) sparse counts of the docs restricted to the query terms
+    qv: (k,) query counts for those terms
+    q_sq_total / d_sq_total: sum of squared counts over *all* terms
+    returns (n_docs,) similarities 0..1
+    """
+    w2 = _ONE_SIDED_IDF * _ONE_SIDED_IDF
+    n = Dq.shape[0]
+    if Dq.shape[1] == 0 or q_sq_total == 0:
+        return np.zeros(n)
+    dot = Dq @ qv
+    q_shared = (Dq > 0).astype(np.float64) @ (qv * qv)
+    d_shared = np.asarray(Dq.multiply(Dq).sum(axis=1)).ravel()
+    q_norm = w2 * q_sq_total - (w2 - 1) * q_shared
+    d_norm = w2 * d_sq_total - (w2 - 1) * d_shared
+    denom = np.sqrt(q_norm * d_norm)
+    sim = np.zeros(n)
+    ok = (dot > 0) & (denom > 0)
+    sim[ok] = dot[ok] / denom[ok]
+    return np.clip(sim, 0.0, 1.0)
+
+
+def _rows(sims, skill_pcts):
+    rows = []
+    for sim, pct in zip(sims.tolist(), skill_pcts.tolist()):
+        final_score = (0.7 * sim) + (0.3 * pct)
+        rows.append({
+            "score": round(final_score * 100, 1),
+            "similarity": round(sim * 100, 1),
+            "skill_match_pct": round(pct * 100, 1),
+        })
+    return rows
+
+
+@metrics.timed("batch.score_jd")
+def score_jd_against_resumes(jd_features, resume_texts):
+    """
+    One JD vs N resumes
+    jd_features: utils.build_jd_features output (or stored job artifacts)
+    returns: list of {score, similarity, skill_match_pct}, one per resume
+    """
+    resume_texts = list(resume_texts)
+    n = len(resume_texts)
+    if n == 0:
+        return []
+    analyzer = _get_analyzer()
+    model = get_idf_model() if "hashed" in jd_features else None
+
+    jd_counts = jd_features["term_counts"]
+    q_index = {t: j for j, t in enumerate(jd_counts)}
+    qv = np.fromiter(jd_counts.values(), dtype=np.float64, count=len(jd_counts))
+    keywords = list(dict.fromkeys(jd_features["keywords"]))
+    skills = get_matcher(keywords)
+
+    rows, cols, vals = [], [], []
+    p_rows, p_cols = [], []
+    d_sq = np.zeros(n)
+    hashed = []
+    for i, text in enumerate(resume_texts):
+        if model is not None:
+            hashed.append(model.weigh(*hashed_counts(term_counts(text))))
+        else:
+            tokens = analyzer(text or "")
+            counts = Counter(tokens)
+            d_sq[i] = sum(c * c for c in counts.values())
+            for t in counts.keys() & q_index.keys():
+                rows.append(i)
+                cols.append(q_index[t])
+                vals.append(counts[t])
+        if keywords:
+            found = skills.find(text)
+            for j, kw in enumerate(keywords):
+                if kw in found:
+                    p_rows.append(i)
+                    p_cols.append(j)
+
+    if model is not None:
+        sims = np.clip(model.matrix(hashed) @ model.dense(model.jd_vector(jd_features)), 0.0, 1.0)
+    else:
+        Dq = sparse.csr_matrix((vals, (rows, cols)), shape=(n, len(q_index)), dtype=np.float64)
+        sims = _pair_similarities(Dq, qv, float((qv * qv).sum()), d_sq)
+
+    if keywords:
+        P = sparse.csr_matrix((np.ones(len(p_rows)), (p_rows, p_cols)), shape=(n, len(keywords)))
+        skill_pcts = np.asarray(P.sum(axis=1)).ravel() / len(keywords)
+    else:
+        skill_pcts = np.zeros(n)
+    return _rows(sims, skill_pcts)
+
+
+@metrics.timed("batch.score_resume")
+def score_resume_against_jobs(resume_text, jobs_features):
+    """
+    One resume vs N jobs
+    jobs_features: list of stored job artifacts (utils.build_jd_features output)
+    returns: list of {score, similarity, skill_match_pct}, one per job
+    """
+    m = len(jobs_features)
+    if m == 0:
+        return []
+    model = get_idf_model() if all("hashed" in f for f in jobs_features) else None
+    tokens = _get_analyzer()(resume_text or "")
+    r_counts = Counter(tokens)
+    q_index = {t: j for j, t in enumerate(r_counts)}
+    qv = np.fromiter(r_counts.values(), dtype=np.float64, count=len(r_counts))
+
+    rows, cols, vals = [], [], []
+    d_sq = np.zeros(m)
+    # keyword incidence (jobs x union of keywords) @ presence in the resume
+    kw_index = {}
+    k_rows, k_cols = [], []
+    n_kw = np.zeros(m)
+    for i, feats in enumerate(jobs_features):
+        if model is None:
+            job_counts = feats["term_counts"]
+            d_sq[i] = sum(c * c for c in job_counts.values())
+            for t in job_counts.keys() & q_index.keys():
+                rows.append(i)
+                cols.append(q_index[t])
+                vals.append(job_counts[t])
+        kws = dict.fromkeys(feats["keywords"])
+        n_kw[i] = len(kws)
+        for kw in kws:
+            k_rows.append(i)
+            k_cols.append(kw_index.setdefault(kw, len(kw_index)))
+
+    if model is not None:
+        J = model.matrix(model.jd_vector(f) for f in jobs_features)
+        sims = np.clip(J @ model.dense(model.weigh(*hashed_counts(term_counts(resume_text)))), 0.0, 1.0)
+    else:
+        Dq = sparse.csr_matrix((vals, (rows, cols)), shape=(m, len(q_index)), dtype=np.float64)
+        sims = _pair_similarities(Dq, qv, float((qv * qv).sum()), d_sq)
+
+    if kw_index:
+        K = sparse.csr_matrix((np.ones(len(k_rows)), (k_rows, k_cols)), shape=(m, len(kw_index)))
+        found = get_matcher(list(kw_index)).find(resume_text)
+        present = np.fromiter((kw in found for kw in kw_index), dtype=np.float64, count=len(kw_index))
+        skill_pcts = (K @ present) / np.maximum(1, n_kw)
+    else:
+        skill_pcts = np.zeros(m)
+    return _rows(sims, skill_pcts)
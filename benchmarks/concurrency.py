@@ -0,0 +1,173 @@
+# benchmarks/concurrency.py
+"""
+Concurrent uploads + batch matches against one database, the way many
+Streamlit sessions share a process: every thread runs its own
+session_scope() per operation.
+
+    python -m benchmarks.concurrency --uploaders 8 --matchers 4 --seconds 20
+    python -m benchmarks.concurrency --compare      # WAL vs rollback journal
+    python -m benchmarks.concurrency --bench-db postgresql+psycopg2://...
+
+Runs on a throwaway SQLite DB unless --bench-db names a database set aside
+for benchmarking (jobs, resumes and uploads are inserted into it).
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+WORDS = ("python java sql docker kubernetes aws spark pandas react node "
+         "leadership agile testing ml nlp etl airflow linux git ci").split()
+
+
+def _text(rng, n=300):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _seed(n_jobs, n_resumes):
+    from db import Job, Resume, init_db, session_scope
+    from features import store_job_features
+    from score_memo import text_hash
+
+    init_db()
+    rng = random.Random(0)
+    with session_scope() as db:
+        for i in range(n_jobs - db.query(Job).count()):
+            t = _text(rng, 80)
+            job = Job(title=f"bench job {i}", description_text=t, text_hash=text_hash(t))
+            store_job_features(job)
+            db.add(job)
+        rows = []
+        for i in range(n_resumes - db.query(Resume).count()):
+            t = _text(rng)
+            rows.append({"filename": f"seed{i}.txt", "content_text": t, "text_hash": text_hash(t),
+                         "uploaded_at": datetime.utcnow()})
+        db.bulk_insert_mappings(Resume, rows)
+        db.commit()
+
+
+def _upload(rng):
+    from db import Resume, session_scope
+    from score_memo import text_hash
+
+    t = _text(rng)
+    with session_scope() as db:
+        db.add(Resume(filename="upload.txt", content_text=t, text_hash=text_hash(t), uploaded_at=datetime.utcnow()))
+        db.commit()
+
+
+def _batch_match(rng, sample):
+    from sqlalchemy import func
+
+    from db import Job, Resume, session_scope
+    from features import get_job_features
+    from score_memo import leaderboard, score_job
+
+    with session_scope() as db:
+        job = db.query(Job).order_by(func.random()).first()
+        max_id = db.query(func.max(Resume.id)).scalar()
+        ids = [rng.randint(1, max_id) for _ in range(sample)]
+        score_job(db, job, get_job_features(db, job), resume_ids=ids)
+        leaderboard(db, job, limit=50)
+
+
+def run(uploaders, matchers, seconds, sample):
+    stats = {"upload": [], "batch_match": []}
+    errors = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(kind, seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                _upload(rng) if kind == "upload" else _batch_match(rng, sample)
+            except Exception as e:
+                with lock:
+                    errors[f"{kind}: {type(e).__name__}: {str(e).splitlines()[0][:80]}"] += 1
+                continue
+            with lock:
+                stats[kind].append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=worker, args=("upload", i)) for i in range(uploaders)]
+    threads += [threading.Thread(target=worker, args=("batch_match", 1000 + i)) for i in range(matchers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    def summary(lat):
+        if not lat:
+            return {"ops": 0}
+        lat = sorted(lat)
+        return {
+            "ops": len(lat),
+            "ops_per_sec": round(len(lat) / seconds, 1),
+            "p50_ms": round(statistics.median(lat) * 1000, 1),
+            "p95_ms": round(lat[int(0.95 * (len(lat) - 1))] * 1000, 1),
+            "max_ms": round(lat[-1] * 1000, 1),
+        }
+
+    from db import SQLALCHEMY_DATABASE_URL, SQLITE_JOURNAL_MODE
+    return {
+        "database": SQLALCHEMY_DATABASE_URL.split("@")[-1],
+        "journal_mode": SQLITE_JOURNAL_MODE if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else None,
+        "uploaders": uploaders,
+        "matchers": matchers,
+        "seconds": seconds,
+        "upload": summary(stats["upload"]),
+        "batch_match": summary(stats["batch_match"]),
+        "errors": dict(errors),
+    }
+
+
+def compare(args):
+    """Same workload on a fresh SQLite file per journal mode, in subprocesses."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, busy_ms in (("DELETE", 5000), ("WAL", 30000)):
+            env = dict(os.environ, SQLITE_JOURNAL_MODE=mode, SQLITE_BUSY_TIMEOUT_MS=str(busy_ms))
+            cmd = [sys.executable, "-m", "benchmarks.concurrency",
+                   "--bench-db", f"sqlite:///{os.path.join(tmp, mode.lower())}.db",
+                   "--uploaders", str(args.uploaders), "--matchers", str(args.matchers),
+                   "--seconds", str(args.seconds), "--resumes", str(args.resumes), "--sample", str(args.sample)]
+            out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(out))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent upload / batch-match benchmark")
+    parser.add_argument("--uploaders", type=int, default=8)
+    parser.add_argument("--matchers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--resumes", type=int, default=2000, help="resumes seeded before the run")
+    parser.add_argument("--sample", type=int, default=200, help="resumes per batch match")
+    parser.add_argument("--compare", action="store_true", help="run on SQLite with WAL and with a rollback journal")
+    parser.add_argument("--bench-db", metavar="URL",
+                        help="run on this database instead of a throwaway SQLite file; rows are inserted into it")
+    args = parser.parse_args(argv)
+    if args.compare:
+        print(json.dumps(compare(args), indent=2))
+        return
+    # never the app's DATABASE_URL: the run seeds and uploads rows
+    tmp = tempfile.mkdtemp(prefix="bench_concurrency_")
+    os.environ["DATABASE_URL"] = args.bench_db or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["IDF_MODEL_PATH"] = os.path.join(tmp, "idf_model.npz")
+    os.environ["EMBEDDINGS_DIR"] = os.path.join(tmp, "embeddings")
+    _seed(args.jobs, args.resumes)
+    print(json.dumps(run(args.uploaders, args.matchers, args.seconds, args.sample), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# benchmarks/corpus.py
+"""
+Deterministic synthetic resumes and job descriptions for benchmarks.
+Document i is the same for a given seed whatever the corpus size, so runs
+at different sizes (and on different commits) score the same texts.
+
+    python -m benchmarks.corpus out/ --resumes 1000 --jobs 20 --formats txt pdf docx
+"""
+import argparse
+import os
+import random
+from io import BytesIO
+
+SKILLS = (
+    "python java javascript typescript go rust c++ c# sql nosql postgresql mysql mongodb redis "
+    "docker kubernetes terraform ansible aws azure gcp linux bash git jenkins ci/cd "
+    "react angular vue node django flask fastapi spring graphql rest microservices kafka "
+    "spark hadoop airflow etl pandas numpy scikit-learn tensorflow pytorch nlp "
+    "machine-learning deep-learning statistics tableau power-bi excel agile scrum jira"
+).split()
+ROLES = ("software engineer", "data scientist", "backend developer", "frontend developer",
+         "devops engineer", "data engineer", "ml engineer", "full stack developer", "data analyst")
+VERBS = ("built", "designed", "led", "migrated", "optimized", "automated", "maintained", "shipped",
+         "scaled", "refactored", "deployed", "monitored")
+OBJECTS = ("a payments service", "the data pipeline", "an internal dashboard", "the search backend",
+           "a recommendation model", "the ci pipeline", "customer-facing apis", "the reporting stack",
+           "a streaming platform", "the mobile backend")
+OUTCOMES = ("cutting latency by {n}%", "serving {n}k users", "reducing costs by {n}%",
+            "improving accuracy by {n}%", "for {n} teams", "with {n}% test coverage")
+COMPANIES = ("Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka", "Cyberdyne")
+SCHOOLS = ("State University", "Institute of Technology", "City College", "National University")
+DEGREES = ("B.Tech in Computer Science", "B.Sc in Mathematics", "M.Sc in Data Science",
+           "MCA", "B.E. in Electronics", "M.Tech in Software Engineering")
+FIRST = ("Asha", "Ravi", "Meera", "Arjun", "Sara", "John", "Li", "Omar", "Nina", "Karan", "Priya", "Tom")
+LAST = ("Sharma", "Patel", "Rao", "Smith", "Chen", "Khan", "Garcia", "Iyer", "Brown", "Das")
+
+FORMATS = ("txt", "pdf", "docx")
+
+
+def _bullet(rng, skills):
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 90))
+    return f"{rng.choice(VERBS).capitalize()} {rng.choice(OBJECTS)} using {rng.choice(skills)} and {rng.choice(skills)}, {outcome}."
+
+
+def resume_lines(i, seed=0):
+    """Resume i as a list of text lines"""
+    rng = random.Random(f"resume:{seed}:{i}")
+    skills = rng.sample(SKILLS, rng.randint(6, 16))
+    lines = [
+        f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+        f"{rng.choice(ROLES).title()} | candidate{i}@example.com",
+        "",
+        "SUMMARY",
+        f"{rng.choice(ROLES).capitalize()} with {rng.randint(1, 15)} years of experience in "
+        f"{', '.join(skills[:3])}.",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(rng.randint(2, 4)):
+        start = rng.randint(2008, 2022)
+        lines.append(f"{rng.choice(ROLES).title()}, {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        lines.extend(f"- {_bullet(rng, skills)}" for _ in range(rng.randint(3, 6)))
+    lines += ["", "EDUCATION", f"{rng.choice(DEGREES)}, {rng.choice(SCHOOLS)}, {rng.randint(2005, 2022)}"]
+    return lines
+
+
+def jd_lines(i, seed=0):
+    """Job description i as a list of text lines"""
+    rng = random.Random(f"jd:{seed}:{i}")
+    role = rng.choice(ROLES)
+    must = rng.sample(SKILLS, rng.randint(4, 8))
+    nice = rng.sample([s for s in SKILLS if s not in must], rng.randint(2, 5))
+    lines = [
+        f"{role.title()} at {rng.choice(COMPANIES)}",
+        "",
+        f"We are looking for a {role} to join our team.",
+        "",
+        "RESPONSIBILITIES",
+    ]
+    lines.extend(f"- {_bullet(rng, must)}" for _ in range(rng.randint(4, 7)))
+    lines += ["", "REQUIREMENTS", f"- {rng.randint(1, 8)}+ years of experience"]
+    lines.extend(f"- Strong experience with {s}" for s in must)
+    lines += ["", "NICE TO HAVE"]
+    lines.extend(f"- {s}" for s in nice)
+    return lines
+
+
+def resume_text(i, seed=0):
+    return "\n".join(resume_lines(i, seed))
+
+
+def jd_text(i, seed=0):
+    return "\n".join(jd_lines(i, seed))
+
+
+def jd_skills(i, seed=0):
+    """(must, nice) skill lists of JD i, as CSV strings for matcher.hard_keyword_match"""
+    lines = jd_lines(i, seed)
+    must = [l[len("- Strong experience with "):] for l in lines if l.startswith("- Strong experience with ")]
+    nice = lines[lines.index("NICE TO HAVE") + 1:]
+    return ",".join(must), ",".join(l[2:] for l in nice)
+
+
+# ---------- file formats ----------
+def _pdf_escape(s):
+    s = s.encode("latin-1", "replace").decode("latin-1")
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def to_pdf(lines, lines_per_page=60):
+    """Minimal text PDF (Helvetica, one text object per page)"""
+    pages = [lines[k:k + lines_per_page] for k in range(0, max(len(lines), 1), lines_per_page)]
+    n = len(pages)
+    # objects: 1 catalog, 2 pages, 3 font, then (page, contents) pairs
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{4 + 2 * k} 0 R" for k in range(n)), n)).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for k, page in enumerate(pages):
+        body = "BT /F1 10 Tf 12 TL 50 790 Td\n" + "".join(f"({_pdf_escape(l)}) Tj T*\n" for l in page) + "ET"
+        stream = body.encode("latin-1")
+        objs.append(("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                     "/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * k)).encode())
+        objs.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for num, obj in enumerate(objs, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % num + obj + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref))
+    return out.getvalue()
+
+
+def to_docx(lines):
+    from docx import Document
+
+    doc = Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    out = BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def to_bytes(lines, fmt):
+    if fmt == "txt":
+        return "\n".join(lines).encode("utf-8")
+    if fmt == "pdf":
+        return to_pdf(lines)
+    if fmt == "docx":
+        return to_docx(lines)
+    raise ValueError(f"unknown format: {fmt}")
+
+
+def resume_file(i, fmt, seed=0):
+    """(filename, bytes) of resume i in fmt"""
+    return f"resume_{i:06d}.{fmt}", to_bytes(resume_lines(i, seed), fmt)
+
+
+def generate(out_dir, n_resumes, n_jobs=0, formats=FORMATS, seed=0):
+    """Write the corpus to out_dir/resumes and out_dir/jobs, cycling through formats"""
+    for sub in ("resumes", "jobs"):
+        os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+    for i in range(n_resumes):
+        name, data = resume_file(i, formats[i % len(formats)], seed)
+        with open(os.path.join(out_dir, "resumes", name), "wb") as f:
+            f.write(data)
+    for i in range(n_jobs):
+        with open(os.path.join(out_dir, "jobs", f"job_{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(jd_text(i, seed))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume / JD corpus")
+    parser.add_argument("out_dir")
+    parser.add_argument("--resumes", type=int, default=1000)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    generate(args.out_dir, args.resumes, args.jobs, tuple(args.formats), args.seed)
+    print(f"wrote {args.resumes} resumes and {args.jobs} jobs to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/storage.py
+"""
+Database size and page-query latency before and after text compression
+(db.compress_text_columns) and deferred loading of the large text columns.
+
+"Before" is the old layout: plain TEXT rows loaded eagerly with every
+object. The same database is then migrated in place and measured again.
+
+    python -m benchmarks.storage --resumes 20000 --out storage.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import corpus
+
+N_JOBS = 50
+REPEATS = 5
+
+
+def _seed(n_resumes, n_matches):
+    """Rows written as plain text, the way they were stored before compression"""
+    from sqlalchemy import text
+    from db import init_db, session_scope
+    from score_memo import text_hash
+    from utils import compute_match_and_feedback
+
+    init_db()
+    now = datetime.utcnow()
+    with session_scope() as db:
+        for start in range(0, n_resumes, 5000):
+            rows = []
+            for i in range(start, min(n_resumes, start + 5000)):
+                t = corpus.resume_text(i)
+                rows.append({"f": f"resume_{i:06d}.txt", "t": t, "h": text_hash(t), "at": now})
+            db.execute(text("INSERT INTO resumes (filename, content_text, text_hash, uploaded_at) VALUES (:f, :t, :h, :at)"), rows)
+        jds = [corpus.jd_text(j) for j in range(N_JOBS)]
+        db.execute(text("INSERT INTO jobs (title, description_text, text_hash, created_at) VALUES (:title, :t, :h, :at)"),
+                   [{"title": f"job {j}", "t": t, "h": text_hash(t), "at": now} for j, t in enumerate(jds)])
+        feedback = [json.dumps(compute_match_and_feedback(corpus.resume_text(i), jds[i % N_JOBS])["feedback_lines"],
+                               ensure_ascii=False) for i in range(50)]
+        db.execute(text("INSERT INTO matches (resume_id, job_id, score, feedback, created_at) VALUES (:r, :j, :s, :fb, :at)"),
+                   [{"r": i % n_resumes + 1, "j": i % N_JOBS + 1, "s": 50.0, "fb": feedback[i % 50], "at": now}
+                    for i in range(n_matches)])
+        db.commit()
+
+
+def _sizes(path):
+    """File size after VACUUM, and bytes per table (the FTS index is its own share)"""
+    from sqlalchemy import text
+    from db import engine
+
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        try:
+            tables = dict(conn.execute(text(
+                "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN ('resumes', 'jobs', 'matches') GROUP BY name"
+            )).all())
+        except Exception:
+            tables = None  # SQLite built without dbstat
+    return {"db_bytes": os.path.getsize(path), "table_bytes": tables}
+
+
+def _time(fn):
+    """median seconds over REPEATS runs, each on a fresh session"""
+    from db import session_scope
+
+    samples = []
+    for _ in range(REPEATS):
+        with session_scope() as db:
+            t0 = time.perf_counter()
+            fn(db)
+            samples.append(time.perf_counter() - t0)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def _queries(eager):
+    """{name: median ms} of the queries behind the list / leaderboard pages"""
+    from sqlalchemy.orm import undefer
+    from db import Job, Match, Resume
+    from score_memo import leaderboard
+
+    def q(db, model, *cols):
+        query = db.query(model)
+        return query.options(*(undefer(c) for c in cols)) if eager else query
+
+    return {
+        "resume_page_50": _time(lambda db: q(db, Resume, Resume.content_text).order_by(Resume.id.desc()).limit(50).all()),
+        "all_resumes": _time(lambda db: q(db, Resume, Resume.content_text).all()),
+        "all_jobs": _time(lambda db: q(db, Job, Job.description_text).all()),
+        "match_page_20": _time(lambda db: q(db, Match, Match.feedback).order_by(Match.id.desc()).limit(20).all()),
+        "leaderboard_50": _time(lambda db: leaderboard(db, db.query(Job).first(), limit=50)),
+        # reads every resume text: what decompression costs
+        "scan_all_text": _time(lambda db: sum(len(t) for (t,) in db.query(Resume.content_text).yield_per(1000))),
+    }
+
+
+def run(n_resumes, n_matches, path):
+    from db import compress_text_columns
+
+    t0 = time.perf_counter()
+    _seed(n_resumes, n_matches)
+    seed_seconds = time.perf_counter() - t0
+    before = dict(_sizes(path), query_ms=_queries(eager=True))
+    t0 = time.perf_counter()
+    rewritten = compress_text_columns(vacuum=False)
+    migrate_seconds = time.perf_counter() - t0
+    after = dict(_sizes(path), query_ms=_queries(eager=False))
+    return {
+        "meta": {"resumes": n_resumes, "matches": n_matches, "jobs": N_JOBS, "repeats": REPEATS,
+                 "seed_seconds": round(seed_seconds, 2), "timestamp": datetime.utcnow().isoformat(timespec="seconds")},
+        "migration": {"rows": rewritten, "seconds": round(migrate_seconds, 2)},
+        "before": before,
+        "after": after,
+        "ratio": {
+            "db_bytes": round(after["db_bytes"] / before["db_bytes"], 3),
+            **{f"{t}_bytes": round(after["table_bytes"][t] / v, 3)
+               for t, v in (before["table_bytes"] or {}).items() if v},
+            **{k: round(after["query_ms"][k] / v, 3) if v else None for k, v in before["query_ms"].items()},
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DB size and page-query latency before/after text compression")
+    parser.add_argument("--resumes", type=int, default=20_000)
+    parser.add_argument("--matches", type=int, default=5000)
+    parser.add_argument("--out", default=None, help="also write the results JSON here")
+    args = parser.parse_args(argv)
+
+    # always a throwaway SQLite DB: the benchmark migrates it in place
+    tmp = tempfile.mkdtemp(prefix="bench_storage_")
+    path = os.path.join(tmp, "storage.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("IDF_MODEL_PATH", os.path.join(tmp, "idf_model.npz"))
+    res = run(args.resumes, args.matches, path)
+    out = json.dumps(res, indent=2)
+    print(out)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+# benchmarks/suite.py
+"""
+Throughput and peak memory of the scoring pipeline on the synthetic corpus
+(benchmarks/corpus.py), at several corpus sizes. Runs offline; results are
+written as JSON so runs on different commits can be compared.
+
+    python -m benchmarks.suite                                  # 100 / 10k / 100k
+    python -m benchmarks.suite --sizes 100 1000 --out before.json
+    python -m benchmarks.suite --sizes 100 1000 --baseline before.json
+
+batch_match writes to a throwaway SQLite DB. --bench-db URL runs it against
+another database instead (one set aside for benchmarking: the corpus
+resumes and a "benchmark job" are inserted into it).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# never reach out to the model hub; a model that isn't cached locally makes
+# compute_soft_similarity fall back to TF-IDF, which is recorded in the results
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+from benchmarks import corpus  # noqa: E402
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+N_JOBS = 10
+FILE_POOL = 60  # distinct files per format, cycled when parsing
+BENCH_JOB_TITLE = "benchmark job"
+BENCH_RESUME_PREFIX = "bench_resume_"
+
+
+class _Upload:
+    """The bits of a Streamlit UploadedFile that parse_uploaded_file uses"""
+
+    def __init__(self, name, data):
+        self.name = name
+        self._data = data
+
+    def read(self):
+        return self._data
+
+
+def _measure(fn, calls, memory=True):
+    """
+    Run fn() (which performs `calls` operations) untraced for timing, then
+    again under tracemalloc for the peak Python heap
+    """
+    t0 = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - t0
+    res = {
+        "calls": calls,
+        "seconds": round(seconds, 4),
+        "per_sec": round(calls / seconds, 1) if seconds > 0 else None,
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            fn()
+            res["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        finally:
+            tracemalloc.stop()
+    return res
+
+
+# ---------- stages ----------
+def bench_parse(n, memory):
+    from utils import parse_uploaded_file
+
+    pool = [corpus.resume_file(i, fmt) for fmt in corpus.FORMATS for i in range(min(FILE_POOL, n))]
+    by_fmt = {}
+    for fmt in corpus.FORMATS:
+        files = [f for f in pool if f[0].endswith(fmt)]
+        by_fmt[fmt] = _measure(lambda: [parse_uploaded_file(_Upload(*files[i % len(files)])) for i in range(n)], n, memory)
+    return by_fmt
+
+
+def bench_extract_keywords(n, memory):
+    from utils import extract_keywords
+
+    texts = [corpus.resume_text(i) for i in range(n)]
+    return _measure(lambda: [extract_keywords(t, top_n=10) for t in texts], n, memory)
+
+
+def bench_compute_match(n, memory):
+    from utils import compute_match_and_feedback
+
+    jds = [corpus.jd_text(j) for j in range(N_JOBS)]
+    texts = [corpus.resume_text(i) for i in range(n)]
+    return _measure(lambda: [compute_match_and_feedback(t, jds[i % N_JOBS]) for i, t in enumerate(texts)], n, memory)
+
+
+def bench_hard_match(n, memory):
+    from matcher import hard_keyword_match
+
+    jds = [(corpus.jd_text(j),) + corpus.jd_skills(j) for j in range(N_JOBS)]
+    texts = [corpus.resume_text(i) for i in range(n)]
+
+    def run():
+        for i, t in enumerate(texts):
+            jd, must, nice = jds[i % N_JOBS]
+            hard_keyword_match(jd, t, must, nice)
+    return _measure(run, n, memory)
+
+
+def _soft_backend():
+    try:
+        from matcher import get_model
+        get_model()
+        return "embedding"
+    except Exception:
+        return "tfidf-fallback"
+
+
+def bench_soft_similarity(n, memory):
+    from matcher import compute_soft_similarity
+
+    backend = _soft_backend()
+    jds = [corpus.jd_text(j) for j in range(N_JOBS)]
+    texts = [corpus.resume_text(i) for i in range(n)]
+    res = _measure(lambda: [compute_soft_similarity(t, jds[i % N_JOBS]) for i, t in enumerate(texts)], n, memory)
+    res["backend"] = backend
+    return res
+
+
+def bench_embed(n, memory):
+    """
+    Texts/s of the embedding model: one encode call per (truncated) text, as
+    compute_soft_similarity used to, vs chunked batches through
+    matcher.embed_texts, cold and then from its cache
+    """
+    from matcher import _embedding_cache, chunk_text, embed_texts
+
+    if _soft_backend() != "embedding":
+        return {"backend": "unavailable"}
+    from matcher import get_model
+
+    model = get_model()
+    texts = [corpus.resume_text(i) for i in range(n)]
+
+    def cold():
+        _embedding_cache.clear()
+        embed_texts(texts)
+
+    res = {
+        "single_text_calls": _measure(lambda: [model.encode([t], show_progress_bar=False) for t in texts], n, memory),
+        "chunked_batched": _measure(cold, n, memory),
+    }
+    res["cached"] = _measure(lambda: embed_texts(texts), n, memory)
+    res["chunks_per_text"] = round(sum(len(chunk_text(t)) for t in texts) / max(1, n), 2)
+    res["backend"] = "embedding"
+    return res
+
+
+def _load_resumes(n):
+    """Grow the benchmark DB to n corpus resumes (resume i is the same at every size)"""
+    from db import Resume, session_scope
+    from score_memo import text_hash
+
+    with session_scope() as db:
+        have = db.query(Resume).filter(Resume.filename.like(f"{BENCH_RESUME_PREFIX}%")).count()
+        for start in range(have, n, 5000):
+            rows = []
+            for i in range(start, min(n, start + 5000)):
+                t = corpus.resume_text(i)
+                rows.append({"filename": f"{BENCH_RESUME_PREFIX}{i:06d}.txt", "content_text": t, "text_hash": text_hash(t),
+                             "uploaded_at": datetime.utcnow()})
+            db.bulk_insert_mappings(Resume, rows)
+            db.commit()
+
+
+def bench_batch(n, memory):
+    """End-to-end batch match of one job against n resumes stored in the DB"""
+    from db import Job, PairScore, session_scope
+    from features import get_job_features, store_job_features
+    from score_memo import score_job, text_hash
+
+    t0 = time.perf_counter()
+    _load_resumes(n)
+    load_seconds = time.perf_counter() - t0
+    with session_scope() as db:
+        job = db.query(Job).filter(Job.title == BENCH_JOB_TITLE).first()
+        if job is None:
+            t = corpus.jd_text(0)
+            job = Job(title=BENCH_JOB_TITLE, description_text=t, text_hash=text_hash(t))
+            store_job_features(job)
+            db.add(job)
+            db.commit()
+
+        def memo_run():
+            # only the benchmark job's memo rows: every run scores from scratch
+            db.query(PairScore).filter(PairScore.job_id == job.id).delete()
+            db.commit()
+            score_job(db, job, get_job_features(db, job))
+
+        return {
+            "db_load_seconds": round(load_seconds, 2),
+            "score_job": _measure(memo_run, n, memory),
+        }
+
+
+STAGES = {
+    "parse_uploaded_file": bench_parse,
+    "extract_keywords": bench_extract_keywords,
+    "compute_match_and_feedback": bench_compute_match,
+    "hard_keyword_match": bench_hard_match,
+    "compute_soft_similarity": bench_soft_similarity,
+    "embed_texts": bench_embed,
+    "batch_match": bench_batch,
+}
+# per-call stages are timed on at most this many calls; batch_match always
+# runs on the full size
+DEFAULT_MAX_CALLS = {
+    "parse_uploaded_file": 2000,
+    "extract_keywords": 10_000,
+    "compute_match_and_feedback": 10_000,
+    "hard_keyword_match": 100_000,
+    "compute_soft_similarity": 1000,
+    "embed_texts": 1000,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(sizes=DEFAULT_SIZES, stages=tuple(STAGES), max_calls=None, memory=True, progress=print):
+    """returns {"meta": {...}, "results": {size: {stage: measurements}}}"""
+    caps = dict(DEFAULT_MAX_CALLS, **(max_calls or {}))
+    out = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+            "max_calls": caps,
+            "memory": "tracemalloc peak of a second, traced run" if memory else None,
+        },
+        "results": {},
+    }
+    for n in sorted(sizes):
+        res = out["results"][str(n)] = {}
+        for name in stages:
+            calls = n if name == "batch_match" else min(n, caps[name])
+            if progress:
+                progress(f"[{n}] {name} ({calls} calls)")
+            res[name] = STAGES[name](calls, memory)
+    return out
+
+
+def _flatten(results, prefix=""):
+    for k, v in results.items():
+        if isinstance(v, dict) and "per_sec" in v:
+            yield prefix + k, v
+        elif isinstance(v, dict):
+            yield from _flatten(v, f"{prefix}{k}.")
+
+
+def compare(current, baseline):
+    """Print throughput of current vs baseline for every stage both ran"""
+    base = dict(_flatten(baseline["results"]))
+    print(f"{'stage':<55}{'baseline/s':>12}{'current/s':>12}{'ratio':>8}")
+    for key, cur in _flatten(current["results"]):
+        old = base.get(key)
+        if not old or not old.get("per_sec") or not cur.get("per_sec"):
+            continue
+        print(f"{key:<55}{old['per_sec']:>12}{cur['per_sec']:>12}{cur['per_sec'] / old['per_sec']:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parsing, matching and batch scoring")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--max-calls", type=int, help="cap on calls for every per-call stage")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory run")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--bench-db", metavar="URL",
+                        help="run batch_match on this database instead of a throwaway SQLite file; "
+                             "benchmark rows are inserted into it")
+    args = parser.parse_args(argv)
+
+    # never the app's DATABASE_URL: batch_match inserts corpus rows
+    tmp = tempfile.mkdtemp(prefix="bench_")
+    os.environ["DATABASE_URL"] = args.bench_db or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["IDF_MODEL_PATH"] = os.path.join(tmp, "idf_model.npz")
+    os.environ["EMBEDDINGS_DIR"] = os.path.join(tmp, "embeddings")
+    if "batch_match" in args.stages:
+        from db import init_db
+        init_db()
+
+    caps = {k: args.max_calls for k in DEFAULT_MAX_CALLS} if args.max_calls else None
+    results = run(args.sizes, args.stages, caps, memory=not args.no_memory,
+                  progress=lambda m: print(m, file=sys.stderr))
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.out}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    else:
+        print(json.dumps(results["results"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,124 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime
-from sqlalchemy.orm import sessionmaker, declarative_base
+import os
+import zlib
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, func, inspect, text, Column, Integer, String, Text, Float, DateTime, ForeignKey, Index, UniqueConstraint, LargeBinary
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker, declarative_base, deferred, relationship
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
+import metrics
 
 # -------------------- Database setup --------------------
-SQLALCHEMY_DATABASE_URL = "sqlite:///app.db"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# DATABASE_URL selects the backend, e.g. postgresql+psycopg2://user:pw@localhost/resumes
+SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///app.db")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+# SQLite only: WAL lets readers run alongside the single writer; writers
+# wait up to the busy timeout for the lock instead of failing at once
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 30000))
+
+# -------------------- Compressed text --------------------
+# Large text columns are stored zlib-compressed: a 0xFF marker byte (never
+# the first byte of UTF-8) then the deflate stream. Short values are stored
+# as plain UTF-8, and rows written before compression (TEXT) read back
+# unchanged, so compress_text_columns() can migrate at any time (init_db()
+# converts PostgreSQL TEXT columns to bytea first, see _binary_text_columns).
+COMPRESS_LEVEL = int(os.environ.get("TEXT_COMPRESS_LEVEL", 6))
+COMPRESS_MIN_BYTES = 256
+_ZLIB_MARK = b"\xff"
+
+def compress_text(value):
+    if value is None:
+        return None
+    raw = value.encode("utf-8")
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        packed = _ZLIB_MARK + zlib.compress(raw, COMPRESS_LEVEL)
+        if len(packed) < len(raw):
+            return packed
+    return raw
+
+def decompress_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value[:1] == _ZLIB_MARK:
+        return zlib.decompress(value[1:]).decode("utf-8")
+    return value.decode("utf-8")
+
+class CompressedText(TypeDecorator):
+    """str in Python, compressed bytes at rest"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+def register_sqlite_functions(dbapi_conn):
+    """
+    SQL functions the full-text views and triggers call (see _create_fts);
+    a SQLite connection without them fails on every write to resumes / jobs
+    """
+    # lets SQL (the full-text index) read compressed columns
+    dbapi_conn.create_function("decompress_text", 1, decompress_text, deterministic=True)
+
+def _pool_args(url):
+    """
+    Pool sizing for the backend's default pool; only QueuePool takes it
+    (in-memory SQLite uses SingletonThreadPool, which rejects these)
+    """
+    parsed = make_url(url)
+    if not issubclass(parsed.get_dialect().get_pool_class(parsed), QueuePool):
+        return {}
+    return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+
+def _create_engine(url):
+    if url.startswith("sqlite"):
+        eng = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            **_pool_args(url),
+        )
+
+        @event.listens_for(eng, "connect")
+        def _sqlite_pragmas(dbapi_conn, _record):
+            cur = dbapi_conn.cursor()
+            cur.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            if SQLITE_JOURNAL_MODE.upper() == "WAL":
+                cur.execute("PRAGMA synchronous=NORMAL")
+            cur.close()
+            register_sqlite_functions(dbapi_conn)
+
+        return eng
+    return create_engine(url, pool_pre_ping=True, pool_recycle=1800, **_pool_args(url))
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+metrics.instrument_engine(engine)  # query timing while metrics are enabled
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@contextmanager
+def session_scope():
+    """
+    One session per unit of work (a Streamlit script run, a CLI batch);
+    rolled back on error and always closed so its connection and any open
+    transaction go back to the pool
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 Base = declarative_base()
 
 # -------------------- Models --------------------
@@ -22,6 +131,8 @@ class User(Base):
     role = Column(String(32), nullable=False)  # "candidate" or "company"
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    matches = relationship("Match", back_populates="user", lazy="dynamic")
+
     def set_password(self, password):
         self.hashed_password = generate_password_hash(password)
 
@@ -33,34 +144,317 @@ class Job(Base):
     __tablename__ = "jobs"
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(256), nullable=False)
-    description_text = Column(Text, nullable=True)
+    # compressed, and only loaded when accessed (listing jobs doesn't need it)
+    description_text = deferred(Column(CompressedText, nullable=True))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # JSON artifacts from utils.build_jd_features (keywords, term counts),
+    # several times the size of the compressed JD: only loaded when accessed
+    features = deferred(Column(Text, nullable=True))
+    features_version = Column(Integer, nullable=True)
+    # sha256 of description_text, see score_memo.py
+    text_hash = Column(String(64), nullable=True)
+
+    matches = relationship("Match", back_populates="job", lazy="dynamic")
 
 
 class Resume(Base):
     __tablename__ = "resumes"
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(256), nullable=False)
-    content_text = Column(Text, nullable=False)
+    # compressed, and only loaded when accessed (listing resumes doesn't need it)
+    content_text = deferred(Column(CompressedText, nullable=False))
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    # sha256 of the uploaded bytes; re-uploads of the same file reuse this row
+    content_hash = Column(String(64), nullable=True, index=True)
+    # sha256 of content_text, see score_memo.py
+    text_hash = Column(String(64), nullable=True)
+
+    matches = relationship("Match", back_populates="resume", lazy="dynamic")
 
 
 class Match(Base):
     __tablename__ = "matches"
+    __table_args__ = (
+        Index("ix_matches_user_created", "user_id", "created_at"),
+        Index("ix_matches_job_score", "job_id", "score"),
+        Index("ix_matches_resume", "resume_id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    resume_id = Column(Integer, nullable=False)
-    job_id = Column(Integer, nullable=False)
+    resume_id = Column(Integer, ForeignKey("resumes.id"), nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # candidate who ran the match
     score = Column(Float, nullable=False)
-    feedback = Column(Text, nullable=True)
+    feedback = deferred(Column(CompressedText, nullable=True))
     matched_skills = Column(Text, nullable=True)
     missing_skills = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    resume = relationship("Resume", back_populates="matches")
+    job = relationship("Job", back_populates="matches")
+    user = relationship("User", back_populates="matches")
+
+
+class PairScore(Base):
+    """Memoized resume/job score, valid while both text hashes and the scorer version match"""
+    __tablename__ = "pair_scores"
+    __table_args__ = (
+        UniqueConstraint("resume_id", "job_id", name="uq_pair_scores_resume_job"),
+        Index("ix_pair_scores_job_score", "job_id", "score"),
+    )
+    id = Column(Integer, primary_key=True)
+    resume_id = Column(Integer, nullable=False)
+    job_id = Column(Integer, nullable=False)
+    resume_hash = Column(String(64), nullable=False)
+    jd_hash = Column(String(64), nullable=False)
+    scorer_version = Column(Integer, nullable=False)
+    idf_generation = Column(Integer, nullable=True)  # corpus idf snapshot, see idf_model.py
+    score = Column(Float, nullable=False)
+    similarity = Column(Float, nullable=False)
+    skill_match_pct = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class BatchJob(Base):
+    """Background batch match of one job against the resumes (see batch_queue.py)"""
+    __tablename__ = "batch_jobs"
+    __table_args__ = (
+        Index("ix_batch_jobs_status_id", "status", "id"),
+        Index("ix_batch_jobs_job_created", "job_id", "created_at"),
+    )
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    status = Column(String(16), nullable=False, default="queued")  # queued, running, done, failed
+    resume_ids = Column(Text, nullable=True)  # JSON shortlist; NULL = every resume
+    total = Column(Integer, nullable=True)  # pairs to score
+    done = Column(Integer, nullable=False, default=0)
+    reused = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    worker = Column(String(128), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class Skill(Base):
+    """Skill vocabulary (normalised names, see skill_index.py)"""
+    __tablename__ = "skills"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(128), unique=True, nullable=False)
+    # every resume with id <= this has been matched against the skill
+    indexed_through = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ResumeSkill(Base):
+    """Inverted index posting: resume contains skill"""
+    __tablename__ = "resume_skills"
+    __table_args__ = (
+        UniqueConstraint("skill_id", "resume_id", name="uq_resume_skills_skill_resume"),
+        Index("ix_resume_skills_resume", "resume_id"),
+        # ids are never reused, so skill_index.SkillIndex can load new rows by id
+        {"sqlite_autoincrement": True},
+    )
+    id = Column(Integer, primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id"), nullable=False)
+    resume_id = Column(Integer, ForeignKey("resumes.id"), nullable=False)
+
+
+class ParsedDocument(Base):
+    """Parsed text cache keyed by content hash (see doc_cache.py)"""
+    __tablename__ = "parsed_documents"
+    content_hash = Column(String(64), primary_key=True)
+    text = Column(CompressedText, nullable=False)
+    parser_version = Column(Integer, nullable=True)  # doc_parser.PARSER_VERSION; NULL = before it existed
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
 
 # -------------------- Create tables --------------------
+def _add_missing_columns():
+    """
+    create_all() never alters existing tables, so add any model columns
+    (nullable columns only) and indexes that an older app.db is missing
+    """
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        existing = {c["name"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if col.name in existing:
+                continue
+            col_type = col.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}"))
+        existing_idx = {i["name"] for i in insp.get_indexes(table.name)}
+        for idx in table.indexes:
+            if idx.name not in existing_idx:
+                idx.create(bind=engine)
+
+def _binary_text_columns():
+    """
+    CompressedText binds bytes; SQLite stores them in a TEXT column as they
+    are, but PostgreSQL needs bytea, so TEXT columns from before compression
+    are converted in place (their rows read back unchanged, see
+    decompress_text)
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    insp = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            continue
+        existing = {c["name"]: c["type"] for c in insp.get_columns(table.name)}
+        for col in table.columns:
+            if not isinstance(col.type, CompressedText) or col.name not in existing:
+                continue
+            if isinstance(existing[col.name], LargeBinary):
+                continue
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"ALTER TABLE {table.name} ALTER COLUMN {col.name} TYPE bytea "
+                    f"USING convert_to({col.name}, 'UTF8')"
+                ))
+
+# -------------------- Full-text search (SQLite) --------------------
+# FTS5 indexes over resumes / jobs (external content: the text itself stays
+# in the model tables, read through a view that decompresses it), kept in
+# sync by triggers so bulk inserts from ingest.py are indexed too. Queried
+# through search.py.
+FTS_TABLES = {
+    "resumes_fts": ("resumes", ("content_text",)),
+    "jobs_fts": ("jobs", ("title", "description_text")),
+}
+_COMPRESSED_COLUMNS = {"content_text", "description_text"}
+
+def _fts_value(prefix, col):
+    return f"decompress_text({prefix}.{col})" if col in _COMPRESSED_COLUMNS else f"{prefix}.{col}"
+
+def _create_fts():
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        have = dict(conn.execute(text("SELECT name, sql FROM sqlite_master WHERE type IN ('table', 'view')")).all())
+        for fts, (table, cols) in FTS_TABLES.items():
+            view = f"{fts}_content"
+            if fts in have and f"content='{view}'" in have[fts]:
+                continue
+            if fts in have:
+                # built before text compression, straight on the table
+                conn.execute(text(f"DROP TABLE {fts}"))
+                for suffix in ("ai", "ad", "au"):
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{suffix}"))
+            col_list = ", ".join(cols)
+            new = ", ".join(_fts_value("new", c) for c in cols)
+            old = ", ".join(_fts_value("old", c) for c in cols)
+            conn.execute(text(f"DROP VIEW IF EXISTS {view}"))
+            conn.execute(text(
+                f"CREATE VIEW {view} AS SELECT id, "
+                + ", ".join(f"{_fts_value(table, c)} AS {c}" for c in cols)
+                + f" FROM {table}"
+            ))
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5({col_list}, content='{view}', content_rowid='id', "
+                f"tokenize='porter unicode61')"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {col_list} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old}); "
+                f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new}); END"
+            ))
+            # index the rows that existed before the table did
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+def compress_text_columns(chunk_size=500, vacuum=True, progress=None):
+    """
+    Migration: rewrite text stored before compression so it is compressed
+    (rows already compressed are skipped on SQLite). VACUUM afterwards
+    returns the freed pages to the filesystem.
+    progress: optional callable(table, rows_rewritten)
+    returns {table: rows rewritten}
+    """
+    targets = ((Resume, Resume.id, "content_text"), (Job, Job.id, "description_text"),
+               (Match, Match.id, "feedback"), (ParsedDocument, ParsedDocument.content_hash, "text"))
+    sqlite = engine.dialect.name == "sqlite"
+    _binary_text_columns()
+    done = {}
+    with session_scope() as db:
+        for model, pk, col in targets:
+            column = getattr(model, col)
+            q = db.query(pk, column)
+            if sqlite:
+                q = q.filter(func.typeof(column) == "text")
+            last, n = None, 0
+            while True:
+                page = q.filter(pk > last) if last is not None else q
+                rows = page.order_by(pk).limit(chunk_size).all()
+                if not rows:
+                    break
+                db.bulk_update_mappings(model, [{pk.key: k, col: v} for k, v in rows])
+                db.commit()
+                last = rows[-1][0]
+                n += len(rows)
+                if progress:
+                    progress(model.__tablename__, n)
+            done[model.__tablename__] = n
+    if vacuum and sqlite:
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    return done
+
+def sqlite_connect(path=None):
+    """
+    Plain sqlite3 connection to the app's SQLite database (or `path`) with
+    register_sqlite_functions applied, for maintenance scripts
+    """
+    import sqlite3
+    conn = sqlite3.connect(path or make_url(SQLALCHEMY_DATABASE_URL).database,
+                           timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    register_sqlite_functions(conn)
+    return conn
+
+def run_sql(statement, params=None):
+    """
+    Run one SQL statement on the app's database in its own transaction
+    (on SQLite with the functions the full-text triggers need)
+    returns the result rows, or the number of rows changed
+    """
+    with engine.begin() as conn:
+        result = conn.execute(text(statement), params or {})
+        return result.fetchall() if result.returns_rows else result.rowcount
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _binary_text_columns()
+    _create_fts()
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Create / migrate the database tables")
+    parser.add_argument("--compress-text", action="store_true", help="compress text stored by older versions")
+    parser.add_argument("--sql", metavar="STATEMENT",
+                        help="run one SQL statement (use this, not the sqlite3 CLI, to edit resumes / jobs on SQLite)")
+    args = parser.parse_args()
     init_db()
     print("Database tables created successfully ✅")
+    if args.compress_text:
+        print("Compressed rows:", compress_text_columns(progress=lambda t, n: print(f"  {t}: {n}", end="\r")))
+    if args.sql:
+        result = run_sql(args.sql)
+        if isinstance(result, int):
+            print(f"{result} rows changed")
+        else:
+            for row in result:
+                print(*row, sep="\t")
@@ -0,0 +1,85 @@
+# doc_cache.py
+import hashlib
+import os
+from datetime import datetime
+
+from sqlalchemy import func
+
+from db import ParsedDocument, Resume
+from doc_parser import PARSER_VERSION, parse_isolated
+
+# Parsed text is cached in the parsed_documents table keyed by the sha256
+# of the uploaded bytes, so re-uploading a file skips PDF/DOCX extraction.
+# Entries from another PARSER_VERSION (or empty ones) are parsed again.
+# When the cache grows past MAX_CACHE_BYTES the least recently used
+# entries are evicted.
+MAX_CACHE_BYTES = int(os.environ.get("PARSE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def content_hash(b):
+    return hashlib.sha256(b).hexdigest()
+
+
+def parse_cached(db, name, b):
+    """
+    name: original file name, b: raw bytes
+    returns (text, content_hash); raises doc_parser.ParseError (not cached)
+    """
+    h = content_hash(b)
+    entry = db.get(ParsedDocument, h)
+    if entry is not None and entry.parser_version == PARSER_VERSION and entry.text:
+        entry.last_used_at = datetime.utcnow()
+        db.commit()
+        return entry.text, h
+
+    try:
+        text = parse_isolated(name, b)  # worker process, time and memory bounded
+    except Exception:
+        if entry is not None:  # stale text must not be served again
+            db.delete(entry)
+            db.commit()
+        raise
+    if entry is None:
+        entry = ParsedDocument(content_hash=h, created_at=datetime.utcnow())
+        db.add(entry)
+    entry.text = text
+    entry.parser_version = PARSER_VERSION
+    entry.size_bytes = len(text.encode("utf-8"))
+    entry.last_used_at = datetime.utcnow()
+    db.commit()
+    evict(db)
+    return text, h
+
+
+def parse_uploaded_file_cached(db, uploaded_file):
+    """Streamlit uploaded_file -> (text, content_hash); ("", None) when no file"""
+    if uploaded_file is None:
+        return "", None
+    return parse_cached(db, uploaded_file.name, uploaded_file.getvalue())
+
+
+def evict(db, max_bytes=None):
+    """
+    Drop least recently used entries until the cache fits in max_bytes
+    returns number of entries evicted
+    """
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    total = db.query(func.coalesce(func.sum(ParsedDocument.size_bytes), 0)).scalar()
+    if total <= max_bytes:
+        return 0
+    evicted = []
+    for h, size in db.query(ParsedDocument.content_hash, ParsedDocument.size_bytes).order_by(ParsedDocument.last_used_at):
+        if total <= max_bytes:
+            break
+        evicted.append(h)
+        total -= size
+    db.query(ParsedDocument).filter(ParsedDocument.content_hash.in_(evicted)).delete(synchronize_session=False)
+    db.commit()
+    return len(evicted)
+
+
+def find_resume_by_hash(db, h):
+    """Existing Resume for these exact bytes, or None"""
+    if not h:
+        return None
+    return db.query(Resume).filter(Resume.content_hash == h).order_by(Resume.id).first()
@@ -0,0 +1,305 @@
+# doc_parser.py
+"""
+Bounded document parsing. The format comes from the file's magic bytes
+(the file name is only a fallback for plain text). Extraction stops at page,
+character and byte caps: a PDF is read page by page and a DOCX is checked
+for zip bombs before it is opened. Failures raise ParseError with a code
+that callers can report.
+
+ParserPool runs the parsing in separate worker processes, each with an
+address-space limit. A document that runs past the timeout gets its worker
+killed and replaced, so one pathological file costs one worker for
+PARSE_TIMEOUT_SECONDS and nothing else.
+
+    from doc_parser import ParseError, parse_isolated
+    text = parse_isolated("cv.pdf", data)
+"""
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from queue import Queue
+
+import metrics
+
+PARSE_MAX_BYTES = int(os.environ.get("PARSE_MAX_BYTES", 20 * 1024 * 1024))
+PARSE_MAX_PAGES = int(os.environ.get("PARSE_MAX_PAGES", 50))
+PARSE_MAX_CHARS = int(os.environ.get("PARSE_MAX_CHARS", 200_000))
+PARSE_TIMEOUT_SECONDS = float(os.environ.get("PARSE_TIMEOUT_SECONDS", 30))
+PARSE_MEMORY_MB = int(os.environ.get("PARSE_MEMORY_MB", 1024))
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", 2))
+# uncompressed size allowed for the XML of a DOCX (zip bomb guard)
+DOCX_MAX_XML_BYTES = 50 * 1024 * 1024
+
+FORMATS = ("pdf", "docx", "txt")
+# Bump whenever extraction or the caps change so text cached by an older
+# parser (see doc_cache.py) is parsed again instead of reused.
+PARSER_VERSION = 2
+
+
+class ParseError(ValueError):
+    """
+    code: unsupported_format, too_large, encrypted, corrupt, empty,
+    timeout, memory_limit or worker_crashed
+    """
+
+    def __init__(self, code, detail=""):
+        super().__init__(f"{code}: {detail}" if detail else code)
+        self.code = code
+        self.detail = detail
+
+    def as_dict(self):
+        return {"code": self.code, "detail": self.detail}
+
+
+# ---------- format detection ----------
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # legacy .doc / .xls
+
+
+def detect_format(b, name=""):
+    """'pdf', 'docx' or 'txt' from the leading bytes; raises ParseError otherwise"""
+    head = bytes(b[:1024])
+    if b"%PDF-" in head:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(BytesIO(b)) as zf:
+                if "word/document.xml" in zf.namelist():
+                    return "docx"
+        except zipfile.BadZipFile as e:
+            raise ParseError("corrupt", f"broken zip container: {e}")
+        raise ParseError("unsupported_format", "zip archive that isn't a DOCX")
+    if head.startswith(_OLE_MAGIC):
+        raise ParseError("unsupported_format", "legacy .doc (save it as .docx or PDF)")
+    if head.startswith(b"{\\rtf"):
+        raise ParseError("unsupported_format", "RTF")
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "txt"  # UTF-16 with BOM
+    if b"\x00" in head:
+        ext = os.path.splitext(name.lower())[1]
+        raise ParseError("unsupported_format", f"binary file{f' ({ext})' if ext else ''}")
+    return "txt"
+
+
+# ---------- extraction (in this process) ----------
+def _pdf_text(b, max_pages, max_chars):
+    from PyPDF2 import PdfReader
+    from PyPDF2.errors import PdfReadError
+
+    try:
+        reader = PdfReader(BytesIO(b), strict=False)
+        if reader.is_encrypted and not reader.decrypt(""):
+            raise ParseError("encrypted", "password-protected PDF")
+        n_pages = len(reader.pages)
+    except ParseError:
+        raise
+    except (PdfReadError, ValueError, KeyError, TypeError) as e:
+        raise ParseError("corrupt", f"unreadable PDF: {e}")
+    chunks, n_chars = [], 0
+    for i in range(min(n_pages, max_pages)):
+        try:
+            page_text = reader.pages[i].extract_text() or ""
+        except Exception:
+            continue  # one bad page doesn't lose the rest
+        chunks.append(page_text)
+        n_chars += len(page_text)
+        if n_chars >= max_chars:
+            break
+    return "\n".join(chunks), {"pages": n_pages, "pages_read": len(chunks)}
+
+
+def _docx_text(b, max_chars):
+    from docx import Document
+
+    with zipfile.ZipFile(BytesIO(b)) as zf:
+        xml_bytes = sum(i.file_size for i in zf.infolist() if i.filename.endswith(".xml"))
+    if xml_bytes > DOCX_MAX_XML_BYTES:
+        raise ParseError("too_large", f"DOCX expands to {xml_bytes // (1024 * 1024)} MB of XML")
+    try:
+        doc = Document(BytesIO(b))
+    except Exception as e:
+        raise ParseError("corrupt", f"unreadable DOCX: {e}")
+    paragraphs, n_chars = [], 0
+    for p in doc.paragraphs:
+        paragraphs.append(p.text)
+        n_chars += len(p.text)
+        if n_chars >= max_chars:
+            break
+    return "\n".join(paragraphs), {"paragraphs": len(paragraphs)}
+
+
+def _plain_text(b):
+    if b[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        return b.decode("utf-16", errors="ignore"), {}
+    return b.decode("utf-8-sig", errors="ignore"), {}
+
+
+@metrics.timed("parse")
+def parse_document(name, b, max_pages=None, max_chars=None):
+    """
+    Extract text within the caps, in this process
+    returns {"text", "format", "truncated", and per-format counts}
+    raises ParseError
+    """
+    max_pages = PARSE_MAX_PAGES if max_pages is None else max_pages
+    max_chars = PARSE_MAX_CHARS if max_chars is None else max_chars
+    if len(b) > PARSE_MAX_BYTES:
+        raise ParseError("too_large", f"{len(b) // (1024 * 1024)} MB (limit {PARSE_MAX_BYTES // (1024 * 1024)} MB)")
+    fmt = detect_format(b, name)
+    if fmt == "pdf":
+        text, info = _pdf_text(b, max_pages, max_chars)
+        truncated = info["pages_read"] < info["pages"]
+    elif fmt == "docx":
+        text, info = _docx_text(b, max_chars)
+        truncated = False
+    else:
+        text, info = _plain_text(b)
+        truncated = False
+    if len(text) > max_chars:
+        text, truncated = text[:max_chars], True
+    if not text.strip():
+        raise ParseError("empty", "no text found (scanned PDF?)" if fmt == "pdf" else "no text found")
+    return dict(info, text=text, format=fmt, truncated=truncated)
+
+
+# ---------- isolated workers ----------
+def _limit_memory(mb):
+    try:
+        import resource
+        limit = mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass  # not on this platform: timeouts still apply
+
+
+def _worker_main(conn, memory_mb):
+    _limit_memory(memory_mb)
+    while True:
+        try:
+            task = conn.recv()
+            if task is None:
+                return
+            conn.send(("ok", parse_document(*task)))
+        except EOFError:
+            return
+        except ParseError as e:
+            conn.send(("error", e.code, e.detail))
+        except MemoryError:
+            conn.send(("error", "memory_limit", f"over {memory_mb} MB"))
+            return  # start clean after running out
+        except Exception as e:
+            conn.send(("error", "corrupt", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, memory_mb):
+        import spawning
+
+        self.conn, child = spawning.get_context().Pipe()
+        self.process = spawning.start(_worker_main, args=(child, memory_mb))  # never re-runs app.py
+        child.close()
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ParserPool:
+    """
+    Worker processes for parse_document. parse() blocks until a worker is
+    free; submit() returns a Future. Thread-safe.
+    """
+
+    def __init__(self, workers=PARSE_WORKERS, timeout=PARSE_TIMEOUT_SECONDS, memory_mb=PARSE_MEMORY_MB):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._idle = Queue()
+        for _ in range(self.workers):
+            self._idle.put(None)  # started on first use
+        self._dispatch = None
+        self._lock = threading.Lock()
+
+    def parse(self, name, b):
+        """Same result as parse_document, in a worker; raises ParseError"""
+        if len(b) > PARSE_MAX_BYTES:
+            # no point shipping it to a worker
+            raise ParseError("too_large", f"{len(b) // (1024 * 1024)} MB (limit {PARSE_MAX_BYTES // (1024 * 1024)} MB)")
+        worker = self._idle.get()
+        try:
+            if worker is None or not worker.alive():
+                worker = _Worker(self.memory_mb)
+            try:
+                worker.conn.send((name, b))
+                if not worker.conn.poll(self.timeout):
+                    worker.kill()
+                    worker = None
+                    raise ParseError("timeout", f"gave up after {self.timeout:g}s")
+                reply = worker.conn.recv()
+            except (EOFError, OSError):
+                worker.kill()
+                worker = None
+                raise ParseError("worker_crashed", "parser process died (memory limit?)")
+            if reply[1] == "memory_limit":
+                worker.kill()  # it exits after a MemoryError anyway
+                worker = None
+        except ParseError as e:
+            metrics.inc("parse_errors_total", code=e.code)
+            raise
+        finally:
+            self._idle.put(worker)
+        if reply[0] == "ok":
+            return reply[1]
+        metrics.inc("parse_errors_total", code=reply[1])
+        raise ParseError(reply[1], reply[2])
+
+    def submit(self, name, b):
+        with self._lock:
+            if self._dispatch is None:
+                self._dispatch = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="parse")
+        return self._dispatch.submit(self.parse, name, b)
+
+    def close(self):
+        if self._dispatch is not None:
+            self._dispatch.shutdown(wait=True)
+        for _ in range(self.workers):
+            worker = self._idle.get()
+            if worker is not None and worker.alive():
+                try:
+                    worker.conn.send(None)
+                    worker.process.join(timeout=2)
+                except (OSError, BrokenPipeError):
+                    pass
+                if worker.alive():
+                    worker.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide ParserPool (workers start on first use)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ParserPool()
+    return _pool
+
+
+def parse_isolated(name, b):
+    """Text of a document, parsed in the shared worker pool; raises ParseError"""
+    return get_pool().parse(name, b)["text"]
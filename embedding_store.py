@@ -0,0 +1,252 @@
+# embedding_store.py
+import json
+import os
+import threading
+
+import numpy as np
+
+from file_lock import locked
+from matcher import EMBEDDING_KEY
+
+# Embeddings are computed once per resume / job at ingestion and kept on
+# disk as an append-only float32 matrix (memory-mapped for reads) plus an
+# int64 id column. Vectors are unit-normalised so cosine similarity is a
+# plain dot product: vector_index shortlists and nearest_among rank stored
+# rows without encoding anything. The meta file records the model name and
+# chunking (matcher.EMBEDDING_KEY); opening a store built with other
+# settings wipes it so vectors are never mixed.
+# The app, batch workers and ingest.py share the files: appends, resets and
+# tail repairs hold a file lock, and readers re-open the store when its
+# files have changed since they last looked (refresh()).
+EMBEDDINGS_DIR = os.environ.get("EMBEDDINGS_DIR", "embeddings")
+
+
+def _encode_with_matcher_model(texts, batch_size):
+    from matcher import embed_texts
+    return embed_texts(texts, batch_size=batch_size)
+
+
+class EmbeddingStore:
+    def __init__(self, kind, model_name=EMBEDDING_KEY, root=EMBEDDINGS_DIR, encode=None):
+        """
+        kind: "resume" or "job"
+        encode: callable(texts, batch_size) -> (n, dim) array; defaults to matcher.embed_texts
+        """
+        self.kind = kind
+        self.model_name = model_name
+        self.root = root
+        self.encode = encode or _encode_with_matcher_model
+        self._lock = threading.Lock()
+        self._meta_path = os.path.join(root, f"{kind}.meta.json")
+        self._vec_path = os.path.join(root, f"{kind}.f32")
+        self._ids_path = os.path.join(root, f"{kind}.ids")
+        self._lock_path = os.path.join(root, kind)
+        self._seen = None
+        os.makedirs(root, exist_ok=True)
+        with locked(self._lock_path):
+            self._open(writer=True)
+
+    # ---------- file handling ----------
+    def _signature(self):
+        """Changes whenever another process appends to or resets the store"""
+        sig = []
+        for p in (self._meta_path, self._ids_path):
+            try:
+                st = os.stat(p)
+                sig.append((st.st_size, st.st_mtime_ns, st.st_ino))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def refresh(self):
+        """Re-open if another process changed the files; returns True if it did"""
+        if self._signature() == self._seen:
+            return False
+        with self._lock:
+            if self._signature() == self._seen:
+                return False
+            self._open()
+        return True
+
+    def _open(self, writer=False):
+        """
+        Load ids and map the vectors. writer: the caller holds the file lock,
+        so a model change may wipe the store and a torn tail may be trimmed;
+        readers just ignore the tail (it may be an append in progress)
+        """
+        self._seen = self._signature()
+        meta = None
+        if os.path.exists(self._meta_path):
+            try:
+                with open(self._meta_path) as f:
+                    meta = json.load(f)
+            except ValueError:
+                meta = None
+        if not meta or meta.get("model") != self.model_name:
+            if writer:
+                self.reset()
+                self._seen = self._signature()
+            else:
+                self.dim = None
+                self._set_empty()
+            return
+        self.dim = meta.get("dim")
+        if not self.dim:
+            self._set_empty()
+            return
+        raw = b""
+        if os.path.exists(self._ids_path):
+            with open(self._ids_path, "rb") as f:
+                raw = f.read()
+        vec_bytes = os.path.getsize(self._vec_path) if os.path.exists(self._vec_path) else 0
+        n = min(len(raw) // 8, vec_bytes // (4 * self.dim))
+        ids = np.frombuffer(raw, dtype=np.int64, count=n).copy()
+        if writer and (n * 8 != len(raw) or n * 4 * self.dim != vec_bytes):
+            # torn append from a crashed writer: drop the partial tail
+            for path, size in ((self._ids_path, n * 8), (self._vec_path, n * 4 * self.dim)):
+                if os.path.exists(path):
+                    with open(path, "r+b") as f:
+                        f.truncate(size)
+            self._seen = self._signature()
+        self.ids = ids
+        self._row = {int(i): r for r, i in enumerate(ids.tolist())}
+        if n:
+            self.vectors = np.memmap(self._vec_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+        else:
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+
+    def _set_empty(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self._row = {}
+        self.vectors = np.zeros((0, self.dim or 0), dtype=np.float32)
+
+    def _write_meta(self):
+        with open(self._meta_path, "w") as f:
+            json.dump({"model": self.model_name, "dim": self.dim}, f)
+
+    def reset(self):
+        """Drop every stored vector (e.g. after a model change); caller holds the file lock"""
+        for p in (self._vec_path, self._ids_path):
+            if os.path.exists(p):
+                os.remove(p)
+        self.dim = None
+        self._write_meta()
+        self._set_empty()
+
+    # ---------- writes ----------
+    def add(self, ids, texts, batch_size=64, chunk_size=1024):
+        """
+        Embed and store texts whose id isn't stored yet, in batched encode calls.
+        Encoding runs unlocked; each chunk is then appended under the file
+        lock, skipping ids another process stored in the meantime.
+        returns number of vectors added
+        """
+        self.refresh()
+        pending = {}
+        for i, t in zip(ids, texts):
+            i = int(i)
+            if i not in self._row:
+                pending[i] = t or ""
+        if not pending:
+            return 0
+        items = list(pending.items())
+        added = 0
+        with self._lock:
+            for start in range(0, len(items), chunk_size):
+                chunk = items[start:start + chunk_size]
+                emb = np.asarray(self.encode([t for _, t in chunk], batch_size), dtype=np.float32)
+                with locked(self._lock_path):
+                    self._open(writer=True)
+                    keep = [r for r, (i, _) in enumerate(chunk) if i not in self._row]
+                    if keep:
+                        self._append(np.asarray([chunk[r][0] for r in keep], dtype=np.int64), emb[keep])
+                        added += len(keep)
+                    self._open(writer=True)
+        return added
+
+    def _append(self, ids, emb):
+        norms = np.linalg.norm(emb, axis=1, keepdims=True)
+        emb = emb / np.where(norms > 0, norms, 1.0)
+        if self.dim is None:
+            self.dim = int(emb.shape[1])
+            self._write_meta()
+        # vectors first: a crash in between leaves a tail _open() can trim
+        with open(self._vec_path, "ab") as f:
+            f.write(np.ascontiguousarray(emb, dtype=np.float32).tobytes())
+        with open(self._ids_path, "ab") as f:
+            f.write(ids.tobytes())
+
+    # ---------- reads ----------
+    # get / nearest_among / len pick up other processes' appends first;
+    # `in` uses the ids as of the last of those (it runs per row)
+    def __contains__(self, id_):
+        return int(id_) in self._row
+
+    def __len__(self):
+        self.refresh()
+        return len(self.ids)
+
+    def get(self, id_):
+        """Stored unit vector for an id, or None."""
+        self.refresh()
+        r = self._row.get(int(id_))
+        return None if r is None else np.asarray(self.vectors[r])
+
+    def nearest_among(self, ids, vec, k):
+        """The k of `ids` most similar to vec, best first (ids not stored are skipped)"""
+        self.refresh()
+        pairs = [(int(i), self._row.get(int(i))) for i in ids]
+        pairs = [(i, r) for i, r in pairs if r is not None]
+        if vec is None or not pairs:
+            return []
+        rows = np.fromiter((r for _, r in pairs), dtype=np.int64, count=len(pairs))
+        sims = np.asarray(self.vectors[rows] @ np.asarray(vec, dtype=np.float32))
+        return [pairs[t][0] for t in np.argsort(-sims, kind="stable")[:k]]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(kind):
+    """Process-wide store for "resume" or "job"."""
+    with _stores_lock:
+        if kind not in _stores:
+            _stores[kind] = EmbeddingStore(kind)
+        return _stores[kind]
+
+
+def _table(kind):
+    from db import Job, Resume
+
+    return (Resume, Resume.content_text) if kind == "resume" else (Job, Job.description_text)
+
+
+def unembedded_ids(db, kind):
+    """Ids of the Resume / Job rows that have no stored vector yet, ascending"""
+    table, _ = _table(kind)
+    store = get_store(kind)
+    store.refresh()
+    return [i for (i,) in db.query(table.id).order_by(table.id) if i not in store]
+
+
+def _sync_kind(db, kind, batch_size, chunk_size):
+    """Embed the rows of one table that the store lacks, chunk_size rows of text at a time"""
+    table, text_col = _table(kind)
+    store = get_store(kind)
+    missing = unembedded_ids(db, kind)
+    added = 0
+    for start in range(0, len(missing), chunk_size):
+        part = missing[start:start + chunk_size]
+        rows = db.query(table.id, text_col).filter(table.id.in_(part)).all()
+        added += store.add([i for i, _ in rows], [t for _, t in rows], batch_size=batch_size)
+    return added
+
+
+def sync_from_db(db, batch_size=64, chunk_size=1024):
+    """
+    Embed every Resume / Job row that isn't stored yet (first run, after a
+    model change, rows bulk-ingested or added while embedding failed)
+    returns (resumes_added, jobs_added)
+    """
+    return _sync_kind(db, "resume", batch_size, chunk_size), _sync_kind(db, "job", batch_size, chunk_size)
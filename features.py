@@ -0,0 +1,63 @@
+# features.py
+import json
+
+from utils import SCORER_VERSION, build_jd_features
+
+
+def store_job_features(job, features=None):
+    """
+    Compute (unless given) and attach the JD artifacts to a Job row.
+    Caller is responsible for committing.
+    """
+    if features is None:
+        features = build_jd_features(job.description_text)
+    job.features = json.dumps(features, ensure_ascii=False)
+    job.features_version = SCORER_VERSION
+    return features
+
+
+def load_job_features(job):
+    """
+    Stored artifacts for a Job, or None when missing / built by an older
+    scorer or against another corpus idf snapshot
+    """
+    from idf_model import current_generation
+
+    if not job.features or job.features_version != SCORER_VERSION:
+        return None
+    try:
+        features = json.loads(job.features)
+    except ValueError:
+        return None
+    if features.get("idf_generation") != current_generation():
+        return None
+    return features
+
+
+def get_job_features(db, job):
+    """
+    Artifacts for a Job, rebuilding and persisting them if stale
+    """
+    features = load_job_features(job)
+    if features is None:
+        features = store_job_features(job)
+        db.commit()
+    return features
+
+
+def refresh_stale_job_features(db):
+    """
+    Rebuild artifacts of every job whose version stamp doesn't match the scorer
+    returns number of jobs rebuilt
+    """
+    from sqlalchemy.orm import undefer
+    from db import Job
+
+    stale = db.query(Job).options(undefer(Job.description_text)).filter(
+        (Job.features_version == None) | (Job.features_version != SCORER_VERSION)  # noqa: E711
+    ).all()
+    for job in stale:
+        store_job_features(job)
+    if stale:
+        db.commit()
+    return len(stale)
@@ -0,0 +1,35 @@
+# file_lock.py
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Exclusive advisory lock shared by every process on the machine (the app,
+# batch workers, ingest.py), for files that are read, updated and written
+# back whole or appended to from several processes. The lock lives in a
+# separate "<path>.lock" file so the data file itself can be replaced.
+
+
+@contextmanager
+def locked(path):
+    """Hold the exclusive lock of `path` (blocks until it is free)"""
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,50 @@
+# history.py
+from sqlalchemy import func
+
+from db import Job, Match, Resume
+
+# "My Match History" is served by one joined query per page, scoped to the
+# user and walking ix_matches_user_created, instead of one Job lookup per
+# Match row. Without a user id there is no history: matches with no owner
+# (from before user_id was recorded) belong to nobody in particular.
+PAGE_SIZE = 20
+
+
+def count_matches(db, user_id):
+    if user_id is None:
+        return 0
+    return db.query(func.count(Match.id)).filter(Match.user_id == user_id).scalar()
+
+
+def match_history(db, user_id, page=0, page_size=PAGE_SIZE):
+    """
+    One page of a user's matches, newest first
+    returns list of dicts: match_id, created_at, resume, job, score,
+    matched_skills, missing_skills
+    """
+    if user_id is None:
+        return []
+    q = (
+        db.query(
+            Match.id, Match.created_at, Resume.filename, Job.title,
+            Match.score, Match.matched_skills, Match.missing_skills,
+        )
+        .join(Resume, Match.resume_id == Resume.id)
+        .join(Job, Match.job_id == Job.id)
+        .filter(Match.user_id == user_id)
+        .order_by(Match.created_at.desc(), Match.id.desc())
+        .offset(page * page_size)
+        .limit(page_size)
+    )
+    return [
+        {
+            "match_id": mid,
+            "created_at": created_at,
+            "resume": filename,
+            "job": title,
+            "score": score,
+            "matched_skills": matched or "",
+            "missing_skills": missing or "",
+        }
+        for mid, created_at, filename, title, score, matched, missing in q
+    ]
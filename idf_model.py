@@ -0,0 +1,355 @@
+# idf_model.py
+"""
+Corpus-wide IDF over every Resume and Job text, so similarities use one
+term weighting for all pairs instead of a TF-IDF fitted on each pair.
+
+Terms (the unigrams and bigrams of utils.analyze_terms) are hashed into
+N_FEATURES buckets. Running document frequencies are updated incrementally
+(rows above a per-table id watermark) and persisted in IDF_MODEL_PATH, so
+scoring is transform-only: hashed unigram counts (utils.term_counts) * idf,
+L2-normalised, dot. Bigram frequencies serve keyword ranking.
+
+The idf vector used for scoring is a frozen snapshot, re-derived only once
+the corpus has grown by IDF_REFRESH_RATIO, so scores stay stable between
+refreshes. Its generation (a counter bumped by every refresh, rebuilds
+included, and persisted with the model) is stamped on JD features and
+memoized pair scores. Edited or deleted rows are not subtracted;
+`python idf_model.py --rebuild` recounts from scratch.
+
+The app, batch workers and ingest.py all update the same file: sync()
+re-reads it under a file lock before counting and writing. The app syncs
+on a background thread (sync_in_background), once per burst of uploads.
+
+    python idf_model.py             # count new rows
+    python idf_model.py --rebuild
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from file_lock import locked
+
+log = logging.getLogger(__name__)
+
+N_FEATURES = 2 ** 20
+IDF_MODEL_PATH = os.environ.get("IDF_MODEL_PATH", "idf_model.npz")
+IDF_REFRESH_RATIO = float(os.environ.get("IDF_REFRESH_RATIO", 0.1))
+# below this many documents idf carries no information; scoring falls back
+# to the per-pair TF-IDF (utils.tfidf_pair_similarity)
+IDF_MIN_DOCS = int(os.environ.get("IDF_MIN_DOCS", 20))
+SYNC_CHUNK = 2000
+# background syncs wait this long so a burst of uploads is counted (and the
+# model file rewritten) once
+IDF_SYNC_DELAY_SECONDS = float(os.environ.get("IDF_SYNC_DELAY_SECONDS", 5))
+KEYWORD_CANDIDATES = 200  # most frequent terms of a document considered as keywords
+
+# ---------- hashing ----------
+_INDEX_CACHE_MAX = 500_000
+_index_cache = {}
+_murmurhash = None
+
+
+def feature_index(term):
+    """Bucket of a term (same hash as sklearn's HashingVectorizer)"""
+    global _murmurhash
+    i = _index_cache.get(term)
+    if i is None:
+        if _murmurhash is None:
+            from sklearn.utils import murmurhash3_32
+            _murmurhash = murmurhash3_32
+        i = abs(_murmurhash(term, seed=0)) % N_FEATURES
+        if len(_index_cache) < _INDEX_CACHE_MAX:
+            _index_cache[term] = i
+    return i
+
+
+def _indices(terms):
+    get = _index_cache.get
+    return np.fromiter(
+        (i if i is not None else feature_index(t) for t, i in zip(terms, map(get, terms))),
+        dtype=np.int64, count=len(terms),
+    )
+
+
+def hashed_counts(counts):
+    """
+    counts: term -> count (utils.term_counts)
+    returns (indices int64 sorted unique, counts float64), colliding terms summed
+    """
+    idx = _indices(list(counts))
+    cnt = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    idx, inv = np.unique(idx, return_inverse=True)
+    return idx, np.bincount(inv, weights=cnt, minlength=len(idx))
+
+
+def document_terms(text):
+    """Unique feature indices of a text's unigrams and bigrams (what df counts)"""
+    from utils import analyze_terms
+    return np.unique(_indices(list(set(analyze_terms(text)))))
+
+
+# ---------- model ----------
+class IdfModel:
+    def __init__(self):
+        self.n_docs = 0
+        self.df = np.zeros(N_FEATURES, dtype=np.int32)
+        self.watermarks = {"resume": 0, "job": 0}
+        self.generation = None  # bumped by every refresh of the idf snapshot
+        self.snapshot_docs = None  # n_docs the idf snapshot was derived from
+        self.idf = None
+        self._jd_cache = {}
+
+    @property
+    def ready(self):
+        return self.idf is not None
+
+    def add_document(self, indices):
+        """indices: unique feature indices of one document"""
+        self.df[indices] += 1
+        self.n_docs += 1
+
+    def refresh(self, force=False):
+        """Re-derive the idf snapshot if the corpus grew enough; returns True if it did"""
+        if self.n_docs < IDF_MIN_DOCS:
+            return False
+        if not force and self.snapshot_docs and self.n_docs < self.snapshot_docs * (1 + IDF_REFRESH_RATIO):
+            return False
+        n = self.n_docs
+        # smooth idf, as TfidfVectorizer(smooth_idf=True)
+        self.idf = (np.log((1.0 + n) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        self.snapshot_docs = n
+        self.generation = (self.generation or 0) + 1
+        self._jd_cache = {}
+        return True
+
+    def weigh(self, indices, counts):
+        """(indices, L2-normalised tf-idf weights) of hashed counts"""
+        w = counts * self.idf[indices]
+        norm = np.sqrt(w @ w)
+        return indices, (w / norm if norm else w)
+
+    def jd_vector(self, jd_features):
+        """Weighted vector of stored JD features, cached per features dict"""
+        h = jd_features["hashed"]
+        hit = self._jd_cache.get(id(h))
+        if hit is not None and hit[0] is h:
+            return hit[1]
+        vec = self.weigh(np.asarray(h["indices"], dtype=np.int64), np.asarray(h["counts"], dtype=np.float64))
+        if len(self._jd_cache) >= 1024:
+            self._jd_cache.clear()
+        self._jd_cache[id(h)] = (h, vec)  # holding h keeps its id from being reused
+        return vec
+
+    @staticmethod
+    def dense(vec):
+        """A weighted vector as a dense (N_FEATURES,) array"""
+        v = np.zeros(N_FEATURES, dtype=np.float64)
+        v[vec[0]] = vec[1]
+        return v
+
+    @staticmethod
+    def matrix(vecs):
+        """CSR (n x N_FEATURES) with one weighted vector per row"""
+        from scipy import sparse
+
+        indptr, cols, vals = [0], [], []
+        for indices, w in vecs:
+            cols.append(indices)
+            vals.append(w)
+            indptr.append(indptr[-1] + len(indices))
+        if not cols:
+            return sparse.csr_matrix((0, N_FEATURES))
+        return sparse.csr_matrix((np.concatenate(vals), np.concatenate(cols), indptr),
+                                 shape=(len(indptr) - 1, N_FEATURES))
+
+    @staticmethod
+    def similarity(a, b):
+        """Cosine of two weighted vectors"""
+        _, xa, xb = np.intersect1d(a[0], b[0], assume_unique=True, return_indices=True)
+        return float(a[1][xa] @ b[1][xb])
+
+    def top_terms(self, text, top_n):
+        """Keywords of a text: its most frequent terms ranked by tf * corpus idf"""
+        from collections import Counter
+        from utils import analyze_terms
+
+        candidates = Counter(analyze_terms(text)).most_common(KEYWORD_CANDIDATES)
+        scored = [(c * float(self.idf[feature_index(t)]), t) for t, c in candidates]
+        scored.sort(key=lambda s: s[0], reverse=True)
+        return [t for _, t in scored[:top_n]]
+
+    @classmethod
+    def restart(cls, old):
+        """Empty model continuing old's generation counter"""
+        model = cls()
+        model.generation = old.generation
+        return model
+
+    # ---------- persistence ----------
+    def save(self, path=IDF_MODEL_PATH):
+        meta = {"n_docs": self.n_docs, "watermarks": self.watermarks, "generation": self.generation,
+                "snapshot_docs": self.snapshot_docs, "n_features": N_FEATURES}
+        arrays = {"df": self.df, "meta": np.array(json.dumps(meta))}
+        if self.idf is not None:
+            arrays["idf"] = self.idf
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=IDF_MODEL_PATH):
+        """Model from path, or None if missing / unreadable / built with another N_FEATURES"""
+        try:
+            with np.load(path) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("n_features") != N_FEATURES:
+                    return None
+                model = cls()
+                model.df = data["df"].astype(np.int32)
+                model.idf = data["idf"] if "idf" in data.files else None
+        except (OSError, ValueError, KeyError):
+            return None
+        model.n_docs = meta["n_docs"]
+        model.watermarks = dict(model.watermarks, **meta["watermarks"])
+        model.generation = meta["generation"]
+        # files from before the counter stored the snapshot's n_docs as generation
+        model.snapshot_docs = meta.get("snapshot_docs", meta["generation"])
+        return model
+
+
+# ---------- process-wide instance ----------
+_lock = threading.Lock()
+_cached = {"model": None, "mtime": None}
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _current(path=IDF_MODEL_PATH):
+    mtime = _mtime(path)
+    if mtime != _cached["mtime"]:
+        with _lock:
+            if mtime != _cached["mtime"]:
+                _cached["model"] = IdfModel.load(path) if mtime is not None else None
+                _cached["mtime"] = mtime
+    return _cached["model"]
+
+
+def get_idf_model():
+    """The persisted model (reloaded when another process updates it), or None until it has an idf"""
+    model = _current()
+    return model if model is not None and model.ready else None
+
+
+def current_generation():
+    model = get_idf_model()
+    return model.generation if model is not None else None
+
+
+def sync(db, rebuild=False, path=IDF_MODEL_PATH):
+    """
+    Count Resume / Job rows added since the last sync (every row with
+    rebuild=True), refresh the idf snapshot if due and persist
+    returns number of documents added
+    """
+    from db import Job, Resume
+
+    with _lock, locked(path):
+        # re-read under the file lock: other processes may have synced since
+        model = IdfModel.load(path) if _mtime(path) is not None else None
+        if rebuild:
+            # a fresh count, but generations keep increasing so every score
+            # stamped with an older one goes stale
+            model = IdfModel() if model is None else IdfModel.restart(model)
+        model = model or IdfModel()
+        added = 0
+        for kind, table, text_col in (("resume", Resume, Resume.content_text), ("job", Job, Job.description_text)):
+            while True:
+                rows = (
+                    db.query(table.id, text_col)
+                    .filter(table.id > model.watermarks[kind])
+                    .order_by(table.id)
+                    .limit(SYNC_CHUNK)
+                    .all()
+                )
+                if not rows:
+                    break
+                for _, text in rows:
+                    model.add_document(document_terms(text))
+                model.watermarks[kind] = rows[-1][0]
+                added += len(rows)
+        refreshed = model.refresh(force=rebuild)
+        if added or refreshed or rebuild:
+            model.save(path)
+        _cached["model"], _cached["mtime"] = model, _mtime(path)
+    return added
+
+
+_bg_lock = threading.Lock()
+_bg = {"pending": False, "running": False}
+
+
+def sync_in_background(delay=IDF_SYNC_DELAY_SECONDS):
+    """
+    sync() on a daemon thread with its own session, after `delay` seconds;
+    calls made in the meantime (or while it runs) are folded into it or one
+    more pass
+    returns True when a thread was started
+    """
+    from db import session_scope
+
+    with _bg_lock:
+        _bg["pending"] = True
+        if _bg["running"]:
+            return False
+        _bg["running"] = True
+
+    def run():
+        try:
+            while True:
+                time.sleep(delay)
+                with _bg_lock:
+                    if not _bg["pending"]:
+                        _bg["running"] = False
+                        return
+                    _bg["pending"] = False
+                try:
+                    with session_scope() as db:
+                        sync(db)
+                except Exception:
+                    log.exception("background idf sync failed")
+        except BaseException:
+            with _bg_lock:
+                _bg["running"] = False
+            raise
+
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the corpus IDF model from the database")
+    parser.add_argument("--rebuild", action="store_true", help="recount every row from scratch")
+    args = parser.parse_args(argv)
+
+    from db import init_db, session_scope
+    init_db()
+    with session_scope() as db:
+        added = sync(db, rebuild=args.rebuild)
+    model = _current()
+    print(f"Counted {added} documents; corpus {model.n_docs if model else 0} documents, "
+          f"idf generation {model.generation if model else None}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# ingest.py
+"""
+Bulk resume ingestion: parse a directory or archive of PDF / DOCX / TXT
+files on isolated parser processes (doc_parser.ParserPool: per-file
+timeout and memory limit) and bulk-insert them into the Resume table.
+
+    python ingest.py resumes/ --workers 8
+    python ingest.py job_fair_dump.zip --batch-size 1000
+
+New resumes are then embedded into the embedding store (for the batch
+shortlist) unless --no-embed is given or the embedding model is unavailable;
+the app embeds them at its next startup (embedding_store.sync_from_db) in
+that case, and shortlists include unembedded resumes until then.
+"""
+import argparse
+import logging
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc", ".txt")
+
+log = logging.getLogger(__name__)
+
+
+def _supported(name):
+    return name.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+# ---------- sources ----------
+# Each task is (display_name, kind, locator). Directory and zip members are
+# read by the task threads; tar members can't be opened randomly, so their
+# bytes are read here.
+def iter_tasks(path):
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for f in sorted(files):
+                if _supported(f):
+                    full = os.path.join(root, f)
+                    yield os.path.relpath(full, path), "file", full
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and _supported(info.filename):
+                    yield info.filename, "zip", (path, info.filename)
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path, "r:*") as tf:
+            for member in tf:
+                if member.isfile() and _supported(member.name):
+                    yield member.name, "bytes", tf.extractfile(member).read()
+    elif os.path.isfile(path) and _supported(path):
+        yield os.path.basename(path), "file", path
+    else:
+        raise ValueError(f"Not a directory, archive or supported file: {path}")
+
+
+def _read(kind, locator):
+    if kind == "file":
+        with open(locator, "rb") as f:
+            return f.read()
+    if kind == "zip":
+        archive, member = locator
+        with zipfile.ZipFile(archive) as zf:
+            return zf.read(member)
+    return locator
+
+
+def _parse_task(task, pool, known_hashes):
+    """
+    Runs in a task thread, parsing in one of pool's processes:
+    returns (name, text, n_bytes, content_hash, error, error_code).
+    Files already in the Resume table come back with text None and no
+    error, without being parsed.
+    """
+    from doc_cache import content_hash
+    from doc_parser import ParseError
+
+    name, kind, locator = task
+    n_bytes, h = 0, None
+    try:
+        b = _read(kind, locator)
+        n_bytes, h = len(b), content_hash(b)
+        if h in known_hashes:
+            return name, None, n_bytes, h, None, None
+        text = pool.parse(name, b)["text"]
+    except ParseError as e:
+        return name, None, n_bytes, h, str(e), e.code
+    except Exception as e:
+        return name, None, n_bytes, h, f"{type(e).__name__}: {e}", "read_error"
+    return name, text, n_bytes, h, None, None
+
+
+# ---------- pipeline ----------
+def ingest(path, db=None, workers=None, batch_size=500, progress=None, timeout=None, embed=True):
+    """
+    Parse every supported file under `path` (directory, .zip or .tar[.gz])
+    and insert one Resume per file, committing every `batch_size` rows.
+    progress: optional callable(stats) called after each committed batch
+    timeout: seconds allowed per file (default doc_parser.PARSE_TIMEOUT_SECONDS)
+    embed: embed the new resumes into the embedding store afterwards
+    Files whose bytes match an existing resume (or an earlier file of the
+    same run) are counted as duplicates and not inserted again.
+    returns stats dict: files, inserted, duplicates, failed,
+    failures [(name, error)], failure_codes {code: n}, bytes, embedded
+    (None when not embedded), seconds, files_per_sec, mb_per_sec
+    """
+    from db import Resume, SessionLocal
+    from doc_parser import PARSE_TIMEOUT_SECONDS, ParserPool
+    from score_memo import text_hash
+
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+    stats = {"files": 0, "inserted": 0, "duplicates": 0, "failed": 0, "failures": [], "failure_codes": Counter(),
+             "bytes": 0, "embedded": None}
+    seen = {h for (h,) in db.query(Resume.content_hash).filter(Resume.content_hash != None)}  # noqa: E711
+    known = frozenset(seen)
+    pending_rows = []
+    start = time.perf_counter()
+
+    def flush():
+        if pending_rows:
+            db.bulk_insert_mappings(Resume, pending_rows)
+            db.commit()
+            stats["inserted"] += len(pending_rows)
+            pending_rows.clear()
+            if progress:
+                progress(_finish(stats, start))
+
+    def collect(future):
+        name, text, n_bytes, h, error, code = future.result()
+        stats["files"] += 1
+        stats["bytes"] += n_bytes
+        if error:
+            stats["failed"] += 1
+            stats["failures"].append((name, error))
+            stats["failure_codes"][code] += 1
+            return
+        if text is None or h in seen:
+            stats["duplicates"] += 1
+            return
+        seen.add(h)
+        pending_rows.append({
+            "filename": os.path.basename(name)[:256],
+            "content_text": text,
+            "uploaded_at": datetime.utcnow(),
+            "content_hash": h,
+            "text_hash": text_hash(text),
+        })
+        if len(pending_rows) >= batch_size:
+            flush()
+
+    try:
+        with ParserPool(workers=workers, timeout=timeout or PARSE_TIMEOUT_SECONDS) as pool, ThreadPoolExecutor(max_workers=workers) as tasks:
+            in_flight = set()
+            for task in iter_tasks(path):
+                in_flight.add(tasks.submit(_parse_task, task, pool, known))
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        collect(f)
+            for f in in_flight:
+                collect(f)
+        flush()
+        try:
+            from idf_model import sync
+            sync(db)  # count the new resumes into the corpus idf model
+        except Exception:
+            log.exception("idf sync after ingestion failed")
+            db.rollback()
+        try:
+            import skill_index
+            skill_index.sync(db)  # postings of the new resumes
+        except Exception:
+            log.exception("skill index sync after ingestion failed")
+            db.rollback()
+        if embed and stats["inserted"]:
+            try:
+                from embedding_store import sync_from_db
+                stats["embedded"] = sync_from_db(db)[0]  # so batch shortlists include them
+            except (ImportError, OSError) as e:
+                log.warning("embedding model unavailable (%s), new resumes were not embedded", e)
+    finally:
+        if own_session:
+            db.close()
+    return _finish(stats, start)
+
+
+def _finish(stats, start):
+    seconds = time.perf_counter() - start
+    stats["seconds"] = round(seconds, 3)
+    stats["files_per_sec"] = round(stats["files"] / seconds, 1) if seconds else 0.0
+    stats["mb_per_sec"] = round(stats["bytes"] / 1e6 / seconds, 2) if seconds else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest resumes into the Resume table")
+    parser.add_argument("path", help="directory, .zip or .tar[.gz] of pdf/docx/txt resumes")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per file (default: PARSE_TIMEOUT_SECONDS)")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per insert transaction")
+    parser.add_argument("--failures-out", help="write failed files and reasons to this file")
+    parser.add_argument("--no-embed", action="store_true", help="don't embed the new resumes afterwards")
+    args = parser.parse_args(argv)
+
+    from db import init_db
+    init_db()
+
+    def report(s):
+        print(f"  {s['inserted']} inserted, {s['failed']} failed, {s['files_per_sec']} files/s", file=sys.stderr)
+
+    stats = ingest(args.path, workers=args.workers, batch_size=args.batch_size, progress=report, timeout=args.timeout,
+                   embed=not args.no_embed)
+    print(f"Ingested {stats['inserted']} of {stats['files']} files in {stats['seconds']}s "
+          f"({stats['files_per_sec']} files/s, {stats['mb_per_sec']} MB/s), "
+          f"{stats['duplicates']} duplicates, {stats['failed']} failed")
+    if stats["embedded"] is not None:
+        print(f"Embedded {stats['embedded']} resumes")
+    if stats["failure_codes"]:
+        print("Failures: " + ", ".join(f"{code} {n}" for code, n in stats["failure_codes"].most_common()))
+    if args.failures_out and stats["failures"]:
+        with open(args.failures_out, "w") as f:
+            for name, error in stats["failures"]:
+                f.write(f"{name}\t{error}\n")
+    return 0 if stats["files"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,158 @@
 # matcher.py
-from sentence_transformers import SentenceTransformer, util
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
 import os
+import threading
+from collections import OrderedDict
 
-# Load a small model (downloads first time)
-MODEL_NAME = "all-MiniLM-L6-v2"
-model = SentenceTransformer(MODEL_NAME)
+import metrics
+from skill_matcher import get_matcher
 
+# Load a small model (downloads first time). Loading is deferred to the
+# first get_model() call and shared by every session of the process, so
+# importing this module (e.g. for a login page) costs nothing.
+MODEL_NAME = os.environ.get("MODEL_NAME", "all-MiniLM-L6-v2")
+_model = None
+_model_lock = threading.Lock()
+# what get_model() raises when the model can't be used here (package not
+# installed, weights not cached and no network); callers fall back on these
+MODEL_UNAVAILABLE = (ImportError, OSError)
+
+def get_model():
+    """Process-wide SentenceTransformer, loaded on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                with metrics.stage("embedding.load_model"):
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+# ---------- chunked, batched embedding ----------
+# MiniLM truncates its input (256 word pieces), so a long resume is split
+# into overlapping word windows; every chunk of every text in a call is
+# encoded in one batched forward pass and the chunk vectors are pooled
+# (SOFT_POOLING: "mean" or element-wise "max") into one unit vector per text.
+CHUNK_WORDS = int(os.environ.get("EMBED_CHUNK_WORDS", 150))
+CHUNK_OVERLAP = int(os.environ.get("EMBED_CHUNK_OVERLAP", 25))
+SOFT_POOLING = os.environ.get("SOFT_POOLING", "mean")
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", 64))
+EMBED_CACHE_SIZE = int(os.environ.get("EMBED_CACHE_SIZE", 4096))
+# what a stored vector depends on (embedding_store rebuilds when it changes)
+EMBEDDING_KEY = f"{MODEL_NAME}|w{CHUNK_WORDS}o{CHUNK_OVERLAP}|{SOFT_POOLING}"
+
+
+def chunk_text(text, words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    """Overlapping windows of `words` words; [""] for an empty text"""
+    tokens = (text or "").split()
+    if len(tokens) <= words:
+        return [" ".join(tokens)]
+    step = max(1, words - overlap)
+    # the last window always ends at the last word, whatever the overlap
+    return [" ".join(tokens[i:i + words]) for i in range(0, len(tokens) - words + step, step)]
+
+
+def pool_chunks(chunk_vecs, pooling=SOFT_POOLING):
+    """(n_chunks, dim) unit vectors -> one unit vector"""
+    import numpy as np
+    v = chunk_vecs.max(axis=0) if pooling == "max" else chunk_vecs.mean(axis=0)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm > 0 else v
+
+
+class _EmbeddingCache:
+    """Thread-safe LRU: text hash -> pooled vector"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            v = self._data.get(key)
+            if v is not None:
+                self._data.move_to_end(key)
+            return v
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_embedding_cache = _EmbeddingCache(EMBED_CACHE_SIZE)
+
+
+def _text_key(text):
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).digest()
+
+
+def embed_texts(texts, batch_size=EMBED_BATCH_SIZE, encode=None):
+    """
+    One pooled unit vector per text, as a (len(texts), dim) float32 array.
+    Cached texts are not re-encoded; the chunks of all the others go through
+    the model together in batches of batch_size.
+    encode: callable(chunks, batch_size) -> (n, dim) unit vectors; defaults to get_model()
+    """
+    import numpy as np
+
+    keys = [_text_key(t) for t in texts]
+    out = [_embedding_cache.get(k) for k in keys]
+    metrics.inc("embedding_cache_hits_total", sum(v is not None for v in out))
+
+    pending = {}  # key -> first position, so duplicates in one call encode once
+    for pos, (k, v) in enumerate(zip(keys, out)):
+        if v is None and k not in pending:
+            pending[k] = pos
+    if pending:
+        chunks, spans = [], []
+        for k, pos in pending.items():
+            parts = chunk_text(texts[pos])
+            spans.append((k, len(chunks), len(chunks) + len(parts)))
+            chunks.extend(parts)
+        with metrics.stage("embedding.encode"):
+            if encode is None:
+                vecs = get_model().encode(chunks, batch_size=batch_size, convert_to_numpy=True,
+                                          normalize_embeddings=True, show_progress_bar=False)
+            else:
+                vecs = encode(chunks, batch_size)
+        vecs = np.asarray(vecs, dtype=np.float32)
+        metrics.inc("embedding_chunks_total", len(chunks))
+        fresh = {}
+        for k, start, end in spans:
+            fresh[k] = pool_chunks(vecs[start:end])
+            _embedding_cache.put(k, fresh[k])
+        out = [v if v is not None else fresh[k] for k, v in zip(keys, out)]
+    if not out:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack(out).astype(np.float32, copy=False)
+
+
+def __getattr__(name):
+    # keep `from matcher import model` working without an import-time load
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module 'matcher' has no attribute {name!r}")
+
+@metrics.timed("soft_similarity")
 def compute_soft_similarity(text_a, text_b):
     """
-    Use sentence-transformers embedding cosine similarity
+    Use sentence-transformers embedding cosine similarity (chunked, pooled, cached)
     Returns a float 0..1
     """
     try:
-        emb = model.encode([text_a, text_b], convert_to_tensor=True)
-        sim = util.cos_sim(emb[0], emb[1]).item()
+        emb = embed_texts([text_a, text_b])
+        sim = float(emb[0] @ emb[1])
         # clamp
         if sim < 0:
             sim = 0.0
@@ -26,6 +162,8 @@ def compute_soft_similarity(text_a, text_b):
     except Exception:
         # Fallback to TF-IDF cosine if embedding fails
         try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.metrics.pairwise import cosine_similarity
             vect = TfidfVectorizer(stop_words="english", max_features=5000)
             tfidf = vect.fit_transform([text_a or "", text_b or ""])
             sim = cosine_similarity(tfidf[0:1], tfidf[1:2])[0][0]
@@ -33,6 +171,7 @@ def compute_soft_similarity(text_a, text_b):
         except Exception:
             return 0.0
 
+@metrics.timed("hard_match")
 def hard_keyword_match(jd_text, resume_text, must_skills_csv, nice_skills_csv):
     """
     jd_text, resume_text: strings
@@ -41,13 +180,14 @@ def hard_keyword_match(jd_text, resume_text, must_skills_csv, nice_skills_csv):
     """
     must = [s.strip().lower() for s in (must_skills_csv or "").split(",") if s.strip()]
     nice = [s.strip().lower() for s in (nice_skills_csv or "").split(",") if s.strip()]
-    resume_lower = (resume_text or "").lower()
+    # one compiled whole-word automaton for both lists, one pass over the resume
+    found = get_matcher(must + nice).find(resume_text)
 
-    matched_must = [s for s in must if s in resume_lower]
-    missing_must = [s for s in must if s not in resume_lower]
+    matched_must = [s for s in must if s in found]
+    missing_must = [s for s in must if s not in found]
 
-    matched_nice = [s for s in nice if s in resume_lower]
-    missing_nice = [s for s in nice if s not in resume_lower]
+    matched_nice = [s for s in nice if s in found]
+    missing_nice = [s for s in nice if s not in found]
 
     hard_score = 1.0
     if must:
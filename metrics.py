@@ -0,0 +1,257 @@
+# metrics.py
+"""
+Switchable stage timing, counters and histograms, with Prometheus text
+export. Off by default (METRICS_ENABLED=1 or enable() turns it on); when
+off a timed function costs one flag check and stage() returns a shared
+no-op context manager.
+
+    @metrics.timed("parse")
+    def parse_bytes(...): ...
+
+    with metrics.stage("match.feedback"):
+        ...
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+
+PREFIX = "resume_checker"
+# upper bounds in seconds; +Inf is implicit
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# each process (app, batch workers) writes its own <role>-<pid>.prom file
+# here, e.g. the node_exporter textfile collector directory
+METRICS_DIR = os.environ.get("METRICS_DIR")
+
+_enabled = os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_engines = []
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+    for eng in _engines:
+        _set_engine_listeners(eng, on)
+
+
+def disable():
+    enable(False)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# ---------- recording ----------
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    if not _enabled:
+        return
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def observe(name, seconds, **labels):
+    if not _enabled:
+        return
+    k = _key(name, labels)
+    i = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        h = _histograms.get(k)
+        if h is None:
+            h = _histograms[k] = [0] * (len(BUCKETS) + 2)
+        h[i] += 1
+        h[-1] += seconds
+
+
+class _Stage:
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe("stage_seconds", time.perf_counter() - self.t0, stage=self.stage)
+        if exc_type is not None:
+            inc("stage_errors_total", stage=self.stage)
+        return False
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+def stage(name):
+    """Context manager timing a block as stage `name`"""
+    return _Stage(name) if _enabled else _NOOP
+
+
+def timed(name):
+    """Decorator timing every call of a function as stage `name`"""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# ---------- SQLAlchemy ----------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_t0", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_metrics_t0")
+    if not starts:
+        return
+    op = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    observe("db_query_seconds", time.perf_counter() - starts.pop(), op=op)
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("_metrics_t0") if exception_context.connection else None
+    if starts:
+        starts.pop()
+    inc("db_query_errors_total")
+
+
+def _set_engine_listeners(eng, on):
+    from sqlalchemy import event
+
+    hooks = (("before_cursor_execute", _before_cursor_execute),
+             ("after_cursor_execute", _after_cursor_execute),
+             ("handle_error", _handle_error))
+    for name, fn in hooks:
+        has = event.contains(eng, name, fn)
+        if on and not has:
+            event.listen(eng, name, fn)
+        elif not on and has:
+            event.remove(eng, name, fn)
+
+
+def instrument_engine(eng):
+    """Time every query on eng while metrics are enabled (no listeners while off)"""
+    _engines.append(eng)
+    _set_engine_listeners(eng, _enabled)
+
+
+# ---------- reading / export ----------
+def _quantile(h, q):
+    """Estimate from bucket counts, interpolating inside the bucket"""
+    total = sum(h[:-1])
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, c in enumerate(h[:-1]):
+        if seen + c >= rank and c:
+            lo = BUCKETS[i - 1] if i > 0 else 0.0
+            hi = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+            return lo + (hi - lo) * (rank - seen) / c
+        seen += c
+    return BUCKETS[-1]
+
+
+def snapshot():
+    """
+    returns {"counters": [{name, labels, value}],
+             "histograms": [{name, labels, count, sum, mean, p50, p95}]}
+    """
+    with _lock:
+        counters = [(k, v) for k, v in _counters.items()]
+        hists = [(k, list(h)) for k, h in _histograms.items()]
+    out = {"counters": [], "histograms": []}
+    for (name, labels), v in sorted(counters):
+        out["counters"].append({"name": name, "labels": dict(labels), "value": v})
+    for (name, labels), h in sorted(hists):
+        count = sum(h[:-1])
+        out["histograms"].append({
+            "name": name, "labels": dict(labels), "count": count, "sum": h[-1],
+            "mean": h[-1] / count if count else None,
+            "p50": _quantile(h, 0.5), "p95": _quantile(h, 0.95),
+        })
+    return out
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in items) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        counters = sorted(_counters.items())
+        hists = sorted((k, list(h)) for k, h in _histograms.items())
+    lines = []
+    typed = set()
+    for (name, labels), v in counters:
+        full = f"{PREFIX}_{name}"
+        if full not in typed:
+            lines.append(f"# TYPE {full} counter")
+            typed.add(full)
+        lines.append(f"{full}{_labels(labels)} {v}")
+    for (name, labels), h in hists:
+        full = f"{PREFIX}_{name}"
+        if full not in typed:
+            lines.append(f"# TYPE {full} histogram")
+            typed.add(full)
+        cum = 0
+        for bound, c in zip(BUCKETS, h):
+            cum += c
+            lines.append(f"{full}_bucket{_labels(labels, le=bound)} {cum}")
+        cum += h[len(BUCKETS)]
+        lines.append(f"{full}_bucket{_labels(labels, le='+Inf')} {cum}")
+        lines.append(f"{full}_sum{_labels(labels)} {h[-1]}")
+        lines.append(f"{full}_count{_labels(labels)} {cum}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Write the text export atomically (safe for a textfile collector)"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+    return path
+
+
+def export_textfile(role):
+    """Write <METRICS_DIR>/<role>-<pid>.prom if metrics are on and METRICS_DIR is set"""
+    if not (_enabled and METRICS_DIR):
+        return None
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    return write_prometheus(os.path.join(METRICS_DIR, f"{role}-{os.getpid()}.prom"))
@@ -0,0 +1,210 @@
+# score_jsonl.py
+"""
+Headless batch scorer: JSONL records in, JSONL results out, no browser.
+
+Each input line is an object with a resume and a job:
+    {"id": "any passthrough value",
+     "resume_path": "cv.pdf" | "resume_text": "...",
+     "job_id": 3 | "jd_text": "..."}
+
+Each output line carries the input line number, the id, and the fields of
+utils.compute_match_and_feedback (or an "error"), in input order.
+
+    python score_jsonl.py pairs.jsonl -o scores.jsonl --workers 8
+    cat pairs.jsonl | python score_jsonl.py > scores.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+JD_CACHE_SIZE = 256
+
+
+class _LRU(OrderedDict):
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get_or(self, key, make):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        value = self[key] = make()
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+        return value
+
+
+# ---------- worker side ----------
+_jd_cache = _LRU(JD_CACHE_SIZE)  # per process: jd text -> features
+
+
+def _resume_text(rec):
+    if rec.get("resume_text") is not None:
+        return rec["resume_text"]
+    path = rec.get("resume_path")
+    if not path:
+        raise ValueError("record needs resume_text or resume_path")
+    from utils import parse_bytes
+    with open(path, "rb") as f:
+        return parse_bytes(os.path.basename(path), f.read())
+
+
+def _score_one(rec, jd_features):
+    from score_memo import text_hash
+    from utils import build_jd_features, compute_match_and_feedback
+
+    if jd_features is None:
+        jd_text = rec.get("jd_text")
+        if jd_text is None:
+            raise ValueError("record needs job_id or jd_text")
+        jd_features = _jd_cache.get_or(text_hash(jd_text), lambda: build_jd_features(jd_text))
+    return compute_match_and_feedback(_resume_text(rec), None, jd_features=jd_features)
+
+
+def _score_batch(batch, job_features):
+    """
+    Runs in a worker. batch: [(line_no, record or None, parse error)]
+    job_features: {job_id: stored features} for the job ids in this batch
+    """
+    out = []
+    for line_no, rec, error in batch:
+        res = {"line": line_no}
+        if rec is not None:
+            res["id"] = rec.get("id")
+        if error is None:
+            try:
+                job_id = rec.get("job_id")
+                if job_id is not None and job_id not in job_features:
+                    raise ValueError(f"unknown job_id {job_id}")
+                res.update(_score_one(rec, job_features.get(job_id) if job_id is not None else None))
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        if error is not None:
+            res["error"] = error
+        out.append(res)
+    return out
+
+
+# ---------- driver ----------
+def _read_records(lines):
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            rec = json.loads(line)
+            if not isinstance(rec, dict):
+                raise ValueError("not a JSON object")
+            yield line_no, rec, None
+        except ValueError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score_records(lines, workers=None, batch_size=256, db=None):
+    """
+    Score JSONL lines (any iterable of str) and yield result dicts in input
+    order. Input is read lazily and at most 2 * workers batches are in
+    flight, so memory stays bounded however long the input is.
+    workers 0 or 1 scores in this process (no pool overhead).
+    """
+    job_cache = _LRU(JD_CACHE_SIZE)  # job id -> stored features (None if missing)
+    session = None
+
+    def resolve_jobs(batch):
+        """
+        (batch, {job_id: stored features}); a record whose job can't be
+        resolved gets that as its error instead of stopping the run
+        """
+        nonlocal session
+        feats, out = {}, []
+        for line_no, rec, error in batch:
+            job_id = rec.get("job_id") if rec else None
+            if error is None and job_id is not None:
+                try:
+                    if job_id not in feats:
+                        if session is None:
+                            from db import SessionLocal
+                            session = db or SessionLocal()
+
+                        def load():
+                            from db import Job
+                            from features import get_job_features
+                            job = session.get(Job, job_id)
+                            return get_job_features(session, job) if job is not None else None
+                        f = job_cache.get_or(job_id, load)
+                        if f is not None:
+                            feats[job_id] = f
+                except Exception as e:
+                    if session is not None:
+                        session.rollback()
+                    error = f"{type(e).__name__}: {e}"
+            out.append((line_no, rec, error))
+        return out, feats
+
+    batches = _batches(_read_records(lines), batch_size)
+    try:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            for batch in batches:
+                yield from _score_batch(*resolve_jobs(batch))
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for batch in batches:
+                in_flight.append(pool.submit(_score_batch, *resolve_jobs(batch)))
+                if len(in_flight) >= workers * 2:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+    finally:
+        if session is not None and db is None:
+            session.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score resume/job pairs from JSONL")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: CPU count, 1 = in-process)")
+    parser.add_argument("--batch-size", type=int, default=256, help="records per worker task")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    n = errors = 0
+    start = time.perf_counter()
+    try:
+        for res in score_records(src, workers=args.workers, batch_size=args.batch_size):
+            dst.write(json.dumps(res, ensure_ascii=False) + "\n")
+            n += 1
+            errors += "error" in res
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    seconds = time.perf_counter() - start
+    print(f"Scored {n - errors} of {n} records in {seconds:.1f}s "
+          f"({n / seconds if seconds else 0:.0f} records/s), {errors} errors", file=sys.stderr)
+    return 0 if n and not errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# score_memo.py
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_
+
+import metrics
+from db import Job, PairScore, Resume
+from utils import SCORER_VERSION
+
+# Batch scores are memoized in pair_scores. A row is fresh while the
+# resume text hash, the JD text hash and the scorer version it was computed
+# with all still match; otherwise it is stale and gets rescored in place.
+# A batch run also rescores rows computed against an older corpus idf
+# snapshot (idf_model.py); the leaderboard keeps showing them until then.
+# A batch run only scores missing / stale pairs, so reopening a leaderboard
+# is a query, not a recompute.
+
+
+def text_hash(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def backfill_text_hashes(db, chunk_size=1000):
+    """
+    Fill text_hash for rows inserted without one (older rows, bulk ingestion)
+    returns number of rows updated
+    """
+    updated = 0
+    for model, text_col in ((Resume, Resume.content_text), (Job, Job.description_text)):
+        while True:
+            rows = db.query(model.id, text_col).filter(model.text_hash == None).limit(chunk_size).all()  # noqa: E711
+            if not rows:
+                break
+            db.bulk_update_mappings(model, [{"id": i, "text_hash": text_hash(t)} for i, t in rows])
+            db.commit()
+            updated += len(rows)
+    return updated
+
+
+_MEMO_FIELDS = ("resume_hash", "jd_hash", "scorer_version", "idf_generation", "score", "similarity",
+                "skill_match_pct", "created_at")
+
+
+def _upsert_statement(db):
+    """
+    INSERT ... ON CONFLICT (resume_id, job_id) DO UPDATE, so two batch runs
+    scoring the same new pair concurrently don't collide; None if the
+    backend has no upsert
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    stmt = insert(PairScore)
+    return stmt.on_conflict_do_update(
+        index_elements=["resume_id", "job_id"],
+        set_={f: stmt.excluded[f] for f in _MEMO_FIELDS},
+    )
+
+
+def _save(db, records):
+    """records with an "id" update that memo row, the rest are inserted"""
+    updates = [r for r in records if r.get("id")]
+    inserts = [{k: v for k, v in r.items() if k != "id"} for r in records if not r.get("id")]
+    with metrics.stage("db.save_scores"):
+        if updates:
+            db.bulk_update_mappings(PairScore, updates)
+        if inserts:
+            stmt = _upsert_statement(db)
+            if stmt is not None:
+                db.execute(stmt, inserts)
+            else:
+                db.bulk_insert_mappings(PairScore, inserts)
+        db.commit()
+
+
+def _record(resume_id, job_id, resume_hash, jd_hash, row, memo_id=None, idf_generation=None):
+    return {
+        "id": memo_id,
+        "resume_id": resume_id,
+        "job_id": job_id,
+        "resume_hash": resume_hash,
+        "jd_hash": jd_hash,
+        "scorer_version": SCORER_VERSION,
+        "idf_generation": idf_generation,
+        "score": row["score"],
+        "similarity": row["similarity"],
+        "skill_match_pct": row["skill_match_pct"],
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _pair_join(job):
+    return and_(
+        PairScore.resume_id == Resume.id,
+        PairScore.job_id == job.id,
+    )
+
+
+def score_job(db, job, jd_features, resume_ids=None, chunk_size=1000, progress=None):
+    """
+    Score every resume (or only resume_ids) against job, skipping pairs whose
+    memo is fresh; new and stale pairs are scored chunk by chunk and saved
+    progress: optional callable(scored, to_score) called before the first
+    and after every saved chunk
+    returns {"scored": n, "reused": n}
+    """
+    from batch_scoring import score_jd_against_resumes
+    from idf_model import current_generation
+
+    backfill_text_hashes(db)
+    db.refresh(job)
+    jd_hash = job.text_hash
+    generation = current_generation()
+
+    base = db.query(Resume.id)
+    if resume_ids is not None:
+        base = base.filter(Resume.id.in_(resume_ids))
+    total = base.count()
+
+    # missing / stale pairs, walked in id order one chunk at a time (keyset
+    # pagination rather than a live cursor, so the writes in between are
+    # safe and memory stays bounded by chunk_size)
+    stale = (
+        db.query(Resume.id, PairScore.id, Resume.content_text, Resume.text_hash)
+        .outerjoin(PairScore, _pair_join(job))
+        .filter(or_(
+            PairScore.id == None,  # noqa: E711
+            PairScore.resume_hash != Resume.text_hash,
+            PairScore.jd_hash != jd_hash,
+            PairScore.scorer_version != SCORER_VERSION,
+            PairScore.idf_generation.is_distinct_from(generation),
+        ))
+    )
+    if resume_ids is not None:
+        stale = stale.filter(Resume.id.in_(resume_ids))
+    to_score = stale.count()
+    scored = 0
+    if progress:
+        progress(0, to_score)
+    last_id = 0
+    while True:
+        rows = stale.filter(Resume.id > last_id).order_by(Resume.id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        results = score_jd_against_resumes(jd_features, [t for _, _, t, _ in rows])
+        _save(db, [
+            _record(rid, job.id, rhash, jd_hash, res, memo_id, generation)
+            for (rid, memo_id, _, rhash), res in zip(rows, results)
+        ])
+        scored += len(rows)
+        if progress:
+            progress(scored, to_score)
+    return {"scored": scored, "reused": total - scored}
+
+
+def save_pair_scores(db, resume, jobs, rows):
+    """
+    Memoize scores computed elsewhere (candidate auto-match): one row per job
+    """
+    from idf_model import current_generation
+
+    if not jobs:
+        return
+    generation = current_generation()
+    resume_hash = resume.text_hash or text_hash(resume.content_text)
+    existing = dict(
+        db.query(PairScore.job_id, PairScore.id)
+        .filter(PairScore.resume_id == resume.id, PairScore.job_id.in_([j.id for j in jobs]))
+        .all()
+    )
+    _save(db, [
+        _record(resume.id, job.id, resume_hash, job.text_hash or text_hash(job.description_text), row,
+                existing.get(job.id), generation)
+        for job, row in zip(jobs, rows)
+    ])
+
+
+def _fresh(job):
+    return and_(
+        PairScore.resume_hash == Resume.text_hash,
+        PairScore.jd_hash == job.text_hash,
+        PairScore.scorer_version == SCORER_VERSION,
+    )
+
+
+def score_stats(db, job, resume_filter=None):
+    """Aggregate stats over a job's fresh memoized scores, computed in SQL"""
+    q = (
+        db.query(func.count(PairScore.id), func.avg(PairScore.score), func.min(PairScore.score), func.max(PairScore.score))
+        .join(Resume, _pair_join(job))
+        .filter(_fresh(job))
+    )
+    if resume_filter is not None:
+        q = q.filter(resume_filter)
+    n, mean, lo, hi = q.one()
+    return {"count": n, "mean": round(mean, 2) if mean is not None else None, "min": lo, "max": hi}
+
+
+def leaderboard(db, job, limit=None, offset=0, resume_filter=None):
+    """
+    Fresh memoized scores for a job, best first
+    resume_filter: optional SQL clause on Resume (e.g. skill_index.has_all_skills)
+    returns list of dicts: resume_id, resume, score, similarity, skill_match_pct
+    """
+    q = (
+        db.query(Resume.id, Resume.filename, PairScore.score, PairScore.similarity, PairScore.skill_match_pct)
+        .join(PairScore, _pair_join(job))
+        .filter(_fresh(job))
+    )
+    if resume_filter is not None:
+        q = q.filter(resume_filter)
+    q = q.order_by(PairScore.score.desc(), Resume.id).offset(offset)
+    if limit:
+        q = q.limit(limit)
+    return [
+        {"resume_id": rid, "resume": name, "score": score, "similarity": sim, "skill_match_pct": pct}
+        for rid, name, score, sim, pct in q
+    ]
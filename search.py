@@ -0,0 +1,114 @@
+# search.py
+"""
+BM25-ranked full-text search over resumes and jobs, on the SQLite FTS5
+tables that db.init_db creates and keeps in sync. Used to prefilter batch
+matches to the resumes that mention a JD's keywords at all, and for the
+recruiter search box. On other backends every function returns None so
+callers fall back to scanning.
+"""
+import json
+import os
+import re
+
+from sqlalchemy import text
+
+from db import FTS_TABLES
+
+BM25_CANDIDATES = int(os.environ.get("BM25_CANDIDATES", 2000))
+_WORD_RE = re.compile(r"\w+")
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+_available = {}
+
+
+def available(db):
+    """True if the FTS tables exist on this session's database"""
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _available:
+        if bind.dialect.name != "sqlite":
+            _available[key] = False
+        else:
+            names = {r[0] for r in db.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+            _available[key] = all(t in names for t in FTS_TABLES)
+    return _available[key]
+
+
+def _phrase(words, prefix=False):
+    """An FTS5 phrase from plain words, quoted so no input is read as query syntax"""
+    tokens = _WORD_RE.findall(words.lower())
+    if not tokens:
+        return None
+    return '"' + " ".join(tokens) + '"' + ("*" if prefix else "")
+
+
+def any_of(terms):
+    """MATCH expression for rows containing any of terms (words or phrases)"""
+    phrases = [p for p in dict.fromkeys(_phrase(t) for t in terms) if p]
+    return " OR ".join(phrases) or None
+
+
+def all_of(query):
+    """
+    MATCH expression for a search box: every word (or "quoted phrase") must
+    occur; the last bare word also matches as a prefix, so results show up
+    while it is still being typed
+    """
+    parts = _QUERY_RE.findall(query or "")
+    phrases = []
+    for i, (quoted, bare) in enumerate(parts):
+        p = _phrase(quoted) if quoted else _phrase(bare, prefix=i == len(parts) - 1)
+        if p:
+            phrases.append(p)
+    return " AND ".join(phrases) or None
+
+
+def bm25_candidates(db, keywords, limit=BM25_CANDIDATES, kind="resume", among=None):
+    """
+    Ids of the resumes (or jobs) mentioning any of keywords, best BM25 first,
+    at most limit; None when full-text search isn't available
+    among: optional ids to rank, e.g. the resumes passing a must-skill filter
+    """
+    if not available(db):
+        return None
+    q = any_of(keywords)
+    if q is None:
+        return []
+    fts = "resumes_fts" if kind == "resume" else "jobs_fts"
+    params = {"q": q, "n": int(limit)}
+    only = ""
+    if among is not None:
+        # one JSON parameter instead of len(among) bound variables
+        only = " AND rowid IN (SELECT value FROM json_each(:ids))"
+        params["ids"] = json.dumps([int(i) for i in among])
+    rows = db.execute(
+        text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :q{only} ORDER BY rank LIMIT :n"),
+        params,
+    )
+    return [r[0] for r in rows]
+
+
+def search_resumes(db, query, limit=20):
+    """
+    Resumes matching a search box query, best first
+    returns list of dicts: resume_id, resume, uploaded_at, score (higher is
+    better), snippet; None when full-text search isn't available
+    """
+    if not available(db):
+        return None
+    q = all_of(query)
+    if q is None:
+        return []
+    rows = db.execute(
+        text(
+            "SELECT r.id, r.filename, r.uploaded_at, -bm25(resumes_fts), "
+            "snippet(resumes_fts, 0, '[', ']', '…', 16) "
+            "FROM resumes_fts JOIN resumes r ON r.id = resumes_fts.rowid "
+            "WHERE resumes_fts MATCH :q ORDER BY rank LIMIT :n"
+        ),
+        {"q": q, "n": int(limit)},
+    )
+    return [
+        {"resume_id": rid, "resume": name, "uploaded_at": uploaded, "score": round(score, 2), "snippet": snip}
+        for rid, name, uploaded, score, snip in rows
+    ]
+
@@ -0,0 +1,316 @@
+# skill_index.py
+"""
+Skill vocabulary and inverted index (skill -> resume ids), so a must-skill
+filter such as "python AND kubernetes" is a set intersection instead of a
+scan and re-match of every resume.
+
+Skills are normalised to their skill_matcher tokens ("Node.js" -> "node js")
+and come from JD keywords and the must / nice lists recruiters enter.
+Postings live in resume_skills. Each Skill row records the highest resume
+id it has been matched against, so sync() only scans resumes added since,
+and a newly added skill is back-filled over the existing resumes once.
+Filters only look skills up: the vocabulary grows from job uploads and
+explicit batch runs, and back-filling runs off the request path
+(sync_in_background).
+Queries run on an in-memory copy (one sorted int32 id array per skill)
+that is refreshed incrementally from the postings table. Deleted resumes
+keep their postings until `python skill_index.py --rebuild`.
+
+    python skill_index.py              # index new resumes / skills
+    python skill_index.py --rebuild
+"""
+import argparse
+import logging
+import threading
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import false, func
+from sqlalchemy.exc import IntegrityError
+
+from db import Resume, ResumeSkill, Skill, session_scope
+from skill_matcher import SkillMatcher, tokenize
+
+log = logging.getLogger(__name__)
+
+SYNC_CHUNK = 2000
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+def normalize_skill(name):
+    return " ".join(tokenize(name))[:128]
+
+
+def _normalize_all(names):
+    return list(dict.fromkeys(n for n in map(normalize_skill, names or ()) if n))
+
+
+# ---------- vocabulary ----------
+def _lookup(db, names):
+    return dict(db.query(Skill.name, Skill.id).filter(Skill.name.in_(names)).all())
+
+
+def add_skills(db, names):
+    """
+    Add skills to the vocabulary (new ones are indexed by the next sync)
+    returns {normalised name: skill id}
+    """
+    names = _normalize_all(names)
+    if not names:
+        return {}
+    ids = _lookup(db, names)
+    missing = [n for n in names if n not in ids]
+    if missing:
+        now = datetime.utcnow()
+        try:
+            db.bulk_insert_mappings(Skill, [{"name": n, "indexed_through": 0, "created_at": now} for n in missing])
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # added by another process in the meantime
+        ids = _lookup(db, names)
+    return ids
+
+
+# ---------- postings ----------
+def _insert_ignore(db):
+    """INSERT ... ON CONFLICT DO NOTHING for postings, or None if the backend has no upsert"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(ResumeSkill).on_conflict_do_nothing(index_elements=["skill_id", "resume_id"])
+
+
+def _save_postings(db, postings, resume_ids):
+    stmt = _insert_ignore(db)
+    if stmt is not None:
+        db.execute(stmt, postings)
+        return
+    have = set(
+        db.query(ResumeSkill.skill_id, ResumeSkill.resume_id)
+        .filter(ResumeSkill.resume_id.in_(resume_ids))
+        .all()
+    )
+    new = [p for p in postings if (p["skill_id"], p["resume_id"]) not in have]
+    if new:
+        db.bulk_insert_mappings(ResumeSkill, new)
+
+
+def sync(db, chunk_size=SYNC_CHUNK):
+    """
+    Match every skill against the resumes it hasn't seen yet, in one pass
+    over those resumes
+    returns number of postings written
+    """
+    top = db.query(func.max(Resume.id)).scalar() or 0
+    lagging = db.query(Skill.id, Skill.name, Skill.indexed_through).filter(Skill.indexed_through < top).all()
+    if not lagging:
+        return 0
+    by_name = {name: (sid, through) for sid, name, through in lagging}
+    matcher = SkillMatcher(list(by_name))
+    added = 0
+    last_id = min(through for _, _, through in lagging)
+    while True:
+        rows = (
+            db.query(Resume.id, Resume.content_text)
+            .filter(Resume.id > last_id, Resume.id <= top)
+            .order_by(Resume.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            break
+        postings = []
+        for rid, text in rows:
+            for name in matcher.find(text):
+                sid, through = by_name[name]
+                if rid > through:
+                    postings.append({"skill_id": sid, "resume_id": rid})
+        if postings:
+            _save_postings(db, postings, [rid for rid, _ in rows])
+            added += len(postings)
+        db.commit()
+        last_id = rows[-1][0]
+    (
+        db.query(Skill)
+        .filter(Skill.id.in_([sid for sid, _, _ in lagging]))
+        .update({Skill.indexed_through: top}, synchronize_session=False)
+    )
+    db.commit()
+    return added
+
+
+_bg_lock = threading.Lock()
+_bg = {"pending": False, "running": False}
+
+
+def sync_in_background():
+    """
+    Run sync() on a daemon thread with its own session. Calls made while it
+    runs are folded into one more pass, so at most one thread per process
+    syncs and nothing requested is skipped.
+    returns True when a thread was started
+    """
+    with _bg_lock:
+        _bg["pending"] = True
+        if _bg["running"]:
+            return False
+        _bg["running"] = True
+
+    def run():
+        try:
+            while True:
+                with _bg_lock:
+                    if not _bg["pending"]:
+                        _bg["running"] = False
+                        return
+                    _bg["pending"] = False
+                try:
+                    with session_scope() as db:
+                        sync(db)
+                except Exception:
+                    log.exception("background skill index sync failed")
+        except BaseException:
+            with _bg_lock:
+                _bg["running"] = False
+            raise
+
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+def unindexed(db, skills):
+    """Normalised skills that are not in the vocabulary or not yet matched against every resume"""
+    names = _normalize_all(skills)
+    if not names:
+        return []
+    top = db.query(func.max(Resume.id)).scalar() or 0
+    ready = {
+        name for (name,) in db.query(Skill.name).filter(Skill.name.in_(names), Skill.indexed_through >= top)
+    }
+    return [n for n in names if n not in ready]
+
+
+def rebuild(db):
+    """Drop every posting and re-index all resumes against the vocabulary"""
+    db.query(ResumeSkill).delete(synchronize_session=False)
+    db.query(Skill).update({Skill.indexed_through: 0}, synchronize_session=False)
+    db.commit()
+    with _index_lock:
+        _index.__init__()
+    return sync(db)
+
+
+# ---------- in-memory index ----------
+class SkillIndex:
+    """skill id -> sorted resume ids, loaded from resume_skills"""
+
+    def __init__(self):
+        self.postings = {}
+        # lowest / highest resume_skills row id loaded
+        self._first = None
+        self._last = 0
+
+    def refresh(self, db, chunk_size=200_000):
+        """Load postings added since the last refresh (everything after a rebuild)"""
+        first = db.query(func.min(ResumeSkill.id)).scalar()
+        last = db.query(func.max(ResumeSkill.id)).scalar() or 0
+        if first is None or last < self._last or (self._first is not None and first > self._first):
+            # table emptied or rebuilt: start over
+            self.postings, self._first, self._last = {}, None, 0
+        if first is None:
+            return
+        while self._last < last:
+            rows = (
+                db.query(ResumeSkill.id, ResumeSkill.skill_id, ResumeSkill.resume_id)
+                .filter(ResumeSkill.id > self._last)
+                .order_by(ResumeSkill.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+            self._merge(np.asarray(rows, dtype=np.int64))
+            self._last = rows[-1][0]
+        if self._first is None:
+            self._first = first
+
+    def _merge(self, rows):
+        order = np.lexsort((rows[:, 2], rows[:, 1]))
+        skills, resumes = rows[order, 1], rows[order, 2].astype(np.int32)
+        starts = np.flatnonzero(np.r_[True, skills[1:] != skills[:-1]])
+        for sid, part in zip(skills[starts].tolist(), np.split(resumes, starts[1:])):
+            old = self.postings.get(sid)
+            self.postings[sid] = part if old is None else np.union1d(old, part)
+
+    def resumes_with_all(self, skill_ids):
+        """Sorted ids of resumes that have every skill, smallest posting list first"""
+        lists = sorted((self.postings.get(sid, _EMPTY) for sid in skill_ids), key=len)
+        out = lists[0]
+        for ids in lists[1:]:
+            if not len(out):
+                break
+            out = np.intersect1d(out, ids, assume_unique=True)
+        return out
+
+
+_index = SkillIndex()
+_index_lock = threading.Lock()
+
+
+def resumes_with_skills(db, skills):
+    """
+    Ids of the resumes containing every skill in `skills` (whole words, as
+    hard_keyword_match), as a sorted int32 array; None when no skill is given.
+    A skill that isn't in the vocabulary matches no resume.
+    """
+    names = _normalize_all(skills)
+    if not names:
+        return None
+    ids = _lookup(db, names)
+    if len(ids) < len(names):
+        return _EMPTY
+    with _index_lock:
+        _index.refresh(db)
+        return _index.resumes_with_all([ids[n] for n in names])
+
+
+def has_all_skills(db, skills):
+    """
+    SQL clause on Resume.id for resumes containing every skill (for filtering
+    queries such as score_memo.leaderboard), or None when no skill is given.
+    A skill that isn't in the vocabulary matches no resume.
+    """
+    names = _normalize_all(skills)
+    if not names:
+        return None
+    ids = list(_lookup(db, names).values())
+    if len(ids) < len(names):
+        return false()
+    matching = (
+        db.query(ResumeSkill.resume_id)
+        .filter(ResumeSkill.skill_id.in_(ids))
+        .group_by(ResumeSkill.resume_id)
+        .having(func.count(ResumeSkill.skill_id) == len(ids))
+    )
+    return Resume.id.in_(matching.scalar_subquery())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the skill inverted index from the database")
+    parser.add_argument("--rebuild", action="store_true", help="drop all postings and re-index every resume")
+    args = parser.parse_args(argv)
+
+    from db import init_db, session_scope
+    init_db()
+    with session_scope() as db:
+        added = rebuild(db) if args.rebuild else sync(db)
+        n_skills = db.query(func.count(Skill.id)).scalar()
+    print(f"Wrote {added} postings; vocabulary has {n_skills} skills")
+
+
+if __name__ == "__main__":
+    main()
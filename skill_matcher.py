@@ -0,0 +1,91 @@
+# skill_matcher.py
+import re
+from collections import deque
+from functools import lru_cache
+
+# Word tokens: letters/digits plus the "+" / "#" used by skills like c++ and c#.
+# Everything else (spaces, punctuation, "." in node.js, "-" in scikit-learn)
+# separates tokens, in skills and in resumes alike, so matching is on whole
+# words only: "java" does not match inside "javascript", nor "r" inside "rust".
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over word tokens, compiled once per skill set.
+    find() scans a text in one pass regardless of how many skills there are.
+    """
+
+    def __init__(self, skills):
+        self.skills = list(dict.fromkeys(s.strip().lower() for s in skills if s and s.strip()))
+        self._goto = [{}]
+        self._out = [[]]
+        multi = False
+        for skill in self.skills:
+            toks = tokenize(skill)
+            if not toks:
+                continue
+            multi = multi or len(toks) > 1
+            node = 0
+            for t in toks:
+                nxt = self._goto[node].get(t)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][t] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(skill)
+        self._multi = multi
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for t, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and t not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(t, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def find(self, text):
+        """returns the set of skills occurring in text as whole words"""
+        tokens = tokenize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        if not self._multi:
+            # every skill is one token: a single set intersection
+            root = goto[0]
+            return {s for t in set(tokens) if t in root for s in out[root[t]]}
+        found = set()
+        node = 0
+        for t in tokens:
+            while node and t not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(t, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def match(self, text):
+        """returns (matched, missing) in skill order"""
+        found = self.find(text)
+        return [s for s in self.skills if s in found], [s for s in self.skills if s not in found]
+
+
+@lru_cache(maxsize=512)
+def _compiled(skills):
+    return SkillMatcher(skills)
+
+
+def get_matcher(skills):
+    """Compiled matcher for an iterable of skills, cached per distinct skill set."""
+    return _compiled(tuple(skills))
@@ -0,0 +1,38 @@
+# spawning.py
+"""
+Start "spawn" worker processes from inside the Streamlit app.
+
+Streamlit runs app.py as a stand-in __main__ module whose __file__ is
+app.py. A spawned child re-imports the parent's __main__ by path, so each
+worker would re-run the whole app script as __mp_main__ (init_db, warm-up,
+starting more workers) before its target, and die starting processes
+during bootstrap. start() hides __main__ while the child is launched, so
+the child only imports the module that defines its target.
+"""
+import multiprocessing
+import sys
+import threading
+import types
+
+_ctx = multiprocessing.get_context("spawn")  # no fork of a threaded (Streamlit) process
+_main_lock = threading.Lock()
+
+
+def get_context():
+    return _ctx
+
+
+def start(target, args=(), kwargs=None, daemon=True):
+    """Start target(*args, **kwargs) in a spawned process; returns the Process"""
+    p = _ctx.Process(target=target, args=args, kwargs=kwargs or {}, daemon=daemon)
+    with _main_lock:
+        main = sys.modules.get("__main__")
+        sys.modules["__main__"] = types.ModuleType("__main__")  # no __file__: nothing to re-import
+        try:
+            p.start()
+        finally:
+            if main is None:
+                sys.modules.pop("__main__", None)
+            else:
+                sys.modules["__main__"] = main
+    return p
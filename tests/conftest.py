@@ -0,0 +1,48 @@
+# tests/conftest.py
+"""
+Every test runs against a throwaway database, idf model and embedding
+store. db.py reads DATABASE_URL once, on first import, so the environment
+is pointed at a temporary directory before any test module is collected
+(spawned workers inherit it).
+
+    python -m pytest tests/
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_env = {}
+
+
+def pytest_configure(config):
+    tmp = tempfile.mkdtemp(prefix="resume_tests_")
+    _env["dir"] = tmp
+    _env["patch"] = mp = pytest.MonkeyPatch()
+    mp.setenv("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'app.db')}")
+    mp.setenv("IDF_MODEL_PATH", os.path.join(tmp, "idf_model.npz"))
+    mp.setenv("EMBEDDINGS_DIR", os.path.join(tmp, "embeddings"))
+
+
+def pytest_unconfigure(config):
+    if "patch" in _env:
+        _env["patch"].undo()
+        shutil.rmtree(_env["dir"], ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    """A session on the test database, emptied again after the test"""
+    from db import Base, engine, init_db, session_scope
+
+    init_db()
+    with session_scope() as session:
+        yield session
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
@@ -0,0 +1,67 @@
+# tests/test_batch_queue.py
+import threading
+from datetime import datetime, timedelta
+
+from batch_queue import STALE_AFTER_SECONDS, claim_next, enqueue, requeue_stale
+from db import BatchJob, Job, session_scope
+
+
+def _job(db):
+    job = Job(title="Backend", description_text="python")
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_claims_oldest_first_until_empty(db):
+    job = _job(db)
+    first, second = enqueue(db, job.id), enqueue(db, job.id, resume_ids=[1, 2])
+    assert claim_next(db, "w1") == first.id
+    assert claim_next(db, "w2") == second.id
+    assert claim_next(db, "w1") is None
+    db.expire_all()
+    assert (first.status, first.worker) == ("running", "w1")
+    assert first.started_at is not None and first.heartbeat_at is not None
+
+
+def test_each_batch_is_claimed_once_by_concurrent_workers(db):
+    job = _job(db)
+    queued = [enqueue(db, job.id).id for _ in range(20)]
+    claims = []
+    lock = threading.Lock()
+
+    def worker(name):
+        with session_scope() as s:
+            while True:
+                batch_id = claim_next(s, name)
+                if batch_id is None:
+                    return
+                with lock:
+                    claims.append((batch_id, name))
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(b for b, _ in claims) == queued
+    db.expire_all()
+    assert {b.id: b.worker for b in db.query(BatchJob)} == dict(claims)
+
+
+def test_stale_running_batches_are_requeued(db):
+    job = _job(db)
+    stale, alive = enqueue(db, job.id), enqueue(db, job.id)
+    claim_next(db, "dead-worker")
+    claim_next(db, "live-worker")
+    db.query(BatchJob).filter(BatchJob.id == stale.id).update(
+        {"heartbeat_at": datetime.utcnow() - timedelta(seconds=STALE_AFTER_SECONDS + 60)})
+    db.commit()
+
+    assert requeue_stale(db) == 1
+    db.expire_all()
+    assert (stale.status, stale.worker) == ("queued", None)
+    assert (alive.status, alive.worker) == ("running", "live-worker")
+    assert claim_next(db, "w2") == stale.id
+    assert requeue_stale(db) == 0
@@ -0,0 +1,80 @@
+# tests/test_db.py
+import sqlite3
+
+import pytest
+from sqlalchemy import inspect, text
+
+from db import Job, Resume, compress_text, compress_text_columns, decompress_text, run_sql, sqlite_connect
+from features import store_job_features
+from search import bm25_candidates, search_resumes
+
+LONG = "Senior Python engineer — Django, PostgreSQL, Kubernetes. " * 20
+
+
+def test_compress_round_trip():
+    for value in (None, "", "short ünïcode", LONG):
+        assert decompress_text(compress_text(value)) == value
+    assert compress_text(LONG)[:1] == b"\xff"
+    assert compress_text("short") == b"short"  # not worth compressing
+    assert decompress_text("stored before compression") == "stored before compression"
+
+
+def test_compressed_text_column(db):
+    db.add(Resume(filename="cv.pdf", content_text=LONG))
+    db.commit()
+    stored = db.execute(text("SELECT content_text FROM resumes")).scalar()
+    assert isinstance(stored, bytes) and len(stored) < len(LONG.encode("utf-8"))
+    db.expunge_all()
+    assert db.query(Resume).one().content_text == LONG
+
+
+def test_fts_matches_after_compress_text_columns(db):
+    # rows written as plain text before the column was compressed
+    for name, body in (("old.pdf", LONG), ("other.pdf", "Java developer, Spring Boot")):
+        db.execute(text("INSERT INTO resumes (filename, content_text) VALUES (:f, :t)"), {"f": name, "t": body})
+    db.commit()
+    old_id = db.execute(text("SELECT id FROM resumes WHERE filename = 'old.pdf'")).scalar()
+    assert bm25_candidates(db, ["kubernetes"]) == [old_id]
+
+    assert compress_text_columns(vacuum=False)["resumes"] == 2
+    assert db.execute(text("SELECT DISTINCT typeof(content_text) FROM resumes")).scalars().all() == ["blob"]
+    assert compress_text_columns(vacuum=False)["resumes"] == 0  # already compressed
+
+    assert bm25_candidates(db, ["kubernetes"]) == [old_id]
+    assert [r["resume"] for r in search_resumes(db, "postgres")] == ["old.pdf"]
+    assert db.get(Resume, old_id).content_text == LONG
+
+
+def test_large_job_columns_are_deferred(db):
+    job = Job(title="Backend", description_text=LONG)
+    store_job_features(job)
+    db.add(job)
+    db.commit()
+    db.expunge_all()
+    listed = db.query(Job).one()
+    assert {"description_text", "features"} <= inspect(listed).unloaded
+    assert listed.features  # still loads on access
+
+
+def test_maintenance_connections_keep_fts_in_sync(db):
+    run_sql("INSERT INTO resumes (filename, content_text) VALUES (:f, :t)", {"f": "cv.pdf", "t": LONG})
+    rid = run_sql("SELECT id FROM resumes")[0][0]
+    assert bm25_candidates(db, ["kubernetes"]) == [rid]
+
+    # the triggers need decompress_text: a bare connection can't write
+    bare = sqlite3.connect(db.get_bind().url.database)
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="decompress_text"):
+            bare.execute("DELETE FROM resumes")
+    finally:
+        bare.close()
+
+    conn = sqlite_connect()
+    try:
+        conn.execute("UPDATE resumes SET content_text = 'Java developer' WHERE id = ?", (rid,))
+        conn.commit()
+    finally:
+        conn.close()
+    assert bm25_candidates(db, ["kubernetes"]) == []
+    assert run_sql("DELETE FROM resumes WHERE id = :i", {"i": rid}) == 1
+    assert bm25_candidates(db, ["java"]) == []
@@ -0,0 +1,44 @@
+# tests/test_doc_parser.py
+import io
+import zipfile
+
+import pytest
+
+from doc_parser import ParseError, ParserPool, detect_format
+
+
+def _zip(names):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name in names:
+            zf.writestr(name, "<xml/>")
+    return buf.getvalue()
+
+
+def test_detect_format():
+    assert detect_format(b"%PDF-1.7\n...", "cv.docx") == "pdf"  # bytes win over the name
+    assert detect_format(_zip(["[Content_Types].xml", "word/document.xml"]), "cv") == "docx"
+    assert detect_format(b"plain resume text", "cv.pdf") == "txt"
+    assert detect_format("ünïcode".encode("utf-16"), "cv.txt") == "txt"
+
+
+@pytest.mark.parametrize("data, code", [
+    (_zip(["xl/workbook.xml"]), "unsupported_format"),
+    (b"PK\x03\x04 truncated", "corrupt"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 64, "unsupported_format"),
+    (b"{\\rtf1\\ansi resume}", "unsupported_format"),
+])
+def test_detect_format_rejects(data, code):
+    with pytest.raises(ParseError) as e:
+        detect_format(data, "cv.docx")
+    assert e.value.code == code
+
+
+def test_pool_timeout_replaces_the_worker():
+    with ParserPool(workers=1, timeout=0) as pool:
+        # no worker answers within 0s: it is killed and the parse gives up
+        with pytest.raises(ParseError) as e:
+            pool.parse("cv.txt", b"python developer")
+        assert e.value.code == "timeout"
+        pool.timeout = 60
+        assert pool.parse("cv.txt", b"python developer")["text"] == "python developer"
@@ -0,0 +1,61 @@
+# tests/test_embedding_chunks.py
+import numpy as np
+import pytest
+
+import matcher
+from matcher import chunk_text, embed_texts
+
+DIM = 4
+
+
+@pytest.mark.parametrize("words, overlap, n", [
+    (150, 25, 150), (150, 25, 151), (150, 25, 275), (150, 25, 276), (150, 25, 1000),
+    (5, 1, 9), (5, 4, 23), (5, 5, 10), (5, 7, 12),
+])
+def test_chunks_cover_every_word(words, overlap, n):
+    tokens = [f"w{i}" for i in range(n)]
+    chunks = [c.split() for c in chunk_text(" ".join(tokens), words, overlap)]
+    assert all(len(c) <= words for c in chunks)
+    assert chunks[0][0] == "w0" and chunks[-1][-1] == f"w{n - 1}"
+    assert {t for c in chunks for t in c} == set(tokens)
+    # consecutive windows overlap (or at least touch), no gaps in between
+    for a, b in zip(chunks, chunks[1:]):
+        assert int(b[0][1:]) <= int(a[-1][1:]) + 1
+
+
+def test_chunk_text_short_and_empty():
+    assert chunk_text("") == [""]
+    assert chunk_text("just a few words") == ["just a few words"]
+
+
+@pytest.fixture
+def encode_calls(monkeypatch):
+    monkeypatch.setattr(matcher, "_embedding_cache", matcher._EmbeddingCache(100))
+    calls = []
+
+    def encode(chunks, batch_size):
+        calls.append(list(chunks))
+        vecs = np.ones((len(chunks), DIM)) + np.arange(len(chunks))[:, None] * np.eye(DIM)[0]
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+    return calls, encode
+
+
+def test_cached_texts_are_not_encoded_again(encode_calls):
+    calls, encode = encode_calls
+    long_text = " ".join(f"w{i}" for i in range(400))
+    first = embed_texts(["python", long_text, "python"], encode=encode)
+    assert first.shape == (3, DIM)
+    np.testing.assert_array_equal(first[0], first[2])
+    # duplicates in one call are encoded once; the long text as several chunks
+    assert len(calls) == 1 and calls[0].count("python") == 1
+    assert len(calls[0]) == 1 + len(chunk_text(long_text))
+
+    again = embed_texts([long_text, "python"], encode=encode)
+    assert len(calls) == 1  # all cache hits
+    np.testing.assert_array_equal(again, first[[1, 0]])
+
+    embed_texts(["python", "java"], encode=encode)
+    assert calls[1] == ["java"]  # only the new text
+    for v in embed_texts(["python", long_text, "java"], encode=encode):
+        assert np.linalg.norm(v) == pytest.approx(1.0)
@@ -0,0 +1,102 @@
+# tests/test_embedding_store.py
+import os
+import zlib
+
+import numpy as np
+
+from embedding_store import EmbeddingStore
+
+DIM = 8
+
+
+def fake_encode(texts, batch_size):
+    """Deterministic stand-in for the model: one vector per text"""
+    return np.stack([np.random.default_rng(zlib.crc32(t.encode())).standard_normal(DIM) for t in texts])
+
+
+def _store(root, **kw):
+    return EmbeddingStore("resume", model_name=kw.pop("model_name", "test-model"), root=str(root),
+                          encode=kw.pop("encode", fake_encode))
+
+
+def test_vectors_are_unit_and_persisted(tmp_path):
+    store = _store(tmp_path)
+    assert store.add([1, 2, 3], ["python", "java", "rust"]) == 3
+    assert store.add([2, 4], ["java", "go"]) == 1  # 2 is stored already
+    reopened = _store(tmp_path)
+    assert reopened.ids.tolist() == [1, 2, 3, 4]
+    want = fake_encode(["java"], 1)[0]
+    np.testing.assert_allclose(reopened.get(2), want / np.linalg.norm(want), rtol=1e-6)
+    assert reopened.nearest_among([1, 2, 3, 99], reopened.get(3), k=2)[0] == 3
+
+
+def test_torn_tail_is_trimmed_by_a_writer(tmp_path):
+    store = _store(tmp_path)
+    store.add([1, 2], ["python", "java"])
+    # a writer that crashed half-way through its append
+    with open(store._vec_path, "ab") as f:
+        f.write(b"\x00" * (4 * DIM + 5))
+    with open(store._ids_path, "ab") as f:
+        f.write(b"\x07\x00\x00")
+
+    # readers ignore the tail, it may be an append in progress
+    store.refresh()
+    assert store.ids.tolist() == [1, 2]
+    assert os.path.getsize(store._ids_path) == 2 * 8 + 3
+
+    repaired = _store(tmp_path)
+    assert repaired.ids.tolist() == [1, 2]
+    assert os.path.getsize(store._ids_path) == 2 * 8
+    assert os.path.getsize(store._vec_path) == 2 * 4 * DIM
+    assert repaired.add([3], ["rust"]) == 1
+    assert _store(tmp_path).ids.tolist() == [1, 2, 3]
+
+
+def test_other_embedding_settings_wipe_the_store(tmp_path):
+    _store(tmp_path).add([1, 2], ["python", "java"])
+    other = _store(tmp_path, model_name="other-model")
+    assert len(other) == 0 and other.get(1) is None
+    assert not os.path.exists(other._vec_path)
+    other.add([5], ["go"])
+    assert _store(tmp_path, model_name="other-model").ids.tolist() == [5]
+    assert len(_store(tmp_path)) == 0  # and back again
+
+
+def test_add_skips_ids_another_process_appended(tmp_path):
+    other = _store(tmp_path)
+
+    def encode_while_other_appends(texts, batch_size):
+        # another writer stores 2 and 3 while this one is encoding, unlocked
+        other.add([2, 3], ["java", "rust"])
+        return fake_encode(texts, batch_size)
+
+    store = _store(tmp_path, encode=encode_while_other_appends)
+    assert store.add([1, 2, 3], ["python", "java", "rust"]) == 1
+    assert sorted(_store(tmp_path).ids.tolist()) == [1, 2, 3]
+    assert len(store) == 3
+
+
+def test_sync_from_db_embeds_rows_the_store_lacks(db, tmp_path, monkeypatch):
+    import embedding_store
+    import vector_index
+    from db import Job, Resume
+
+    monkeypatch.setattr(embedding_store, "_stores", {
+        kind: EmbeddingStore(kind, model_name="test-model", root=str(tmp_path), encode=fake_encode)
+        for kind in ("resume", "job")
+    })
+    monkeypatch.setattr(vector_index, "_indexes", {})
+    resumes = [Resume(filename=f"{i}.pdf", content_text=f"resume number {i}") for i in range(6)]
+    db.add_all(resumes + [Job(title="Backend", description_text="python developer")])
+    db.commit()
+    ids = [r.id for r in resumes]
+    store = embedding_store.get_store("resume")
+    store.add([ids[5]], ["resume number 5"])
+
+    # the index only knows embedded rows; callers add the rest
+    assert vector_index.shortlist("resume", store.get(ids[5]), 500) == [ids[5]]
+    assert embedding_store.unembedded_ids(db, "resume") == ids[:5]
+
+    assert embedding_store.sync_from_db(db) == (5, 1)
+    assert embedding_store.unembedded_ids(db, "resume") == []
+    assert sorted(vector_index.shortlist("resume", store.get(ids[5]), 500)) == ids
@@ -0,0 +1,23 @@
+# tests/test_features.py
+import json
+
+from db import Job
+from features import load_job_features, refresh_stale_job_features, store_job_features
+from utils import SCORER_VERSION
+
+
+def test_refresh_rebuilds_only_stale_jobs(db):
+    fresh = Job(title="Fresh", description_text="Python developer, Django")
+    store_job_features(fresh)
+    old = Job(title="Old", description_text="Java developer, Spring",
+              features=json.dumps({"keywords": ["java"]}), features_version=SCORER_VERSION - 1)
+    missing = Job(title="Missing", description_text="Rust engineer")
+    db.add_all([fresh, old, missing])
+    db.commit()
+
+    assert refresh_stale_job_features(db) == 2
+    for job in (fresh, old, missing):
+        assert job.features_version == SCORER_VERSION
+        assert load_job_features(job) is not None
+    assert "spring" in load_job_features(old)["term_counts"]
+    assert refresh_stale_job_features(db) == 0
@@ -0,0 +1,46 @@
+# tests/test_history.py
+from datetime import datetime, timedelta
+
+from db import Job, Match, Resume, User
+from history import count_matches, match_history
+
+
+def _user(db, name):
+    user = User(username=name, role="candidate")
+    user.set_password("pw")
+    db.add(user)
+    db.flush()
+    return user
+
+
+def test_history_is_scoped_to_the_user(db):
+    alice, bob = _user(db, "alice"), _user(db, "bob")
+    job = Job(title="Backend", description_text="python")
+    resume = Resume(filename="cv.pdf", content_text="python")
+    db.add_all([job, resume])
+    db.flush()
+    t0 = datetime(2024, 1, 1)
+    for i, user_id in enumerate([alice.id, bob.id, alice.id, None, alice.id]):
+        db.add(Match(resume_id=resume.id, job_id=job.id, user_id=user_id, score=float(i),
+                     created_at=t0 + timedelta(minutes=i)))
+    db.commit()
+
+    assert count_matches(db, alice.id) == 3
+    assert count_matches(db, bob.id) == 1
+    rows = match_history(db, alice.id)
+    assert [r["score"] for r in rows] == [4.0, 2.0, 0.0]  # newest first
+    assert rows[0]["resume"] == "cv.pdf" and rows[0]["job"] == "Backend"
+    assert [r["score"] for r in match_history(db, alice.id, page=1, page_size=2)] == [0.0]
+    assert [r["score"] for r in match_history(db, bob.id)] == [1.0]
+
+
+def test_no_user_has_no_history(db):
+    job = Job(title="Backend", description_text="python")
+    resume = Resume(filename="cv.pdf", content_text="python")
+    db.add_all([job, resume])
+    db.flush()
+    db.add(Match(resume_id=resume.id, job_id=job.id, user_id=None, score=50.0))
+    db.commit()
+    # ownerless matches are nobody's history
+    assert count_matches(db, None) == 0
+    assert match_history(db, None) == []
@@ -0,0 +1,64 @@
+# tests/test_idf_model.py
+import numpy as np
+import pytest
+
+import idf_model
+from db import Job, Resume
+from idf_model import IdfModel, document_terms, feature_index, sync
+
+TEXTS = [
+    "python developer django",
+    "java developer spring",
+    "python data analyst",
+    "rust systems engineer",
+]
+
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(idf_model, "IDF_MIN_DOCS", 3)
+    yield str(tmp_path / "idf_model.npz")
+    # forget the test model; the next lookup reloads from IDF_MODEL_PATH
+    idf_model._cached.update(model=None, mtime=None)
+
+
+def test_add_document_counts_unique_terms():
+    model = IdfModel()
+    for text in TEXTS + ["python python python"]:
+        model.add_document(document_terms(text))
+    assert model.n_docs == 5
+    assert model.df[feature_index("python")] == 3
+    assert model.df[feature_index("python developer")] == 1
+    assert model.df[feature_index("cobol")] == 0
+
+
+def test_sync_round_trip(db, model_path):
+    db.add_all([Resume(filename=f"{i}.pdf", content_text=t) for i, t in enumerate(TEXTS[:3])])
+    db.add(Job(title="Systems", description_text=TEXTS[3]))
+    db.commit()
+
+    assert sync(db, path=model_path) == 4
+    model = IdfModel.load(model_path)
+    assert model.n_docs == 4 and model.ready and model.generation == 1
+    assert model.df[feature_index("python")] == 2
+    expected = IdfModel()
+    for text in TEXTS:
+        expected.add_document(document_terms(text))
+    np.testing.assert_array_equal(model.df, expected.df)
+
+    # nothing new: nothing counted twice, the snapshot is kept
+    assert sync(db, path=model_path) == 0
+    assert IdfModel.load(model_path).generation == 1
+
+    db.add(Resume(filename="4.pdf", content_text="python engineer"))
+    db.commit()
+    assert sync(db, path=model_path) == 1
+    model = IdfModel.load(model_path)
+    assert model.n_docs == 5
+    assert model.df[feature_index("python")] == 3
+    assert model.generation == 2  # grew by more than IDF_REFRESH_RATIO
+
+    # a rebuild recounts from scratch and still bumps the generation
+    assert sync(db, rebuild=True, path=model_path) == 5
+    model = IdfModel.load(model_path)
+    assert model.n_docs == 5 and model.generation == 3
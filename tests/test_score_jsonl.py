@@ -0,0 +1,51 @@
+# tests/test_score_jsonl.py
+import json
+
+import pytest
+
+from db import Job
+from features import store_job_features
+from score_jsonl import score_records
+from utils import compute_match_and_feedback
+
+JD = "Python developer: Django, PostgreSQL, Docker."
+
+
+def _lines(db):
+    job = Job(title="Backend", description_text=JD)
+    store_job_features(job)
+    db.add(job)
+    db.commit()
+    records = [
+        {"id": "a", "resume_text": "Python and Django developer", "jd_text": JD},
+        {"id": "b", "resume_text": "Java developer", "job_id": job.id},
+        {"id": "c", "resume_text": "Docker", "job_id": 999_999},
+        "not json {",
+        {"id": "e", "jd_text": JD},
+        {"id": "f", "resume_path": "/no/such/cv.pdf", "jd_text": JD},
+        {"id": "g", "resume_text": "PostgreSQL DBA"},
+        {"id": "h", "resume_text": "Docker, PostgreSQL and Python", "jd_text": JD},
+    ]
+    lines = [r if isinstance(r, str) else json.dumps(r) for r in records]
+    lines.insert(2, "   ")  # blank lines are skipped, line numbers still count them
+    return lines
+
+
+@pytest.mark.parametrize("workers, batch_size", [(1, 256), (1, 2), (2, 2)])
+def test_results_in_input_order_with_per_record_errors(db, workers, batch_size):
+    out = list(score_records(_lines(db), workers=workers, batch_size=batch_size, db=db))
+
+    assert [r["line"] for r in out] == [1, 2, 4, 5, 6, 7, 8, 9]
+    assert [r.get("id") for r in out] == ["a", "b", "c", None, "e", "f", "g", "h"]
+    errors = {r.get("id"): r["error"] for r in out if "error" in r}
+    assert errors["c"] == "ValueError: unknown job_id 999999"
+    assert errors[None].startswith("invalid JSON")
+    assert errors["e"] == "ValueError: record needs resume_text or resume_path"
+    assert errors["f"].startswith("FileNotFoundError")
+    assert errors["g"] == "ValueError: record needs job_id or jd_text"
+    assert set(errors) == {"c", None, "e", "f", "g"}
+
+    by_id = {r["id"]: r for r in out if "error" not in r}
+    for rid, text in (("a", "Python and Django developer"), ("b", "Java developer"),
+                      ("h", "Docker, PostgreSQL and Python")):
+        assert by_id[rid]["score"] == compute_match_and_feedback(text, JD)["score"]
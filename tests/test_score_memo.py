@@ -0,0 +1,70 @@
+# tests/test_score_memo.py
+import pytest
+
+import score_memo
+from db import Job, PairScore, Resume
+from score_memo import leaderboard, score_job, text_hash
+from utils import build_jd_features
+
+JD = "Python developer with Django, PostgreSQL and Docker experience."
+
+
+@pytest.fixture
+def job_and_resumes(db):
+    job = Job(title="Backend", description_text=JD, text_hash=text_hash(JD))
+    resumes = [
+        Resume(filename="a.pdf", content_text="Python and Django developer, Docker daily."),
+        Resume(filename="b.pdf", content_text="Java developer, Spring and Oracle."),
+        Resume(filename="c.pdf", content_text="PostgreSQL DBA who writes Python."),
+    ]
+    db.add(job)
+    db.add_all(resumes)
+    db.commit()
+    return job, resumes
+
+
+def test_second_run_reuses_every_score(db, job_and_resumes):
+    job, _ = job_and_resumes
+    feats = build_jd_features(JD)
+    assert score_job(db, job, feats) == {"scored": 3, "reused": 0}
+    assert score_job(db, job, feats) == {"scored": 0, "reused": 3}
+    assert [r["resume"] for r in leaderboard(db, job)][0] == "a.pdf"
+
+
+def test_changed_resume_text_is_rescored(db, job_and_resumes):
+    job, resumes = job_and_resumes
+    feats = build_jd_features(JD)
+    score_job(db, job, feats)
+    before = {r["resume_id"]: r["score"] for r in leaderboard(db, job)}
+
+    b = resumes[1]
+    b.content_text = "Python, Django, PostgreSQL and Docker developer."
+    b.text_hash = text_hash(b.content_text)
+    db.commit()
+    # the old score is stale: off the leaderboard until rescored
+    assert b.id not in {r["resume_id"] for r in leaderboard(db, job)}
+    assert score_job(db, job, feats) == {"scored": 1, "reused": 2}
+    after = {r["resume_id"]: r["score"] for r in leaderboard(db, job)}
+    assert after[b.id] > before[b.id]
+    assert db.query(PairScore).count() == 3  # rescored in place
+
+
+def test_changed_jd_text_rescores_everything(db, job_and_resumes):
+    job, _ = job_and_resumes
+    score_job(db, job, build_jd_features(JD))
+    new_jd = JD + " Kubernetes."
+    job.description_text = new_jd
+    job.text_hash = text_hash(new_jd)
+    db.commit()
+    assert leaderboard(db, job) == []
+    assert score_job(db, job, build_jd_features(new_jd)) == {"scored": 3, "reused": 0}
+
+
+def test_scorer_version_bump_rescores_everything(db, job_and_resumes, monkeypatch):
+    job, _ = job_and_resumes
+    feats = build_jd_features(JD)
+    score_job(db, job, feats)
+    monkeypatch.setattr(score_memo, "SCORER_VERSION", score_memo.SCORER_VERSION + 1)
+    assert leaderboard(db, job) == []
+    assert score_job(db, job, feats) == {"scored": 3, "reused": 0}
+    assert len(leaderboard(db, job)) == 3
@@ -0,0 +1,61 @@
+# tests/test_scoring.py
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from batch_scoring import score_jd_against_resumes, score_resume_against_jobs
+from utils import build_jd_features, compute_match_and_feedback, term_counts, tfidf_pair_similarity
+
+JD = (
+    "Senior Python developer. Build REST APIs with Django and PostgreSQL, "
+    "deploy with Docker on AWS. Machine learning experience with scikit-learn "
+    "is a plus. Python, SQL, Docker, AWS."
+)
+RESUMES = [
+    "Python developer, 6 years. Django, PostgreSQL, Docker, AWS. Built REST APIs "
+    "serving millions of requests. Some machine learning with scikit-learn.",
+    "Java and JavaScript engineer. Spring Boot, React, Kubernetes on GCP.",
+    "Data analyst: SQL, Excel, Tableau. Learning Python.",
+    "",
+    "python python python docker docker aws",
+]
+
+
+@pytest.fixture(autouse=True)
+def no_idf_model(monkeypatch):
+    # the per-pair TF-IDF path; the corpus model has its own tests
+    monkeypatch.setattr("idf_model.get_idf_model", lambda: None)
+    monkeypatch.setattr("batch_scoring.get_idf_model", lambda: None)
+
+
+@pytest.mark.parametrize("resume", [r for r in RESUMES if r])
+def test_tfidf_pair_similarity_matches_sklearn(resume):
+    vectorizer = TfidfVectorizer(stop_words="english")
+    m = vectorizer.fit_transform([JD, resume])
+    want = cosine_similarity(m[0], m[1])[0, 0]
+    assert tfidf_pair_similarity(term_counts(JD), term_counts(resume)) == pytest.approx(want, abs=1e-9)
+
+
+def test_tfidf_pair_similarity_empty():
+    assert tfidf_pair_similarity(term_counts(JD), {}) == 0.0
+    assert tfidf_pair_similarity({}, term_counts(JD)) == 0.0
+
+
+def _scores(row):
+    return row["score"], row["similarity"], row["skill_match_pct"]
+
+
+def test_batch_matches_per_pair_scores():
+    feats = build_jd_features(JD)
+    batch = score_jd_against_resumes(feats, RESUMES)
+    for resume, row in zip(RESUMES, batch):
+        assert _scores(row) == _scores(compute_match_and_feedback(resume, JD, jd_features=feats))
+
+
+def test_resume_against_jobs_matches_per_pair_scores():
+    jds = [JD, "Frontend engineer: JavaScript, React, CSS.", "Data analyst with SQL and Tableau."]
+    feats = [build_jd_features(jd) for jd in jds]
+    resume = RESUMES[0]
+    batch = score_resume_against_jobs(resume, feats)
+    for jd, f, row in zip(jds, feats, batch):
+        assert _scores(row) == _scores(compute_match_and_feedback(resume, jd, jd_features=f))
@@ -0,0 +1,88 @@
+# tests/test_skill_index.py
+import pytest
+
+import skill_index
+from db import Resume, ResumeSkill, Skill
+from skill_index import add_skills, has_all_skills, resumes_with_skills, sync, unindexed
+
+TEXTS = [
+    "Python developer: Django, Docker, Kubernetes",
+    "Java and JavaScript, Spring Boot, Docker",
+    "Python data scientist, machine learning, Node.js dashboards",
+    "C++ and Python, embedded Linux",
+]
+
+
+def _resumes(db, texts):
+    rows = [Resume(filename=f"{i}.pdf", content_text=t) for i, t in enumerate(texts)]
+    db.add_all(rows)
+    db.commit()
+    return [r.id for r in rows]
+
+
+def _postings(db, name):
+    return sorted(
+        rid for (rid,) in db.query(ResumeSkill.resume_id).join(Skill, Skill.id == ResumeSkill.skill_id)
+        .filter(Skill.name == name)
+    )
+
+
+def test_new_resumes_and_new_skills_are_back_filled(db):
+    ids = _resumes(db, TEXTS[:3])
+    add_skills(db, ["Python", "docker"])
+    assert unindexed(db, ["python", "docker"]) == ["python", "docker"]
+    assert sync(db) == 4
+    assert unindexed(db, ["python", "docker"]) == []
+    assert _postings(db, "python") == [ids[0], ids[2]]
+
+    # a new resume: only it is scanned
+    ids += _resumes(db, TEXTS[3:])
+    assert unindexed(db, ["python"]) == ["python"]
+    assert sync(db) == 1
+    assert _postings(db, "python") == [ids[0], ids[2], ids[3]]
+
+    # a new skill: back-filled over every existing resume, once
+    add_skills(db, ["Kubernetes", "Machine Learning", "node.js", "c++"])
+    assert unindexed(db, ["python", "kubernetes"]) == ["kubernetes"]
+    assert sync(db) == 4
+    assert _postings(db, "kubernetes") == [ids[0]]
+    assert _postings(db, "machine learning") == _postings(db, "node js") == [ids[2]]
+    assert _postings(db, "c++") == [ids[3]]
+    assert sync(db) == 0
+
+
+def test_sync_starts_after_indexed_through(db):
+    ids = _resumes(db, TEXTS)
+    add_skills(db, ["docker"])
+    # already matched against the first resume (e.g. by another process)
+    db.query(Skill).filter(Skill.name == "docker").update({Skill.indexed_through: ids[0]})
+    db.commit()
+    assert sync(db) == 1
+    assert _postings(db, "docker") == [ids[1]]
+    assert db.query(Skill.indexed_through).filter(Skill.name == "docker").scalar() == ids[-1]
+
+
+@pytest.mark.parametrize("skills", [
+    ["python"], ["Python", "DOCKER"], ["docker"], ["python", "machine learning"],
+    ["Node.js"], ["c++", "python"], ["java", "python"], ["python", "rust"], ["cobol"],
+])
+def test_in_memory_index_and_sql_clause_agree(db, skills):
+    ids = _resumes(db, TEXTS)
+    add_skills(db, ["python", "docker", "machine learning", "node.js", "c++", "java", "rust"])
+    sync(db)
+    with_skills = resumes_with_skills(db, skills).tolist()
+    clause = has_all_skills(db, skills)
+    assert with_skills == sorted(rid for (rid,) in db.query(Resume.id).filter(clause))
+    assert set(with_skills) <= set(ids)
+
+
+def test_index_follows_new_postings(db):
+    _resumes(db, TEXTS[:2])
+    add_skills(db, ["docker"])
+    sync(db)
+    assert len(resumes_with_skills(db, ["docker"])) == 2
+    more = _resumes(db, ["Docker swarm"])
+    sync(db)
+    assert resumes_with_skills(db, ["docker"]).tolist()[-1] == more[0]
+    assert resumes_with_skills(db, []) is None and has_all_skills(db, []) is None
+    assert skill_index.normalize_skill(" Node.JS ") == "node js"
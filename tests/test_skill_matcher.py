@@ -0,0 +1,35 @@
+# tests/test_skill_matcher.py
+from skill_matcher import SkillMatcher, get_matcher
+
+
+def test_whole_words_only():
+    m = SkillMatcher(["java", "r", "go"])
+    assert m.find("JavaScript, Rust and Golang") == set()
+    assert m.find("Java 17; R (tidyverse); Go.") == {"java", "r", "go"}
+
+
+def test_plus_and_hash_are_part_of_the_word():
+    m = SkillMatcher(["c", "c++", "c#"])
+    assert m.find("5 years of C++") == {"c++"}
+    assert m.find("C# / .NET and plain C") == {"c#", "c"}
+
+
+def test_multi_word_skills():
+    m = SkillMatcher(["machine learning", "learning", "node.js", "scikit-learn"])
+    assert m.find("applied Machine-Learning with scikit learn on Node JS") == {
+        "machine learning", "learning", "node.js", "scikit-learn",
+    }
+    assert m.find("machine shop, lifelong learning") == {"learning"}
+    assert m.find("machinelearning") == set()
+
+
+def test_overlapping_multi_word_skills():
+    # a failed partial match must not hide a skill that starts inside it
+    m = SkillMatcher(["deep learning models", "learning models"])
+    assert m.find("deep learning pipelines and learning models") == {"learning models"}
+
+
+def test_match_keeps_skill_order():
+    matched, missing = get_matcher(["SQL", "python", "docker"]).match("python and sql")
+    assert matched == ["sql", "python"]
+    assert missing == ["docker"]
@@ -0,0 +1,59 @@
+# tests/test_spawn_from_app.py
+"""
+Worker processes started during a Streamlit script run must not re-run the
+script (see spawning.py). AppTest runs a script the way `streamlit run`
+does, with a stand-in __main__ whose __file__ is the script.
+
+    python -m pytest tests/
+"""
+import multiprocessing
+import os
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PARSE_SCRIPT = """
+import streamlit as st
+from doc_parser import ParseError, ParserPool
+
+with ParserPool(workers=1, timeout=30) as pool:
+    try:
+        st.write(pool.parse("cv.txt", b"python developer")["text"])
+    except ParseError as e:
+        st.error(e.code)
+"""
+
+
+@pytest.fixture(scope="module", autouse=True)
+def app_dir(tmp_path_factory):
+    # the database etc. come from conftest.py; the app may write next to it
+    tmp = tmp_path_factory.mktemp("spawn_test")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp)
+        yield tmp
+    # stop the workers the app spawned, they would outlive the test otherwise
+    for p in multiprocessing.active_children():
+        p.terminate()
+        p.join(timeout=5)
+
+
+def test_parse_in_worker_from_script_run():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(PARSE_SCRIPT, default_timeout=60).run()
+    assert not at.exception
+    assert [e.value for e in at.error] == []
+    assert at.markdown[0].value == "python developer"
+
+
+def test_app_batch_worker_stays_up(monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.setenv("BATCH_WORKERS", "1")
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60).run()
+    assert not at.exception
+    time.sleep(5)  # a worker that re-ran app.py died within a second or two
+    workers = [p for p in multiprocessing.active_children() if p.name.startswith("SpawnProcess")]
+    assert workers and all(p.is_alive() for p in workers)
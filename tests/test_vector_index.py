@@ -0,0 +1,44 @@
+# tests/test_vector_index.py
+import numpy as np
+
+from vector_index import TopKIndex
+
+
+def _unit(rng, n, dim=32):
+    x = rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def _brute_force(ids, vectors, q, k):
+    scores = vectors @ q
+    top = np.argsort(-scores, kind="stable")[:k]
+    return ids[top], scores[top]
+
+
+def test_search_matches_brute_force():
+    rng = np.random.default_rng(1)
+    vectors = _unit(rng, 2000)
+    ids = np.arange(100, 2100)
+    index = TopKIndex(build_threshold=256)
+    # incremental adds: clustered, then appended to existing clusters
+    for lo in range(0, 2000, 300):
+        index.add(ids[lo:lo + 300], vectors[lo:lo + 300])
+    assert index.centroids is not None
+
+    for q in _unit(rng, 25):
+        for k in (1, 10, 50):
+            got_ids, got_scores = index.search(q, k)
+            want_ids, want_scores = _brute_force(ids, vectors, q, k)
+            np.testing.assert_allclose(got_scores, want_scores, rtol=1e-5, atol=1e-6)
+            assert set(got_ids.tolist()) == set(want_ids.tolist())
+
+
+def test_small_index_and_large_k():
+    rng = np.random.default_rng(2)
+    vectors = _unit(rng, 20)
+    index = TopKIndex()
+    index.add(np.arange(20), vectors)
+    assert index.centroids is None  # below build_threshold: full scan
+    got_ids, _ = index.search(vectors[3], k=100)
+    assert len(got_ids) == 20 and got_ids[0] == 3
+    assert len(TopKIndex().search(vectors[0], 5)[0]) == 0
@@ -60,40 +60,21 @@
 #     return clean_text(txt).lower()
 # utils.py
 import re
-from io import BytesIO
 from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from PyPDF2 import PdfReader
-from docx import Document
 import math
+import metrics
+from skill_matcher import get_matcher
 
 # ---------- file parsing ----------
+# Bounded extraction (magic-byte format detection, page / size caps) lives
+# in doc_parser.py; these raise doc_parser.ParseError on unreadable files.
 def extract_text_from_pdf_bytes(b):
-    text_chunks = []
-    try:
-        reader = PdfReader(BytesIO(b))
-        for p in reader.pages:
-            page_text = p.extract_text() or ""
-            text_chunks.append(page_text)
-    except Exception:
-        # fallback: try decode
-        try:
-            text_chunks.append(b.decode(errors="ignore"))
-        except:
-            pass
-    return "\n".join(text_chunks)
+    from doc_parser import PARSE_MAX_CHARS, PARSE_MAX_PAGES, _pdf_text
+    return _pdf_text(b, PARSE_MAX_PAGES, PARSE_MAX_CHARS)[0]
 
 def extract_text_from_docx_bytes(b):
-    try:
-        doc = Document(BytesIO(b))
-        paragraphs = [p.text for p in doc.paragraphs]
-        return "\n".join(paragraphs)
-    except Exception:
-        try:
-            return b.decode(errors="ignore")
-        except:
-            return ""
+    from doc_parser import PARSE_MAX_CHARS, _docx_text
+    return _docx_text(b, PARSE_MAX_CHARS)[0]
 
 def parse_uploaded_file(uploaded_file):
     """
@@ -102,35 +83,30 @@ def parse_uploaded_file(uploaded_file):
     """
     if uploaded_file is None:
         return ""
-    name = uploaded_file.name.lower()
-    b = uploaded_file.read()
-    if name.endswith(".pdf"):
-        return extract_text_from_pdf_bytes(b)
-    elif name.endswith(".docx") or name.endswith(".doc"):
-        return extract_text_from_docx_bytes(b)
-    elif name.endswith(".txt"):
-        try:
-            return b.decode(errors="ignore")
-        except:
-            return ""
-    else:
-        # best-effort
-        try:
-            return extract_text_from_pdf_bytes(b)
-        except:
-            try:
-                return extract_text_from_docx_bytes(b)
-            except:
-                try:
-                    return b.decode(errors="ignore")
-                except:
-                    return ""
+    return parse_bytes(uploaded_file.name, uploaded_file.read())
+
+def parse_bytes(name, b):
+    """
+    name: original file name (only a hint, the format comes from the bytes)
+    b: raw file bytes
+    returns plain text extracted, in this process (doc_parser.parse_isolated
+    runs it in a worker with a timeout and memory limit)
+    """
+    from doc_parser import parse_document
+    return parse_document(name, b)["text"]
 
 # ---------- keyword extraction ----------
+@metrics.timed("keywords")
 def extract_keywords(text, top_n=12):
     text = (text or "").strip()
     if not text:
         return []
+    # ranked by corpus idf once there is a corpus model (see idf_model.py)
+    from idf_model import get_idf_model
+    model = get_idf_model()
+    if model is not None:
+        return model.top_terms(text, top_n)
+    from sklearn.feature_extraction.text import TfidfVectorizer
     vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1,2), max_features=200)
     try:
         tfidf = vectorizer.fit_transform([text])
@@ -145,27 +121,133 @@ def extract_keywords(text, top_n=12):
         commons = [w for w,c in Counter(tokens).most_common(top_n)]
         return commons
 
+# ---------- JD feature artifacts ----------
+# Bump whenever scoring or the artifact layout changes so stored JD
+# artifacts (see features.py) get rebuilt instead of reused.
+SCORER_VERSION = 2
+
+# idf weight of a term present in only one of the two documents when
+# TfidfVectorizer (smooth_idf) is fitted on exactly [jd, resume]
+_ONE_SIDED_IDF = 1.0 + math.log(3.0 / 2.0)
+
+# Same output as TfidfVectorizer(stop_words='english').build_analyzer()
+# (lowercase, token_pattern, stop words removed, then n-grams) without the
+# per-call overhead of sklearn's analyzer pipeline.
+# findall with \w\w+ yields exactly the tokens of sklearn's (?u)\b\w\w+\b
+# (greedy runs never start mid-word) without the boundary checks
+_TOKEN_RE = re.compile(r"\w\w+")
+_stop_words = None
+
+def _get_stop_words():
+    global _stop_words
+    if _stop_words is None:
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        _stop_words = ENGLISH_STOP_WORDS
+    return _stop_words
+
+def _tokens(text):
+    stop = _get_stop_words()
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in stop]
+
+def _get_analyzer():
+    _tokens("")
+    return _tokens
+
+def analyze_terms(text):
+    """unigrams then bigrams, as the analyzer with ngram_range=(1, 2)"""
+    tokens = _tokens(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def term_counts(text):
+    """
+    Token counts using the same analyzer as the similarity vectorizer
+    returns dict term -> count
+    """
+    # count first, then drop stop words from the (far fewer) distinct terms
+    counts = Counter(_TOKEN_RE.findall((text or "").lower()))
+    for t in counts.keys() & _get_stop_words():
+        del counts[t]
+    return dict(counts)
+
+@metrics.timed("jd_features")
+def build_jd_features(jd_text):
+    """
+    Everything the scorer needs from a JD, computed once per job
+    returns a JSON-serialisable dict
+    """
+    from idf_model import current_generation, hashed_counts
+
+    counts = term_counts(jd_text)
+    indices, hcounts = hashed_counts(counts)
+    return {
+        "version": SCORER_VERSION,
+        "idf_generation": current_generation(),
+        "keywords": extract_keywords(jd_text or "", top_n=10),
+        "term_counts": counts,
+        # hashed term counts for the corpus idf model
+        "hashed": {"indices": indices.tolist(), "counts": hcounts.tolist()},
+        "n_tokens": sum(counts.values()),
+        "n_terms": len(counts),
+    }
+
+def tfidf_pair_similarity(jd_counts, resume_counts):
+    """
+    Cosine similarity of a TF-IDF model fitted on [jd, resume], computed
+    directly from term counts so the JD never has to be re-tokenized.
+    Shared terms get idf 1, one-sided terms get _ONE_SIDED_IDF.
+    """
+    w2 = _ONE_SIDED_IDF * _ONE_SIDED_IDF
+    dot = 0.0
+    jd_norm = 0.0
+    for t, c in jd_counts.items():
+        rc = resume_counts.get(t)
+        if rc:
+            dot += c * rc
+            jd_norm += c * c
+        else:
+            jd_norm += c * c * w2
+    res_norm = 0.0
+    for t, c in resume_counts.items():
+        res_norm += c * c if t in jd_counts else c * c * w2
+    if not dot or not jd_norm or not res_norm:
+        return 0.0
+    return dot / math.sqrt(jd_norm * res_norm)
+
+def text_similarity(jd_features, resume_text):
+    """
+    Cosine of the JD and resume under the corpus idf model, or the two-document
+    TF-IDF cosine while there is no corpus model yet
+    """
+    from idf_model import get_idf_model, hashed_counts
+    counts = term_counts(resume_text)
+    model = get_idf_model()
+    if model is not None and "hashed" in jd_features:
+        return model.similarity(model.jd_vector(jd_features), model.weigh(*hashed_counts(counts)))
+    return tfidf_pair_similarity(jd_features["term_counts"], counts)
+
 # ---------- matching & feedback ----------
-def compute_match_and_feedback(resume_text, jd_text):
+@metrics.timed("match")
+def compute_match_and_feedback(resume_text, jd_text, jd_features=None):
+    """
+    jd_features: optional precomputed build_jd_features() output; when given
+    the JD text is not reprocessed at all
+    """
     resume_text = (resume_text or "")
-    jd_text = (jd_text or "")
+    if jd_features is None:
+        jd_features = build_jd_features(jd_text)
     # similarity (tfidf cosine)
-    try:
-        vectorizer = TfidfVectorizer(stop_words='english')
-        X = vectorizer.fit_transform([jd_text, resume_text])
-        sim = float(cosine_similarity(X[0:1], X[1:2])[0][0])
-    except Exception:
-        sim = 0.0
-
-    jd_keywords = extract_keywords(jd_text, top_n=10)
-    matched = []
-    missing = []
-    resume_lower = resume_text.lower()
-    for kw in jd_keywords:
-        if kw.lower() in resume_lower:
-            matched.append(kw)
-        else:
-            missing.append(kw)
+    with metrics.stage("match.similarity"):
+        try:
+            sim = float(text_similarity(jd_features, resume_text))
+        except Exception:
+            sim = 0.0
+
+    jd_keywords = list(jd_features["keywords"])
+    # whole-word presence, one pass over the resume
+    with metrics.stage("match.skills"):
+        found = get_matcher(jd_keywords).find(resume_text)
+        matched = [kw for kw in jd_keywords if kw.lower() in found]
+        missing = [kw for kw in jd_keywords if kw.lower() not in found]
 
     skill_match_pct = len(matched) / max(1, len(jd_keywords))
     # weighted final score: 70% overall text similarity + 30% skill presence
@@ -173,37 +255,38 @@ def compute_match_and_feedback(resume_text, jd_text):
     final_score_percent = round(final_score * 100, 1)
 
     # Build feedback (human-friendly)
-    feedback_lines = []
-    if final_score_percent >= 85:
-        feedback_lines.append("🎉 Excellent match — your resume aligns very well with the JD.")
-    elif final_score_percent >= 65:
-        feedback_lines.append("🙂 Good match, but you can improve. Highlight measurable achievements and missing skills below.")
-    elif final_score_percent >= 45:
-        feedback_lines.append("⚠️ Fair match — focus on adding the missing skills and tailor the summary/skills section.")
-    else:
-        feedback_lines.append("🔴 Low match — you should tailor your resume to this job and add the missing skills and achievements.")
-
-    if missing:
-        feedback_lines.append("🔎 **Missing / weakly represented skills**: " + ", ".join(missing))
-        feedback_lines.append("✅ **How to fix**: add these skills to a prominent 'Skills' section and show 1–2 bullet points per skill demonstrating where you used it (metrics help).")
-    else:
-        feedback_lines.append("✅ All top JD keywords are present in the resume — great!")
-
-    # Formatting suggestions
-    word_count = len(re.findall(r"\w+", resume_text))
-    if word_count < 200:
-        feedback_lines.append("📝 Resume may be too short — add more concrete bullets and metrics.")
-    elif word_count > 1400:
-        feedback_lines.append("📝 Resume may be too long — trim irrelevant experience, aim for clarity.")
-    else:
-        feedback_lines.append("📝 Resume length looks fine.")
-
-    # Sample micro-rewrite suggestions (examples)
-    if missing:
-        example_suggestions = []
-        for s in missing[:5]:
-            example_suggestions.append(f"- Add a bullet: 'Implemented {s} to achieve X% improvement in Y' (quantify if possible).")
-        feedback_lines.append("✍️ Example bullets you could add:\n" + "\n".join(example_suggestions))
+    with metrics.stage("match.feedback"):
+        feedback_lines = []
+        if final_score_percent >= 85:
+            feedback_lines.append("🎉 Excellent match — your resume aligns very well with the JD.")
+        elif final_score_percent >= 65:
+            feedback_lines.append("🙂 Good match, but you can improve. Highlight measurable achievements and missing skills below.")
+        elif final_score_percent >= 45:
+            feedback_lines.append("⚠️ Fair match — focus on adding the missing skills and tailor the summary/skills section.")
+        else:
+            feedback_lines.append("🔴 Low match — you should tailor your resume to this job and add the missing skills and achievements.")
+
+        if missing:
+            feedback_lines.append("🔎 **Missing / weakly represented skills**: " + ", ".join(missing))
+            feedback_lines.append("✅ **How to fix**: add these skills to a prominent 'Skills' section and show 1–2 bullet points per skill demonstrating where you used it (metrics help).")
+        else:
+            feedback_lines.append("✅ All top JD keywords are present in the resume — great!")
+
+        # Formatting suggestions
+        word_count = len(re.findall(r"\w+", resume_text))
+        if word_count < 200:
+            feedback_lines.append("📝 Resume may be too short — add more concrete bullets and metrics.")
+        elif word_count > 1400:
+            feedback_lines.append("📝 Resume may be too long — trim irrelevant experience, aim for clarity.")
+        else:
+            feedback_lines.append("📝 Resume length looks fine.")
+
+        # Sample micro-rewrite suggestions (examples)
+        if missing:
+            example_suggestions = []
+            for s in missing[:5]:
+                example_suggestions.append(f"- Add a bullet: 'Implemented {s} to achieve X% improvement in Y' (quantify if possible).")
+            feedback_lines.append("✍️ Example bullets you could add:\n" + "\n".join(example_suggestions))
 
     return {
         "score": final_score_percent,
@@ -0,0 +1,181 @@
+# vector_index.py
+import threading
+
+import numpy as np
+
+# Exact top-k inner-product search with cluster upper-bound pruning.
+# Vectors are grouped around k-means centroids c with radius r_c (largest
+# distance of a member to its centroid). For any member x and query q,
+#   q.x = q.c + q.(x - c) <= q.c + |q| * r_c      (Cauchy-Schwarz)
+# so clusters are scanned best-bound first and the scan stops as soon as
+# a bound can't beat the current k-th best score. Results are identical to
+# a full scan; only promising clusters are touched.
+
+
+class TopKIndex:
+    def __init__(self, build_threshold=256, seed=0):
+        """
+        build_threshold: below this many vectors search is a plain full scan
+        """
+        self.build_threshold = build_threshold
+        self.seed = seed
+        self.ids = np.zeros(0, dtype=np.int64)
+        self._vecs = None  # (capacity, dim) buffer, first len(self) rows valid
+        self._n = 0
+        self.centroids = None
+        self.radii = None
+        self._assign = np.zeros(0, dtype=np.int64)
+        self._members = None
+        self._built_at = 0
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def vectors(self):
+        if self._vecs is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._vecs[:self._n]
+
+    # ---------- building ----------
+    def add(self, ids, vectors):
+        """Append vectors; new rows join their nearest cluster (incremental)."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or not len(vectors):
+            return
+        ids = np.asarray(ids, dtype=np.int64)
+        n_new = len(vectors)
+        if self._vecs is None:
+            self._vecs = np.empty((max(64, n_new), vectors.shape[1]), dtype=np.float32)
+        elif self._n + n_new > len(self._vecs):
+            grown = np.empty((max(2 * len(self._vecs), self._n + n_new), self._vecs.shape[1]), dtype=np.float32)
+            grown[:self._n] = self._vecs[:self._n]
+            self._vecs = grown
+        self._vecs[self._n:self._n + n_new] = vectors
+        self.ids = np.concatenate([self.ids, ids])
+        start = self._n
+        self._n += n_new
+
+        if self._n < self.build_threshold:
+            return
+        if self.centroids is None or self._n >= 2 * self._built_at:
+            # re-cluster as the corpus doubles so pruning stays effective
+            self._build()
+            return
+        new = self._vecs[start:self._n]
+        assign, dist = self._nearest(new)
+        self._assign = np.concatenate([self._assign, assign])
+        np.maximum.at(self.radii, assign, dist)
+        self._members = None
+
+    def _nearest(self, X):
+        # squared euclidean distance to every centroid
+        d2 = (
+            (X * X).sum(axis=1)[:, None]
+            - 2.0 * (X @ self.centroids.T)
+            + (self.centroids * self.centroids).sum(axis=1)[None, :]
+        )
+        assign = d2.argmin(axis=1)
+        dist = np.sqrt(np.maximum(d2[np.arange(len(X)), assign], 0.0))
+        return assign, dist
+
+    def _build(self, iterations=10):
+        X = self.vectors
+        n_clusters = max(1, int(np.sqrt(self._n)))
+        rng = np.random.default_rng(self.seed)
+        self.centroids = X[rng.choice(self._n, size=n_clusters, replace=False)].copy()
+        for _ in range(iterations):
+            assign, _ = self._nearest(X)
+            counts = np.bincount(assign, minlength=n_clusters)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assign, X)
+            nonempty = counts > 0
+            self.centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+        assign, dist = self._nearest(X)
+        self._assign = assign
+        self.radii = np.zeros(n_clusters, dtype=np.float64)
+        np.maximum.at(self.radii, assign, dist)
+        self._members = None
+        self._built_at = self._n
+
+    def _cluster_members(self):
+        if self._members is None:
+            order = np.argsort(self._assign, kind="stable")
+            bounds = np.searchsorted(self._assign[order], np.arange(len(self.centroids) + 1))
+            self._members = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+        return self._members
+
+    # ---------- querying ----------
+    def search(self, query, k=10):
+        """
+        returns: (ids, scores) of the k highest inner products, best first
+        """
+        if not self._n or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        q = np.asarray(query, dtype=np.float32)
+        k = min(k, self._n)
+
+        if self.centroids is None:
+            rows = np.arange(self._n)
+            scores = self.vectors @ q
+        else:
+            members = self._cluster_members()
+            bounds = self.centroids @ q + float(np.linalg.norm(q)) * self.radii
+            row_parts, score_parts = [], []
+            kth = -np.inf
+            n_seen = 0
+            for c in np.argsort(-bounds):
+                if n_seen >= k and bounds[c] < kth:
+                    break
+                rows_c = members[c]
+                if not len(rows_c):
+                    continue
+                row_parts.append(rows_c)
+                score_parts.append(self._vecs[rows_c] @ q)
+                n_seen += len(rows_c)
+                if n_seen >= k:
+                    all_scores = np.concatenate(score_parts)
+                    kth = np.partition(all_scores, len(all_scores) - k)[len(all_scores) - k]
+            rows = np.concatenate(row_parts)
+            scores = np.concatenate(score_parts)
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self.ids[rows[top]], scores[top]
+
+    # ---------- syncing with an EmbeddingStore ----------
+    def sync(self, store):
+        """
+        Add rows appended to an (append-only) embedding_store.EmbeddingStore
+        since the last sync; start over if the store was reset
+        """
+        n_store = len(store)
+        if n_store < self._n or (self._n and not np.array_equal(store.ids[:1], self.ids[:1])):
+            self.__init__(self.build_threshold, self.seed)
+        if n_store > self._n:
+            self.add(store.ids[self._n:], np.asarray(store.vectors[self._n:]))
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(kind):
+    """Process-wide index over embedding_store.get_store(kind), kept in sync."""
+    from embedding_store import get_store
+
+    with _indexes_lock:
+        index = _indexes.setdefault(kind, TopKIndex())
+        index.sync(get_store(kind))
+        return index
+
+
+def shortlist(kind, query_vec, k):
+    """
+    Ids of the k stored resumes / jobs nearest to query_vec, best first;
+    None when no query vector is available (caller should score everything)
+    """
+    if query_vec is None:
+        return None
+    ids, _ = get_index(kind).search(query_vec, k)
+    return [int(i) for i in ids]
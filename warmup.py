@@ -0,0 +1,86 @@
+# warmup.py
+"""
+Warm-up hook for the heavy, process-wide resources (tokenizer, numeric
+stack, embedding model) and a cold-start timer.
+
+    python warmup.py              # time every stage of a cold start
+    python warmup.py --no-model   # skip the embedding model
+"""
+import argparse
+import json
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+def _timed(timings, name, fn):
+    t0 = time.perf_counter()
+    fn()
+    timings[name] = round(time.perf_counter() - t0, 3)
+
+
+def _load_model():
+    from matcher import MODEL_UNAVAILABLE, get_model
+    try:
+        get_model().encode(["warm up"], show_progress_bar=False)
+    except MODEL_UNAVAILABLE as e:
+        log.warning("embedding model unavailable (%s), similarity falls back to TF-IDF", e)
+
+
+def _import_scoring_modules():
+    import batch_scoring  # noqa: F401
+    import vector_index  # noqa: F401
+
+
+def _load_idf_model():
+    from idf_model import get_idf_model
+    get_idf_model()
+
+
+def warmup(load_model=True):
+    """
+    Load everything a first match would otherwise pay for; safe to call from
+    a background thread, every resource is loaded once per process
+    returns {stage: seconds}
+    """
+    from utils import _get_analyzer
+
+    timings = {}
+    _timed(timings, "analyzer", _get_analyzer)
+    _timed(timings, "scoring_modules", _import_scoring_modules)
+    _timed(timings, "idf_model", _load_idf_model)
+    if load_model:
+        _timed(timings, "embedding_model", _load_model)
+    return timings
+
+
+def _import_core():
+    import db  # noqa: F401
+    import utils  # noqa: F401
+
+
+def _init_db():
+    from db import init_db
+    init_db()
+
+
+def measure_cold_start(load_model=True):
+    """
+    Time a cold start stage by stage; run in a fresh process
+    returns {stage: seconds, ..., "total": seconds}
+    """
+    t0 = time.perf_counter()
+    timings = {}
+    _timed(timings, "import_core", _import_core)
+    _timed(timings, "init_db", _init_db)
+    timings.update(warmup(load_model=load_model))
+    timings["total"] = round(time.perf_counter() - t0, 3)
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start time")
+    parser.add_argument("--no-model", action="store_true", help="skip loading the embedding model")
+    args = parser.parse_args()
+    print(json.dumps(measure_cold_start(load_model=not args.no_model), indent=2))